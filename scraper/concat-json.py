@@ -1,23 +1,71 @@
 """
-Concatinates streams of json data, each looking like:
+Merges files of scraped puzzles, dropping duplicates, and writes a json
+array of the puzzles to standard out. Each file can either be a json array:
     [
         {json record 1},
         {json record 2},
         ...
         {json record N}
     ]
+or JSONL, with one json record per line, as written by scrape-puzzles.py.
+
+Puzzles are matched on their websudoku id. With --index, the ids written
+are recorded in the "exported" table of a persistent puzzle index (see
+puzzle_index.py), so puzzles written by an earlier run are skipped too. The
+scraper's own table of ids in the same database is left alone, so the
+database can be shared with scrape-puzzles.py --index.
 
 Usage:
-    concat-json.py f1.json f2.json ... jk_json
+    concat-json.py [--index puzzles.sqlite] f1.json f2.jsonl ... fk.json
 """
-import sys
+import argparse
 import json
+import sys
 
-json_filenames = sys.argv[1:]
-output_json = []
+from puzzle_index import PuzzleIndex
 
-for fname in json_filenames:
+
+def iter_records(fname):
     with open(fname) as f:
-        output_json.extend(json.load(f))
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        if first == '[':
+            f.seek(0)
+            yield from json.load(f)
+        else:
+            f.seek(0)
+            yield from (json.loads(line) for line in f if line.strip())
+
+
+EXPORTED_TABLE = 'exported'
+
+
+def merge(json_filenames, index, out):
+    """Write the puzzles not already in the index, returning how many.
+
+    The index should be one of exported ids, PuzzleIndex(path, EXPORTED_TABLE),
+    not the scraper's index of collected ids, which holds every puzzle.
+    """
+    n_written = 0
+    out.write('[')
+    for fname in json_filenames:
+        for record in iter_records(fname):
+            if not index.add(record['id'], commit=False):
+                continue
+            if n_written:
+                out.write(', ')
+            json.dump(record, out)
+            n_written += 1
+    out.write(']')
+    index.commit()
+    return n_written
+
 
-json.dump(output_json, sys.stdout)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('json_filenames', nargs='+')
+    parser.add_argument('--index', default=':memory:')
+    args = parser.parse_args()
+    with PuzzleIndex(args.index, EXPORTED_TABLE) as index:
+        merge(args.json_filenames, index, sys.stdout)
@@ -0,0 +1,91 @@
+"""
+A persistent index of the websudoku puzzle ids already collected.
+
+The ids are kept in a SQLite table keyed on the id, so checking for an id is
+a B-tree lookup, and stays fast with tens of millions of ids. The scraper
+uses the index to throw away puzzles it has already seen, and concat-json.py
+uses it to drop duplicates when merging files. Each keeps its ids in its own
+table, so the two can share one database file.
+
+    with PuzzleIndex('puzzles.sqlite') as index:
+        if index.add(puzzle['id']):
+            ...  # A new puzzle.
+"""
+import json
+import re
+import sqlite3
+import threading
+
+
+class PuzzleIndex:
+    """A set of puzzle ids, stored in a SQLite database at path.
+
+    The index can be shared between threads. Use ':memory:' as the path for
+    an index that is not kept on disk. Indexes with different table names
+    are separate sets, even when they share a database.
+    """
+    def __init__(self, path, table='ids'):
+        if not re.fullmatch(r'[A-Za-z_][A-Za-z0-9_]*', table):
+            raise ValueError('Bad table name %r.' % table)
+        self.path = path
+        self.table = table
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS %s (id INTEGER PRIMARY KEY)' % table)
+        self.connection.commit()
+        self.lock = threading.Lock()
+
+    def __contains__(self, puzzle_id):
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT 1 FROM %s WHERE id = ?' % self.table,
+                (int(puzzle_id),)).fetchone()
+        return row is not None
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute(
+                'SELECT COUNT(*) FROM %s' % self.table).fetchone()[0]
+
+    def add(self, puzzle_id, commit=True):
+        """Add an id, returning True if it was not already in the index.
+
+        When adding many ids one at a time, pass commit=False and call commit
+        at the end, as committing each id to disk is slow.
+        """
+        with self.lock:
+            cursor = self.connection.execute(
+                'INSERT OR IGNORE INTO %s VALUES (?)' % self.table,
+                (int(puzzle_id),))
+            if commit:
+                self.connection.commit()
+        return cursor.rowcount == 1
+
+    def commit(self):
+        with self.lock:
+            self.connection.commit()
+
+    def add_many(self, puzzle_ids):
+        """Add many ids in one transaction, returning how many were new."""
+        with self.lock:
+            before = self.connection.total_changes
+            self.connection.executemany(
+                'INSERT OR IGNORE INTO %s VALUES (?)' % self.table,
+                ((int(puzzle_id),) for puzzle_id in puzzle_ids))
+            self.connection.commit()
+            return self.connection.total_changes - before
+
+    def add_from_jsonl(self, path):
+        """Add the ids of every puzzle in a JSONL file of puzzles."""
+        with open(path) as f:
+            return self.add_many(
+                json.loads(line)['id'] for line in f if line.strip())
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,17 +1,33 @@
 """
-Scrape puzzles from websudoku.com and write the results to json over
-standard out.
+Scrape puzzles from websudoku.com, appending each one to a JSONL file (one
+json record per line) as soon as it arrives.
+
+A small pool of worker threads shares a token bucket, which limits the rate
+of requests across all of them, so adding workers does not make the scraper
+any less polite. Failed requests are retried with exponential backoff.
+Puzzles already in the output file count towards the total, so an
+interrupted scrape can be restarted with the same command. If an index of
+puzzle ids is given (see puzzle_index.py), puzzles whose id is already in
+the index are thrown away and fetched again.
 
 Usage
 -----
-    python scrape_puzzles.py <number of puzzles> <difficulty level (1-4)>
+    python scrape-puzzles.py <number of puzzles> <difficulty level (1-4)> <output.jsonl>
+        [--workers W] [--rate R] [--base-url URL] [--index puzzles.sqlite]
 """
-import requests
-import re
+import argparse
 import json
-import sys
+import os
 import random
+import re
+import threading
 import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from puzzle_index import PuzzleIndex
 
 regexps = {
     'mask': re.compile(rb'INPUT.+editmask.+VALUE="([0-1]+)"'),
@@ -20,29 +36,145 @@ regexps = {
     'id': re.compile(rb'INPUT.+pid.+VALUE="([0-9]+)"')
 }
 
-def scrape_puzzles(base_url, level, n):
-    url = base_url
+HEADERS = {
+    'User-agent': ('Mozilla/5.0 (Macintosh; Intel Mac OS X 10.9; rv:34.0) '
+                   'Gecko/20100101 Firefox/34.0}')
+}
+
+# On average one request a minute, across all workers.
+DEFAULT_RATE = 1 / 60
+
+# Status codes worth trying again, rather than giving up on.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """A thread safe token bucket.
+
+    Tokens are added at rate per second, up to capacity, and each request
+    takes one, waiting until one is available.
+    """
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity,
+                    self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def fetch(url, params, retries=5, backoff=30, timeout=60, bucket=None):
+    """Get a page, retrying with exponential backoff (plus some jitter).
+
+    Connection errors and the statuses in RETRY_STATUSES are retried, up to
+    retries times; other errors are raised straight away. If bucket is a
+    TokenBucket, every attempt, retries included, takes a token from it.
+    """
+    full_url = url + '?' + urllib.parse.urlencode(params)
+    request = urllib.request.Request(full_url, headers=HEADERS)
+    for attempt in range(retries + 1):
+        if bucket is not None:
+            bucket.acquire()
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return response.read()
+        except urllib.error.HTTPError as e:
+            if e.code not in RETRY_STATUSES or attempt == retries:
+                raise
+        except (urllib.error.URLError, TimeoutError):
+            if attempt == retries:
+                raise
+        time.sleep(backoff * 2**attempt * random.uniform(0.5, 1.5))
+
+
+def count_lines(path):
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        return sum(1 for line in f if line.strip())
+
+
+def scrape_puzzles(base_url, level, n, output_path, workers=4,
+                   rate=DEFAULT_RATE, retries=5, backoff=30, index=None,
+                   max_duplicates=10):
+    """Scrape puzzles until output_path holds n of them.
+
+    If index is a PuzzleIndex, only puzzles with new ids are written, and
+    their ids are added to the index. Each worker gives up on a puzzle after
+    max_duplicates pages in a row that are duplicates, or do not hold a
+    puzzle. Returns the number of puzzles written by this call.
+    """
+    remaining = n - count_lines(output_path)
+    if remaining <= 0:
+        return 0
+    if index is not None and os.path.exists(output_path):
+        # Catch up on any puzzles written before their id was indexed.
+        index.add_from_jsonl(output_path)
+    bucket = TokenBucket(rate)
+    write_lock = threading.Lock()
     params = {'level': level}
-    headers = {
-        'User-agent': ('Mozilla/5.0 (Macintosh; Intel Mac OS X 10.9; rv:34.0) '
-                       'Gecko/20100101 Firefox/34.0}')
-    }
-    data = []
-    for _ in range(n):
-        html = requests.get(url, params=params, headers=headers).content
-        puzzle = scrape_puzzle_data(html)
-        data.append(puzzle)
-        time.sleep(random.uniform(30, 4*60)) 
-    return data
+
+    def scrape_one(_):
+        for _ in range(max_duplicates):
+            html = fetch(base_url, params, retries=retries, backoff=backoff,
+                         bucket=bucket)
+            try:
+                puzzle = scrape_puzzle_data(html)
+            except ValueError:
+                continue
+            with write_lock:
+                if index is not None and puzzle['id'] in index:
+                    continue
+                with open(output_path, 'a') as f:
+                    f.write(json.dumps(puzzle) + '\n')
+                if index is not None:
+                    index.add(puzzle['id'])
+                return True
+        return False
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return sum(pool.map(scrape_one, range(remaining)))
+
 
 def scrape_puzzle_data(html):
-    return {
-        key: re.search(regexps[key], html).groups()[0].decode('utf-8') 
-        for key in regexps
-    }
+    """Read a puzzle from a page, raising ValueError if it does not hold one."""
+    puzzle = {}
+    for key, regexp in regexps.items():
+        match = regexp.search(html)
+        if match is None:
+            raise ValueError('The page has no puzzle %s.' % key)
+        puzzle[key] = match.group(1).decode('utf-8')
+    return puzzle
 
 
 if __name__ == '__main__':
-    n, level = int(sys.argv[1]), sys.argv[2]
-    puzzs = scrape_puzzles('http://view.websudoku.com', level, n)
-    json.dump(puzzs, sys.stdout)
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('n', type=int)
+    parser.add_argument('level')
+    parser.add_argument('output')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help='requests per second, across all workers')
+    parser.add_argument('--base-url', default='http://view.websudoku.com')
+    parser.add_argument('--index', help='a puzzle id index to skip known ids')
+    args = parser.parse_args()
+    index = PuzzleIndex(args.index) if args.index else None
+    try:
+        scrape_puzzles(args.base_url, args.level, args.n, args.output,
+                       workers=args.workers, rate=args.rate, index=index)
+    finally:
+        if index is not None:
+            index.close()
@@ -8,6 +8,7 @@ setup(
     description="Logical Sudoku Solver",
     long_description="""Logical Sudoku Solver""",
     packages=["sudoku"],
+    install_requires=["numpy"],
     author="Matthew Drury",
     tests_require=["pytest"],
     zip_safe=False,
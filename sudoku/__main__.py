@@ -0,0 +1,3 @@
+from sudoku.cli import main
+
+main()
@@ -1,28 +1,36 @@
-from typing import List
-from math import log, exp
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Type
+from math import log, tanh
 
-from sudoku.moves import MOVES_ORDER, Move
-from sudoku.solver import Solution
+import numpy as np
+
+from sudoku.boards import GameBoard, MarkedBoard
+from sudoku.moves import MOVES_ORDER, Finished, Move, NewMarks
+from sudoku.solver import Solution, Solver, SolveStatus
+
+MOVE_INDEX = {move: idx for idx, move in enumerate(MOVES_ORDER)}
+
+# Nested sets of allowed moves, from easiest to hardest. Each keeps the order
+# of MOVES_ORDER, so a solver restricted to a tier finds the same moves as an
+# unrestricted one until it needs a move outside the tier.
+TIERS: Dict[str, List[Type[Move]]] = {
+    "singles": MOVES_ORDER[:3],
+    "intersections": MOVES_ORDER[:5],
+    "doubles": MOVES_ORDER,
+}
 
 
 def sigmoid(t):
-    return 2 * exp(t) / (exp(t) + 1) - 1
+    # 2 * exp(t) / (exp(t) + 1) - 1, written so that it does not overflow for
+    # large t.
+    return tanh(t / 2)
 
 
 class MoveSchedule:
     def __init__(self, solution: Solution):
         self.solution = solution
-        self.schedule: List[List[int]] = self._build_schedule()
-
-    def _build_schedule(self):
-        schedule = []
-        move_vector = [0 for _ in MOVES_ORDER]
-        for move in self.solution.iter_moves():
-            schedule.append(move_vector[:])
-            move_idx = MOVES_ORDER.index(move.__class__)
-            move_vector[move_idx] += 1
-        schedule.append(move_vector[:])
-        return schedule
+        self.batch = ScheduleBatch.from_solutions([solution])
+        self.schedule: List[List[int]] = self.batch.move_schedule(0).tolist()
 
 
 class DifficultySchedule:
@@ -31,15 +39,9 @@ class DifficultySchedule:
 
     def __init__(self, solution: Solution):
         self.move_schedule = MoveSchedule(solution)
-        self.schedule: List[float] = self._build_schedule()
-
-    def _build_schedule(self):
-        return [
-            sum(sigmoid(self.MOVE_INCREMENT * mvcnt) for mvcnt in row)
-            # The final move is always Finished, which should not bump the
-            # difficulty.
-            for row in self.move_schedule.schedule[:-1]
-        ]
+        self.schedule: List[float] = (
+            self.move_schedule.batch.difficulty_schedule().tolist()
+        )
 
     def plot_difficulty_curve(self, ax, **kwargs):
         n_moves = len(self.schedule)
@@ -48,3 +50,403 @@ class DifficultySchedule:
     @property
     def difficulty(self) -> float:
         return self.schedule[-1]
+
+
+def sigmoid_table(max_count: int) -> np.ndarray:
+    """sigmoid(MOVE_INCREMENT * count), for each count up to max_count."""
+    counts = np.arange(max_count + 1)
+    return np.tanh(DifficultySchedule.MOVE_INCREMENT * counts / 2)
+
+
+def final_difficulty(move_vectors: np.ndarray) -> np.ndarray:
+    """The difficulty of solutions, from their move vectors alone.
+
+    move_vectors is one move vector (the final row of a MoveSchedule), or an
+    (N, len(MOVES_ORDER)) array of them. The result agrees with
+    DifficultySchedule.difficulty, but costs one lookup per move type rather
+    than a pass over the moves.
+    """
+    move_vectors = np.array(move_vectors, dtype=np.int64)
+    # The Finished move never bumps the difficulty.
+    move_vectors[..., MOVE_INDEX[Finished]] = 0
+    table = sigmoid_table(int(move_vectors.max(initial=0)))
+    return table[move_vectors].sum(axis=-1)
+
+
+class ScheduleBatch:
+    """Move and difficulty schedules for many solutions at once.
+
+    The moves of every solution are packed end to end into one array of move
+    tags, each an index into MOVES_ORDER, with the moves of the k'th solution
+    at tags[offsets[k]:offsets[k + 1]]. Schedules are then worked out with
+    cumulative sums over the tags, one move type at a time, rather than a
+    Python loop over the moves.
+
+        batch = ScheduleBatch.from_solutions(solutions)
+        batch.move_vectors          # (N, len(MOVES_ORDER)) final move counts.
+        batch.difficulties()        # (N,) as DifficultySchedule.difficulty.
+        batch.difficulty_schedule() # Every DifficultySchedule, end to end.
+    """
+
+    def __init__(self, tags: np.ndarray, offsets: np.ndarray):
+        self.tags = np.asarray(tags, dtype=np.int8)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        if self.offsets[0] != 0 or self.offsets[-1] != len(self.tags):
+            raise ValueError("Offsets must run from 0 to the number of tags.")
+        self.lengths = np.diff(self.offsets)
+
+    @classmethod
+    def from_solutions(cls, solutions: Iterable[Solution]) -> "ScheduleBatch":
+        tags: List[np.ndarray] = []
+        offsets = [0]
+        for solution in solutions:
+            tags.append(
+                np.fromiter(
+                    (MOVE_INDEX[move.__class__] for move in solution.iter_moves()),
+                    dtype=np.int8,
+                )
+            )
+            offsets.append(offsets[-1] + len(tags[-1]))
+        tags_array = np.concatenate(tags) if tags else np.zeros(0, dtype=np.int8)
+        return cls(tags_array, np.array(offsets))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def move_vectors(self) -> np.ndarray:
+        """The final move vector of each solution."""
+        solution_idxs = np.repeat(np.arange(len(self)), self.lengths)
+        n_moves = len(MOVES_ORDER)
+        counts = np.bincount(
+            solution_idxs * n_moves + self.tags, minlength=len(self) * n_moves
+        )
+        return counts.reshape(len(self), n_moves)
+
+    def counts_before(self, move_idx: int) -> np.ndarray:
+        """The number of moves of one type made before each move.
+
+        Counts start again from zero at the start of each solution.
+        """
+        is_move = (self.tags == move_idx).astype(np.int64)
+        cumulative = np.cumsum(is_move)
+        # The running count at the start of each solution.
+        starts = np.concatenate([[0], cumulative])[self.offsets[:-1]]
+        return cumulative - is_move - np.repeat(starts, self.lengths)
+
+    def move_schedules(self) -> np.ndarray:
+        """The move vector before each move, for every solution end to end."""
+        return np.stack(
+            [self.counts_before(idx) for idx in range(len(MOVES_ORDER))], axis=1
+        )
+
+    def move_schedule(self, k: int) -> np.ndarray:
+        """The rows of the k'th solution's MoveSchedule."""
+        tags = self.tags[self.offsets[k] : self.offsets[k + 1]]
+        one_hot = tags[:, None] == np.arange(len(MOVES_ORDER))
+        after = np.cumsum(one_hot, axis=0, dtype=np.int64)
+        return np.vstack([np.zeros((1, len(MOVES_ORDER)), dtype=np.int64), after])
+
+    def difficulty_schedule(self) -> np.ndarray:
+        """The difficulty before each move, for every solution end to end.
+
+        The schedule for the k'th solution, as in DifficultySchedule.schedule,
+        is at offsets[k]:offsets[k + 1].
+        """
+        table = sigmoid_table(int(self.lengths.max(initial=0)))
+        schedule = np.zeros(len(self.tags))
+        for idx in range(len(MOVES_ORDER)):
+            schedule += table[self.counts_before(idx)]
+        return schedule
+
+    def difficulties(self) -> np.ndarray:
+        """The final difficulty of each solution."""
+        return final_difficulty(self.move_vectors)
+
+
+class DifficultyCurveDensity:
+    """Difficulty curves of a whole corpus, reduced to a 2-D histogram.
+
+    Rather than drawing one line per puzzle, as plot_difficulty_curve does,
+    curves are added in batches and counted into bins of (step, difficulty),
+    so memory does not grow with the number of puzzles. The histogram can
+    then be drawn as a density, or as bands between per-step quantiles, each
+    with a handful of artists however many curves were added.
+
+        density = DifficultyCurveDensity()
+        for solutions in chunks:
+            density.add_batch(ScheduleBatch.from_solutions(solutions))
+        density.plot_quantile_bands(ax, color="red")
+
+    At each step, only the curves which are still going are counted.
+    """
+
+    def __init__(self, n_bins: int = 120, max_difficulty: Optional[float] = None):
+        if max_difficulty is None:
+            # Each move type other than Finished adds at most one.
+            max_difficulty = len(MOVES_ORDER) - 1
+        self.bin_edges = np.linspace(0, max_difficulty, n_bins + 1)
+        # counts[step, bin] is the number of curves in a bin at a step.
+        self.counts = np.zeros((0, n_bins), dtype=np.int64)
+
+    @property
+    def n_bins(self) -> int:
+        return len(self.bin_edges) - 1
+
+    @property
+    def n_curves(self) -> np.ndarray:
+        """The number of curves still going at each step."""
+        return self.counts.sum(axis=1)
+
+    def add_batch(self, batch: ScheduleBatch):
+        """Count the difficulty curves of a batch of solutions."""
+        schedule = batch.difficulty_schedule()
+        steps = np.arange(len(schedule)) - np.repeat(batch.offsets[:-1], batch.lengths)
+        bins = np.searchsorted(self.bin_edges, schedule, side="right") - 1
+        bins = np.clip(bins, 0, self.n_bins - 1)
+        n_steps = int(steps.max(initial=-1)) + 1
+        if n_steps > len(self.counts):
+            grown = np.zeros((n_steps, self.n_bins), dtype=np.int64)
+            grown[: len(self.counts)] = self.counts
+            self.counts = grown
+        self.counts += np.bincount(
+            steps * self.n_bins + bins, minlength=self.counts.size
+        ).reshape(self.counts.shape)
+
+    def add_solutions(self, solutions: Iterable[Solution]):
+        self.add_batch(ScheduleBatch.from_solutions(solutions))
+
+    def quantiles(self, qs: Iterable[float]) -> np.ndarray:
+        """Per-step quantiles of difficulty, estimated from the histogram.
+
+        Returns a (len(qs), n_steps) array, interpolating linearly within
+        bins.
+        """
+        cumulative = np.cumsum(self.counts, axis=1)
+        n_curves = cumulative[:, -1]
+        widths = np.diff(self.bin_edges)
+        steps = np.arange(len(self.counts))
+        result = []
+        for q in qs:
+            target = q * n_curves
+            # The first bin holding the target curve, which for q = 0 is the
+            # first bin holding any curve.
+            bins = (cumulative < np.maximum(target, 1)[:, None]).sum(axis=1)
+            bins = np.minimum(bins, self.n_bins - 1)
+            below = np.where(bins > 0, cumulative[steps, bins - 1], 0)
+            in_bin = self.counts[steps, bins]
+            fraction = np.divide(
+                target - below,
+                in_bin,
+                out=np.zeros(len(steps)),
+                where=in_bin > 0,
+            )
+            result.append(self.bin_edges[bins] + np.clip(fraction, 0, 1) * widths[bins])
+        return np.array(result).reshape(-1, len(steps))
+
+    def plot_density(self, ax, **kwargs):
+        """Draw the histogram, as the fraction of curves in each bin."""
+        n_curves = np.maximum(self.n_curves, 1)
+        step_edges = np.arange(len(self.counts) + 1) - 0.5
+        return ax.pcolormesh(
+            step_edges,
+            self.bin_edges,
+            (self.counts / n_curves[:, None]).T,
+            **kwargs,
+        )
+
+    def plot_quantile_bands(
+        self,
+        ax,
+        qs: Tuple[float, ...] = (0.05, 0.25, 0.5, 0.75, 0.95),
+        alpha: float = 0.2,
+        **kwargs,
+    ):
+        """Draw bands between quantiles, with a line at the middle one.
+
+        qs should be symmetric about the median. Each pair of outer and inner
+        quantiles is filled, so the inner bands come out darker.
+        """
+        quantiles = self.quantiles(qs)
+        steps = np.arange(len(self.counts))
+        for k in range(len(qs) // 2):
+            ax.fill_between(
+                steps, quantiles[k], quantiles[-k - 1], alpha=alpha, **kwargs
+            )
+        if len(qs) % 2:
+            ax.plot(steps, quantiles[len(qs) // 2], **kwargs)
+
+
+class GradeOnlySolution(Solution):
+    """A solution that keeps only what is needed to grade a puzzle.
+
+    Rather than storing every move and mark applied by the solver, this keeps
+    the running move vector (as in the final row of a MoveSchedule) and the
+    running difficulty, so its size does not grow with the number of steps.
+
+    Pass one to a Solver to solve in grade-only mode:
+
+        sln = Solver(game_board, solution=GradeOnlySolution()).solve()
+        sln.move_vector, sln.difficulty
+
+    For fully solved puzzles, the difficulty agrees with
+    DifficultySchedule.difficulty. The Finished move never bumps the
+    difficulty.
+    """
+
+    keeps_trace = False
+
+    def __init__(self):
+        self.move_vector: List[int] = [0 for _ in MOVES_ORDER]
+        self.difficulty: float = 0.0
+        self.n_steps = 0
+        self.is_full_solution = False
+        self.status = SolveStatus.IN_PROGRESS
+        self.elapsed = 0.0
+        self.n_rounds = 0
+
+    def record(self, move: Move, marks: Optional[NewMarks] = None):
+        move_idx = MOVE_INDEX[move.__class__]
+        count = self.move_vector[move_idx]
+        if move.__class__ is not Finished:
+            increment = DifficultySchedule.MOVE_INCREMENT
+            self.difficulty += sigmoid(increment * (count + 1)) - sigmoid(
+                increment * count
+            )
+        self.move_vector[move_idx] = count + 1
+        self.n_steps += 1
+
+    def record_round(self, n_moves: int):
+        self.n_rounds += 1
+
+    def iter_moves(self):
+        raise ValueError("A GradeOnlySolution does not keep its moves.")
+
+    def iter_marks(self):
+        raise ValueError("A GradeOnlySolution does not keep its marks.")
+
+
+class LazySolution(GradeOnlySolution):
+    """A grade-only solution that can rebuild its full trace on demand.
+
+    Solving keeps only the move vector and difficulty, as for a
+    GradeOnlySolution, plus a packed snapshot of the marked board every
+    checkpoint_interval steps (see solve_lazily). The moves and marks are
+    only worked out, by replaying the solve, when they are first asked for.
+    A replay starts from the last checkpoint at or before the first step
+    asked for, so iter_moves and iter_steps can start part way through the
+    trace without replaying the steps before that checkpoint.
+    """
+
+    def __init__(self, game_board: GameBoard, checkpoint_interval: int = 16):
+        super().__init__()
+        self.game_board = game_board.copy()
+        self.checkpoint_interval = checkpoint_interval
+        # Pairs (step, packed marked board), the board after step moves.
+        self.checkpoints: List[Tuple[int, Tuple[int, ...]]] = []
+        self._trace: Optional[Solution] = None
+
+    @property
+    def trace(self) -> Solution:
+        """The full solution, replayed the first time it is accessed."""
+        if self._trace is None:
+            trace = Solution()
+            for move, marks in self.iter_steps():
+                trace.record(move, marks)
+            trace.status = self.status
+            trace.is_full_solution = self.is_full_solution
+            trace.elapsed = self.elapsed
+            self._trace = trace
+        return self._trace
+
+    @property
+    def moves(self) -> List[Move]:
+        return self.trace.moves
+
+    @property
+    def marks(self) -> List[NewMarks]:
+        return self.trace.marks
+
+    def iter_steps(self, start: int = 0) -> Iterator[Tuple[Move, Optional[NewMarks]]]:
+        """Replay the solve, yielding (move, marks) for each step from start."""
+        solver = Solver(self.game_board)
+        step = 0
+        for checkpoint_step, packed in self.checkpoints:
+            if checkpoint_step > start:
+                break
+            step = checkpoint_step
+            solver.marked_board = MarkedBoard.unpack(packed)
+        for move, marks in solver.iter_solve():
+            if step >= start:
+                yield move, marks
+            step += 1
+
+    def iter_moves(self, start: int = 0) -> Iterator[Move]:
+        if self._trace is not None:
+            yield from self._trace.moves[start:]
+            return
+        for move, _ in self.iter_steps(start):
+            yield move
+
+    def iter_marks(self):
+        yield from self.marks
+
+
+def solve_lazily(game_board: GameBoard, checkpoint_interval: int = 16) -> LazySolution:
+    """Grade a puzzle, keeping just enough to rebuild its trace later."""
+    solution = LazySolution(game_board, checkpoint_interval)
+    solver = Solver(game_board, solution=solution)
+    start = time.perf_counter()
+    for step, (move, marks) in enumerate(solver.iter_solve(), start=1):
+        solution.record(move, marks)
+        if step % checkpoint_interval == 0:
+            solution.checkpoints.append((step, solver.marked_board.pack()))
+    solution.status = solver.status
+    solution.is_full_solution = solver.status == SolveStatus.SOLVED
+    solution.elapsed += time.perf_counter() - start
+    return solution
+
+
+def solve_within_tier(
+    game_board: GameBoard,
+    allowed_moves: List[Type[Move]] = MOVES_ORDER,
+    max_difficulty: Optional[float] = None,
+) -> GradeOnlySolution:
+    """Grade a puzzle, giving up as soon as it leaves a difficulty tier.
+
+    Only the allowed moves are searched for, so harder moves are never
+    searched. The solve stops with status TIER_EXCEEDED as soon as no allowed
+    move applies, or the running difficulty passes max_difficulty.
+    """
+    solution = GradeOnlySolution()
+    solver = Solver(game_board, solution=solution, moves=allowed_moves)
+    for move, marks in solver.iter_solve():
+        solution.record(move, marks)
+        if max_difficulty is not None and solution.difficulty > max_difficulty:
+            solution.status = SolveStatus.TIER_EXCEEDED
+            return solution
+    solution.status = solver.status
+    solution.is_full_solution = solver.status == SolveStatus.SOLVED
+    if solver.status == SolveStatus.STUCK and allowed_moves != MOVES_ORDER:
+        solution.status = SolveStatus.TIER_EXCEEDED
+    return solution
+
+
+def classify_tier(
+    game_board: GameBoard, tiers: Dict[str, List[Type[Move]]] = TIERS
+) -> Optional[str]:
+    """Find the easiest tier whose moves are enough to solve a puzzle.
+
+    A single solver is run with the easiest tier's moves. Each time it gets
+    stuck, it is given the next tier's moves and resumes from where it stopped,
+    so no work is repeated and a puzzle costs at most one full solve. Returns
+    None if the puzzle cannot be solved using even the hardest tier.
+    """
+    solver = Solver(game_board, solution=GradeOnlySolution())
+    for name, allowed_moves in tiers.items():
+        solver.moves = allowed_moves
+        # A stuck solver resumes once it has more moves to search for.
+        solver.is_complete = False
+        if solver.solve().status == SolveStatus.SOLVED:
+            return name
+    return None
@@ -0,0 +1,228 @@
+import os
+from multiprocessing import Pool, shared_memory
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from sudoku.analysis import GradeOnlySolution
+from sudoku.boards import GameBoard
+from sudoku.bulk import BoardBatch
+from sudoku.moves import MOVES_ORDER
+from sudoku.solver import Solution, Solver, SolveStatus
+
+# One fixed width record per puzzle, as written by solve_shared.
+RESULT_DTYPE = np.dtype(
+    [
+        ("status", np.int8),
+        ("n_steps", np.int32),
+        ("move_vector", np.int32, (len(MOVES_ORDER),)),
+        ("difficulty", np.float64),
+        ("elapsed", np.float64),
+    ]
+)
+
+
+class BudgetStats:
+    """Summary of how a batch of solves used their budgets."""
+
+    def __init__(self):
+        self.n_puzzles = 0
+        self.n_solved = 0
+        self.n_stuck = 0
+        self.n_budget_exhausted = 0
+        self.n_contradiction = 0
+        self.total_steps = 0
+        self.max_steps = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def update(self, solution: Solution):
+        self.n_puzzles += 1
+        match solution.status:
+            case SolveStatus.SOLVED:
+                self.n_solved += 1
+            case SolveStatus.STUCK:
+                self.n_stuck += 1
+            case SolveStatus.BUDGET_EXHAUSTED:
+                self.n_budget_exhausted += 1
+            case SolveStatus.CONTRADICTION:
+                self.n_contradiction += 1
+        self.total_steps += solution.n_steps
+        self.max_steps = max(self.max_steps, solution.n_steps)
+        self.total_seconds += solution.elapsed
+        self.max_seconds = max(self.max_seconds, solution.elapsed)
+
+    @classmethod
+    def from_results(cls, results: np.ndarray) -> "BudgetStats":
+        """Summarize an array of RESULT_DTYPE records."""
+        stats = cls()
+        status = results["status"]
+        stats.n_puzzles = len(results)
+        stats.n_solved = int(np.sum(status == SolveStatus.SOLVED.value))
+        stats.n_stuck = int(np.sum(status == SolveStatus.STUCK.value))
+        stats.n_budget_exhausted = int(
+            np.sum(status == SolveStatus.BUDGET_EXHAUSTED.value)
+        )
+        stats.n_contradiction = int(np.sum(status == SolveStatus.CONTRADICTION.value))
+        if len(results):
+            stats.total_steps = int(results["n_steps"].sum())
+            stats.max_steps = int(results["n_steps"].max())
+            stats.total_seconds = float(results["elapsed"].sum())
+            stats.max_seconds = float(results["elapsed"].max())
+        return stats
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+    def __repr__(self):
+        return "BudgetStats({})".format(
+            ", ".join("{}={}".format(k, v) for k, v in self.__dict__.items())
+        )
+
+
+class BatchResult:
+    def __init__(self):
+        self.solutions: List[Solution] = []
+        self.budget_stats = BudgetStats()
+
+    def add(self, solution: Solution):
+        self.solutions.append(solution)
+        self.budget_stats.update(solution)
+
+
+def solve_batch(
+    game_boards: Iterable[GameBoard],
+    max_steps: Optional[int] = None,
+    max_seconds: Optional[float] = None,
+    solution_factory: Callable[[], Solution] = Solution,
+) -> BatchResult:
+    """Solve many puzzles, each under the same per-solve budget.
+
+    A puzzle that runs out of budget does not hold up the rest of the batch;
+    its partial solution is kept with status BUDGET_EXHAUSTED, and the
+    result's budget_stats reports how many puzzles that happened to.
+    """
+    result = BatchResult()
+    for game_board in game_boards:
+        solver = Solver(game_board, solution=solution_factory())
+        result.add(solver.solve(max_steps=max_steps, max_seconds=max_seconds))
+    return result
+
+
+class SharedBatchResult:
+    """The results of solve_shared.
+
+    Attributes
+    ----------
+      - results: An array of RESULT_DTYPE records, one per puzzle.
+      - traces: If traces were asked for, a dictionary from the index of each
+        puzzle to its full Solution.
+      - budget_stats: As for BatchResult.
+    """
+
+    def __init__(self, results: np.ndarray, traces: Dict[int, Solution]):
+        self.results = results
+        self.traces = traces
+        self.budget_stats = BudgetStats.from_results(results)
+
+
+def solve_shared(
+    batch: BoardBatch,
+    jobs: Optional[int] = None,
+    max_steps: Optional[int] = None,
+    max_seconds: Optional[float] = None,
+    chunk_size: int = 256,
+    keep_traces: bool = False,
+) -> SharedBatchResult:
+    """Grade a batch of puzzles in a pool of worker processes.
+
+    The puzzles are copied once into shared memory, and each worker reads
+    them from there by index, without any copying, and writes a fixed width
+    record of each result (see RESULT_DTYPE) into a shared output array. Only
+    index ranges are sent to the workers, so nothing is pickled per puzzle.
+    If keep_traces is True, the full Solution of each solve is sent back
+    through the pool, and returned in traces.
+    """
+    n_puzzles, n_cells = batch.cells.shape
+    cells_shm = shared_memory.SharedMemory(create=True, size=max(batch.cells.nbytes, 1))
+    results_size = max(n_puzzles * RESULT_DTYPE.itemsize, 1)
+    results_shm = shared_memory.SharedMemory(create=True, size=results_size)
+    try:
+        cells = np.ndarray(batch.cells.shape, np.uint8, buffer=cells_shm.buf)
+        cells[:] = batch.cells
+        del cells
+        # Keep the chunks small enough that every worker gets several.
+        jobs = jobs or os.cpu_count() or 1
+        chunk_size = max(1, min(chunk_size, n_puzzles // (4 * jobs)))
+        chunks = [
+            (start, min(start + chunk_size, n_puzzles))
+            for start in range(0, n_puzzles, chunk_size)
+        ]
+        init_args = (
+            cells_shm.name,
+            results_shm.name,
+            n_puzzles,
+            n_cells,
+            max_steps,
+            max_seconds,
+            keep_traces,
+        )
+        with Pool(jobs, initializer=_init_worker, initargs=init_args) as pool:
+            traces = {}
+            for chunk_traces in pool.imap_unordered(_solve_chunk, chunks):
+                traces.update(chunk_traces)
+        shared_results = np.ndarray((n_puzzles,), RESULT_DTYPE, buffer=results_shm.buf)
+        results = shared_results.copy()
+        del shared_results
+    finally:
+        for shm in (cells_shm, results_shm):
+            shm.close()
+            shm.unlink()
+    return SharedBatchResult(results, traces)
+
+
+# Set up in each worker process by _init_worker.
+_worker = {}
+
+
+def _init_worker(
+    cells_name, results_name, n_puzzles, n_cells, max_steps, max_seconds, keep_traces
+):
+    cells_shm = shared_memory.SharedMemory(name=cells_name)
+    results_shm = shared_memory.SharedMemory(name=results_name)
+    _worker.update(
+        # Keep the shared memory objects alive as long as the arrays.
+        shms=(cells_shm, results_shm),
+        cells=np.ndarray((n_puzzles, n_cells), np.uint8, buffer=cells_shm.buf),
+        results=np.ndarray((n_puzzles,), RESULT_DTYPE, buffer=results_shm.buf),
+        box_size=round(n_cells**0.25),
+        max_steps=max_steps,
+        max_seconds=max_seconds,
+        keep_traces=keep_traces,
+    )
+
+
+def _solve_chunk(chunk: Tuple[int, int]) -> List[Tuple[int, Solution]]:
+    cells, results = _worker["cells"], _worker["results"]
+    traces = []
+    for idx in range(*chunk):
+        game_board = GameBoard(_worker["box_size"], cells[idx])
+        solution = Solution() if _worker["keep_traces"] else GradeOnlySolution()
+        solver = Solver(game_board, solution=solution)
+        solution = solver.solve(
+            max_steps=_worker["max_steps"], max_seconds=_worker["max_seconds"]
+        )
+        if _worker["keep_traces"]:
+            traces.append((idx, solution))
+            grade = GradeOnlySolution()
+            for move in solution.moves:
+                grade.record(move)
+        else:
+            grade = solution
+        record = results[idx]
+        record["status"] = solution.status.value
+        record["n_steps"] = solution.n_steps
+        record["move_vector"] = grade.move_vector
+        record["difficulty"] = grade.difficulty
+        record["elapsed"] = solution.elapsed
+    return traces
@@ -0,0 +1,298 @@
+"""Benchmarks of the solver's hot paths, run with python -m sudoku bench.
+
+    python -m sudoku bench --output bench.json
+    python -m sudoku bench --baseline bench.json
+
+The benchmarks run over CORPUS, a fixed corpus of puzzles at four levels:
+
+  - easy: Solvable with singles alone.
+  - medium: Needs an intersection trick, and no doubles.
+  - hard: Needs a hidden or naked double.
+  - evil: The logical solver gets stuck.
+
+CORPUS was made by make_corpus(seed=0). It is kept in the source, rather
+than generated on each run, so that results stay comparable when the
+generator changes.
+
+Each metric is a cost, so lower is better:
+
+  - search.<Move>: Seconds per call to Move.search, over the marked boards
+    reached at every step of solving the corpus.
+  - add_marks: Seconds per call to MarkedBoard.add_marks, replaying the marks
+    added by every move made solving the corpus.
+  - solve.<level>: Seconds per Solver.solve, for puzzles at each level.
+  - memory.<level>: Peak bytes allocated per Solver.solve, as measured by
+    tracemalloc.
+
+Times are the best of several repeats, as with timeit. Results are written
+as json, and compare finds the metrics that got worse than a saved baseline
+by more than a tolerance.
+"""
+
+import hashlib
+import platform
+import time
+import tracemalloc
+from random import Random
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sudoku.analysis import MOVE_INDEX, TIERS
+from sudoku.boards import GameBoard, MarkedBoard
+from sudoku.generate import generate, grade
+from sudoku.moves import (
+    MOVES_ORDER,
+    HiddenDouble,
+    IntersectionTrickClaiming,
+    IntersectionTrickPointing,
+    NakedDouble,
+    NewMarks,
+    clear_house_memos,
+)
+from sudoku.solver import Solver, SolveStatus
+
+FORMAT = "sudoku-bench"
+VERSION = 1
+LEVELS = ["easy", "medium", "hard", "evil"]
+
+CORPUS: Dict[str, List[str]] = {
+    "easy": [
+        "072503040300801500100700820020030010609010300703000009200000050000070001000050030",
+        "051007000300000006060195002000000010080700200570480000000070000400003000000009680",
+        "057320416610700030384610200005100003109253604400070025003000561000030070000502348",
+        "000004000005001200040036009007200004080063000006000308002300500000000000168070002",
+        "708600309039801006600030000904008000801002050300007010096050738007200000100000200",
+        "267000080080060501004800300040000800030180000021040706000009040400006902500010000",
+        "006000003900005040008140000700000491800400000000020000600000500040069100001200008",
+        "006008200500000071000043008005000000907410060300000040000200007000004300000605000",
+    ],
+    "medium": [
+        "000070632000010009800050070504001000020009003109000080010300200000600300060000000",
+        "003009040067000000000300197000005000080070004100690030001030000542080700000000000",
+        "000400100090200060600000000000600420009500000108030000000104000007050008035000001",
+        "080901004010050000400060000207000080800130000003008290000007030000080006000500920",
+        "850601000306050000107020080090000000000078000000005106000003002600000300200000047",
+        "800060200072005010050300090000006940047002500000000000030000054014080000000010380",
+        "400000000060234001100580000000003700207600090004008100020000506700860410000150000",
+        "000006000000097080000040950400020095060700002002008000800300000013075000540009300",
+    ],
+    "hard": [
+        "000400000006370000030080010000000435001000207900000000800000023600027540000001070",
+        "015000900400520000080907100500000600090700003000350049000060800008000071000000060",
+        "040006010000300700000470200000000300102005000800040670003900000500000860080010400",
+        "009070000000003080012800600000010405900000006001750000090080002020006009007000003",
+        "076010000002089107080020400001500640400000702000000000000003000890006000600007030",
+        "000000800018000065200070000000400302070020400900007000000100008609000000003086500",
+        "002000310000008900000010004801005006420000000000300000080706000050090400010200803",
+        "000040500009607000600003024500030800000100002001906000010000040000000007300020001",
+    ],
+    "evil": [
+        "000009001000060270100700800045006000007500040000008700910300000084007000000940006",
+        "004308005809500400000000000080400600000000070003007248100000900900000023007029060",
+        "200009800400000901300100007100650000735000000000032000000000260800020000070406005",
+        "000000730006150000010008000030070006200005000005490072000030000089004050000001040",
+        "067000081000009000094020000000001007500004806700052000050040060801000400000100050",
+        "890002500040030000007061000001004000000000186200003000010340020000008000700005430",
+        "000003008040007000530620040081000009000014070000206003000370000100000900420000830",
+        "000001000000000250100400008000700060002006000430005100060004700873000500010090000",
+    ],
+}
+
+
+def _uses(*moves):
+    return lambda solution: any(
+        solution.move_vector[MOVE_INDEX[move]] for move in moves
+    )
+
+
+# The arguments to generate for each level but evil.
+LEVEL_TARGETS = {
+    "easy": dict(allowed_moves=TIERS["singles"]),
+    "medium": dict(
+        allowed_moves=TIERS["intersections"],
+        accept=_uses(IntersectionTrickPointing, IntersectionTrickClaiming),
+    ),
+    "hard": dict(accept=_uses(HiddenDouble, NakedDouble)),
+}
+
+
+def make_corpus(
+    seed: int = 0, per_level: int = 8, levels: List[str] = LEVELS
+) -> Dict[str, List[str]]:
+    """Generate per_level puzzles at each level, as board strings."""
+    rng = Random(seed)
+    corpus: Dict[str, List[str]] = {}
+    for level in levels:
+        puzzles: List[str] = []
+        while len(puzzles) < per_level:
+            if level == "evil":
+                # Puzzles with as few clues as possible are the likeliest to
+                # get the solver stuck.
+                puzzle = generate(rng)
+                if grade(puzzle).status != SolveStatus.STUCK:
+                    continue
+            else:
+                puzzle = generate(rng, **LEVEL_TARGETS[level])
+                if puzzle is None:
+                    continue
+            puzzles.append(puzzle.to_string())
+        corpus[level] = puzzles
+    return corpus
+
+
+def corpus_sha256(corpus: Dict[str, List[str]]) -> str:
+    sha = hashlib.sha256()
+    for level, puzzles in corpus.items():
+        sha.update(level.encode() + b"\n" + "\n".join(puzzles).encode() + b"\n")
+    return sha.hexdigest()
+
+
+def _best_time(run: Callable, setup: Callable = lambda: None, repeat: int = 5):
+    # The least time taken over the repeats, which is the least disturbed by
+    # whatever else the machine was doing.
+    best = float("inf")
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def solve_snapshots(
+    corpus: Dict[str, List[str]],
+) -> Tuple[List[Tuple[int, ...]], List[Tuple[Tuple[int, ...], NewMarks]]]:
+    """Solve the corpus, recording the marked boards reached along the way.
+
+    Returns the packed marked board before every move, and pairs of a packed
+    marked board and the marks the next move added to it.
+    """
+    boards, additions = [], []
+    for puzzles in corpus.values():
+        for puzzle in puzzles:
+            solver = Solver(GameBoard.from_string(puzzle))
+            packed = solver.marked_board.pack()
+            for _, marks in solver.iter_solve():
+                boards.append(packed)
+                if marks is not None:
+                    additions.append((packed, marks))
+                packed = solver.marked_board.pack()
+            boards.append(packed)
+    return boards, additions
+
+
+def bench_search(boards: List[Tuple[int, ...]], repeat: int = 5) -> Dict[str, float]:
+    marked_boards = [MarkedBoard.unpack(packed) for packed in boards]
+    metrics = {}
+    for move in MOVES_ORDER:
+
+        def run(_):
+            for marked_board in marked_boards:
+                move.search(marked_board, already_found=set())
+
+        # Start each repeat with nothing memoized.
+        seconds = _best_time(run, clear_house_memos, repeat)
+        metrics[f"search.{move.__name__}"] = seconds / len(marked_boards)
+    return metrics
+
+
+def bench_add_marks(
+    additions: List[Tuple[Tuple[int, ...], NewMarks]], repeat: int = 5
+) -> Dict[str, float]:
+    def setup():
+        return [(MarkedBoard.unpack(packed), marks) for packed, marks in additions]
+
+    def run(cases):
+        for marked_board, marks in cases:
+            marked_board.add_marks(marks)
+
+    return {"add_marks": _best_time(run, setup, repeat) / len(additions)}
+
+
+def bench_solve(corpus: Dict[str, List[str]], repeat: int = 5) -> Dict[str, float]:
+    metrics = {}
+    for level, puzzles in corpus.items():
+        boards = [GameBoard.from_string(puzzle) for puzzle in puzzles]
+
+        def run(_):
+            for board in boards:
+                Solver(board).solve()
+
+        seconds = _best_time(run, clear_house_memos, repeat)
+        metrics[f"solve.{level}"] = seconds / len(boards)
+    return metrics
+
+
+def bench_memory(corpus: Dict[str, List[str]]) -> Dict[str, float]:
+    metrics = {}
+    for level, puzzles in corpus.items():
+        peaks = []
+        for puzzle in puzzles:
+            board = GameBoard.from_string(puzzle)
+            tracemalloc.start()
+            try:
+                Solver(board).solve()
+                peaks.append(tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+        metrics[f"memory.{level}"] = sum(peaks) / len(peaks)
+    return metrics
+
+
+def run_benchmarks(
+    corpus: Optional[Dict[str, List[str]]] = None, repeat: int = 5
+) -> dict:
+    """Run every benchmark over a corpus, CORPUS by default."""
+    corpus = corpus if corpus is not None else CORPUS
+    boards, additions = solve_snapshots(corpus)
+    metrics = {}
+    metrics.update(bench_search(boards, repeat))
+    metrics.update(bench_add_marks(additions, repeat))
+    metrics.update(bench_solve(corpus, repeat))
+    metrics.update(bench_memory(corpus))
+    return {
+        "format": FORMAT,
+        "version": VERSION,
+        "corpus_sha256": corpus_sha256(corpus),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeat": repeat,
+        "metrics": metrics,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float = 0.25) -> List[dict]:
+    """Find the metrics that are worse than a baseline by more than tolerance.
+
+    Each regression is a dict with the metric, its baseline and current
+    values, and their ratio. Metrics missing from either side are skipped.
+    Raises ValueError if the results were run on a different corpus.
+    """
+    if baseline.get("format") != FORMAT or baseline.get("version") != VERSION:
+        raise ValueError(f"The baseline is not a version {VERSION} result file.")
+    if baseline["corpus_sha256"] != results["corpus_sha256"]:
+        raise ValueError("The baseline was run on a different corpus.")
+    regressions = []
+    for metric, value in results["metrics"].items():
+        base = baseline["metrics"].get(metric)
+        if base is None or base <= 0:
+            continue
+        ratio = value / base
+        if ratio > 1 + tolerance:
+            regressions.append(
+                {"metric": metric, "baseline": base, "current": value, "ratio": ratio}
+            )
+    return regressions
+
+
+def format_results(results: dict, baseline: Optional[dict] = None) -> str:
+    """A table of the metrics, with their change from a baseline if given."""
+    lines = []
+    for metric, value in results["metrics"].items():
+        unit = "B" if metric.startswith("memory.") else "us"
+        shown = value if unit == "B" else value * 1e6
+        line = f"{metric:<36}{shown:>14.1f} {unit}"
+        base = baseline["metrics"].get(metric) if baseline else None
+        if base:
+            line += f"{(value / base - 1) * 100:>+9.1f}%"
+        lines.append(line)
+    return "\n".join(lines)
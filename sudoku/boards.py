@@ -1,4 +1,5 @@
 import json
+from functools import lru_cache
 from itertools import product, chain
 from collections import defaultdict
 
@@ -15,37 +16,144 @@ Marks = Set[Number]
 
 NumberOrMarks = TypeVar("NumberOrMarks", Number, Marks)
 
+# Characters used for the numbers on a board, so boards up to 25 by 25 can be
+# written one character per cell.
+SYMBOLS = "123456789ABCDEFGHIJKLMNOP"
+
+# Translates the bytes of a GameBoard into the characters of a board string.
+_ENCODE_TABLE = bytes.maketrans(bytes(range(len(SYMBOLS) + 1)), b"0" + SYMBOLS.encode())
+
+
+@lru_cache(maxsize=None)
+def _decode_table(size: int) -> bytes:
+    """Translates a board string into the bytes of a size by size GameBoard."""
+    table = bytearray(256)
+    for number, symbol in enumerate(SYMBOLS[:size], start=1):
+        table[ord(symbol)] = number
+    return bytes(table)
+
+
+class HouseTables:
+    """Precomputed houses for boards with boxes of a given size.
+
+    A board with box size b is a b^2 by b^2 grid, split into b^2 boxes of b by
+    b cells. The standard board has box size 3.
+
+    Attributes
+    ----------
+      - box_size: The number of rows (or columns) in a box.
+      - size: The number of rows (or columns) in the board, box_size squared.
+      - house_coords: Every house (row, column, and box) as a list of the
+        coordinates it contains. Houses are numbered rows first, then columns,
+        then boxes in row major order.
+      - houses_containing: The indexes of the row, column, and box containing
+        each cell.
+    """
+
+    def __init__(self, box_size: int):
+        b = box_size
+        n = b * b
+        self.box_size = b
+        self.size = n
+        self.house_coords: List[List[Coord]] = (
+            [[(i, j) for j in range(n)] for i in range(n)]
+            + [[(i, j) for i in range(n)] for j in range(n)]
+            + [
+                [
+                    (i, j)
+                    for i, j in product(
+                        range(b * bi, b * bi + b), range(b * bj, b * bj + b)
+                    )
+                ]
+                for bi, bj in product(range(b), range(b))
+            ]
+        )
+        self.houses_containing: Dict[Coord, Tuple[int, int, int]] = {
+            (i, j): (i, n + j, 2 * n + b * (i // b) + j // b)
+            for i, j in product(range(n), range(n))
+        }
+
+
+@lru_cache(maxsize=None)
+def house_tables(box_size: int = 3) -> HouseTables:
+    return HouseTables(box_size)
+
+
+# The houses of the standard 9 by 9 board.
+HOUSE_COORDS: List[List[Coord]] = house_tables(3).house_coords
+HOUSES_CONTAINING: Dict[Coord, Tuple[int, int, int]] = house_tables(3).houses_containing
+
+
+class Contradiction(Exception):
+    """Raised, or recorded, when a marked board can no longer be solved.
+
+    This happens when a cell has no candidates left, when a number can no
+    longer be placed anywhere in some house, or when a number is placed in a
+    cell that has been marked against it.
+    """
+
+    def __init__(self, message: str, coords: Optional[Coord] = None):
+        super().__init__(message)
+        self.coords = coords
+
 
 # ABC
 class Board:
-    pass
+    """Base class for boards.
+
+    Boards are square grids of box_size^2 by box_size^2 cells, where box_size
+    is 3 for the standard 9 by 9 board.
+    """
+
+    def __init__(self, box_size: int = 3):
+        self.box_size = box_size
+        self.size = box_size * box_size
+        self.tables = house_tables(box_size)
+
+    def _format(self, cell_strings: List[str]) -> str:
+        """Lay out one single character string per cell in a grid."""
+        b, n = self.box_size, self.size
+        h_seperator = "+" + ("-" * b + "+") * b
+        s = ""
+        for i in range(n):
+            if i % b == 0:
+                s += h_seperator + "\n"
+            row = cell_strings[n * i : n * i + n]
+            s += "|" + "|".join("".join(row[b * k : b * k + b]) for k in range(b))
+            s += "|\n"
+        s += h_seperator
+        return s
 
 
 class BoardIteratorComponent(Generic[NumberOrMarks]):
     """Base class for board objects.
 
-    Contains methods commonly useful for dealing with a 9 by 9 array of
-    objects - as of now, various methods for iteration.
+    Contains methods commonly useful for dealing with a square array of
+    objects (9 by 9 for a standard board) - as of now, various methods for
+    iteration.
     """
 
     def __init__(self, board: Board):
         self._board = board
+        self._box_size = board.box_size
+        self._size = board.size
 
     def iter_board(self) -> Iterable[Tuple[Coord, NumberOrMarks]]:
-        for i, j in product(range(9), range(9)):
+        for i, j in product(range(self._size), range(self._size)):
             yield (i, j), self._board[(i, j)]
 
     def iter_row(self, row: Row) -> Iterable[Tuple[Coord, NumberOrMarks]]:
-        for j in range(9):
+        for j in range(self._size):
             yield (row, j), self._board[(row, j)]
 
     def iter_column(self, column: Col) -> Iterable[Tuple[Coord, NumberOrMarks]]:
-        for i in range(9):
+        for i in range(self._size):
             yield (i, column), self._board[(i, column)]
 
     def iter_box(self, box: Box) -> Iterable[Tuple[Coord, NumberOrMarks]]:
-        for i in range(3 * box[0], 3 * box[0] + 3):
-            for j in range(3 * box[1], 3 * box[1] + 3):
+        b = self._box_size
+        for i in range(b * box[0], b * box[0] + b):
+            for j in range(b * box[1], b * box[1] + b):
                 yield (i, j), self._board[(i, j)]
 
     def iter_row_containing(
@@ -63,49 +171,93 @@ class BoardIteratorComponent(Generic[NumberOrMarks]):
     def iter_box_containing(
         self, coords: Coord
     ) -> Iterable[Tuple[Coord, NumberOrMarks]]:
-        box_containing = (coords[0] // 3, coords[1] // 3)
+        b = self._box_size
+        box_containing = (coords[0] // b, coords[1] // b)
         yield from self.iter_box(box_containing)
 
     def iter_boxes_in_row(self, row: Row) -> Iterable[List[NumberOrMarks]]:
+        b = self._box_size
         row = [v for _, v in self.iter_row(row)]
-        for i in range(3):
-            yield row[3 * i : (3 * i + 3)]
+        for i in range(b):
+            yield row[b * i : (b * i + b)]
 
     def iter_boxes_in_column(self, column: Col) -> Iterable[List[NumberOrMarks]]:
+        b = self._box_size
         column = [v for _, v in self.iter_column(column)]
-        for j in range(3):
-            yield column[3 * j : (3 * j + 3)]
+        for j in range(b):
+            yield column[b * j : (b * j + b)]
 
 
 class GameBoard(Board):
     """Class for representing a sudoku game board.
 
     A 9 by 9 array. Each entry can be a number between 1-9 inclusive, or None,
-    signaling no entry.
-
-    The data is stored in a dictionary, keys are tuples (i, j) in 1-9
-    inclusive, and values are either a number 1-9 inclusive, or None.
+    signaling no entry. Larger (or smaller) boards are made by passing a
+    box_size other than 3, e.g. a box_size of 4 gives a 16 by 16 board
+    holding numbers 1-16.
+
+    The data is stored in a bytearray, one byte per cell in row major order,
+    holding the number in the cell, or zero if it is empty. Cells are indexed
+    by tuples (i, j) in 0-8 inclusive, and read back as a number 1-9
+    inclusive, or None. Copying a board copies just the bytes, and freeze
+    gives a hashable copy, see FrozenGameBoard.
     """
 
-    def __init__(self):
-        self.data = {(i, j): None for i in range(9) for j in range(9)}
+    def __init__(self, box_size: int = 3, cells: Optional[bytes] = None):
+        super().__init__(box_size)
+        n = self.size
+        if cells is None:
+            self.cells = bytearray(n * n)
+        elif len(cells) != n * n:
+            raise ValueError(f"A {n} by {n} board cannot have {len(cells)} cells.")
+        else:
+            self.cells = bytearray(cells)
         self.iter = BoardIteratorComponent[Number](self)
 
-    def __setitem__(self, coords: Coord, number: Number):
-        self.data[coords] = number
+    def _index(self, coords: Coord) -> int:
+        i, j = coords
+        n = self.size
+        if not (0 <= i < n and 0 <= j < n):
+            raise KeyError(coords)
+        return n * i + j
 
-    def __getitem__(self, coords: Coord) -> Number:
-        return self.data[coords]
+    def __setitem__(self, coords: Coord, number: Optional[Number]):
+        self.cells[self._index(coords)] = number or 0
+
+    def __getitem__(self, coords: Coord) -> Optional[Number]:
+        return self.cells[self._index(coords)] or None
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, GameBoard):
+            return NotImplemented
+        return self.box_size == other.box_size and self.cells == other.cells
+
+    # Mutable boards are not hashable, use freeze.
+    __hash__ = None
+
+    def copy(self) -> "GameBoard":
+        return GameBoard(self.box_size, self.cells)
+
+    def __deepcopy__(self, memo) -> "GameBoard":
+        return self.copy()
+
+    def __reduce__(self):
+        # Pickle just the cells, not the house tables.
+        return (self.__class__, (self.box_size, bytes(self.cells)))
+
+    def freeze(self) -> "FrozenGameBoard":
+        """Make a hashable copy of the board, which can not be changed."""
+        return FrozenGameBoard(self.box_size, self.cells)
 
     @classmethod
     def from_websudoku_json(cls, jsn) -> "GameBoard":
         """Read from a json representation.
 
         Json representations are pulled from websudoku.com, for a discussion of
-        the structure, see the from_dict method.
+        the structure, see the from_websudoku_dict method.
         """
         dct = json.loads(jsn)
-        return cls.from_dict(dct)
+        return cls.from_websudoku_dict(dct)
 
     @classmethod
     def from_websudoku_dict(cls, dct) -> "GameBoard":
@@ -127,6 +279,34 @@ class GameBoard(Board):
                 board[(i, j)] = int(num)
         return board
 
+    @classmethod
+    def from_string(cls, s: str) -> "GameBoard":
+        """Read from a string with one character per cell, in row major order.
+
+        Numbers are written with SYMBOLS, and any other character (usually 0
+        or .) is an empty cell, but a symbol for a number larger than the
+        board allows is an error. Whitespace is ignored. The box size is
+        worked out from the length of the string, so e.g. a 256 character
+        string is read as a 16 by 16 board.
+        """
+        s = "".join(s.split())
+        box_size = round(len(s) ** 0.25)
+        if box_size**4 != len(s):
+            raise ValueError(f"A board string cannot have length {len(s)}.")
+        size = box_size**2
+        out_of_range = set(s).intersection(SYMBOLS[size:])
+        if out_of_range:
+            raise ValueError(
+                f"Symbols {''.join(sorted(out_of_range))} are out of range for a "
+                f"{size} by {size} board."
+            )
+        cells = s.encode("ascii", "replace").translate(_decode_table(size))
+        return cls(box_size, cells)
+
+    def to_string(self) -> str:
+        """Write as a string with one character per cell, see from_string."""
+        return self.cells.translate(_ENCODE_TABLE).decode("ascii")
+
     @classmethod
     def from_color_string(cls, s: str) -> "GameBoard":
         colors = "ROYGgBbPp"
@@ -142,16 +322,34 @@ class GameBoard(Board):
 
     def __str__(self) -> str:
         """Construct a string for pretty printing the game board."""
-        h_seperator = "+---+---+---+"
-        h_line = "|{}{}{}|{}{}{}|{}{}{}|"
-        s = ""
-        for i in range(9):
-            if i % 3 == 0:
-                s += h_seperator + "\n"
-            row_tuple = tuple(num if num else " " for _, num in self.iter.iter_row(i))
-            s += h_line.format(*row_tuple) + "\n"
-        s += h_seperator
-        return s
+        return self._format(
+            [SYMBOLS[num - 1] if num else " " for _, num in self.iter.iter_board()]
+        )
+
+
+class FrozenGameBoard(GameBoard):
+    """A game board that can not be changed, so can be hashed.
+
+    Useful as a dictionary key, for deduplication, or for sending between
+    processes. The cells are held in a bytes object.
+    """
+
+    def __init__(self, box_size: int = 3, cells: Optional[bytes] = None):
+        super().__init__(box_size, cells)
+        self.cells = bytes(self.cells)
+
+    def __setitem__(self, coords: Coord, number: Optional[Number]):
+        raise TypeError("A FrozenGameBoard can not be changed.")
+
+    def __hash__(self) -> int:
+        return hash((self.box_size, self.cells))
+
+    def copy(self) -> "FrozenGameBoard":
+        return self
+
+    def thaw(self) -> GameBoard:
+        """Make a copy of the board that can be changed."""
+        return GameBoard(self.box_size, self.cells)
 
 
 class MarkedBoard(Board):
@@ -162,13 +360,29 @@ class MarkedBoard(Board):
     of a subset of {1, 2, 3, 4, 5, 6, 7, 8, 9}. A mark is an element in one of
     these subsets, and its presense indicates that the given number *cannot* be
     placed in that cell in the solution to the puzzle.
+
+    Solved cells carry all nine marks, so the numbers placed in the board are
+    tracked separately in the placed dictionary. This lets the board tell a
+    solved cell from one with no candidates left. The first contradiction
+    found while adding marks is recorded in the contradiction attribute; a
+    strict board raises it instead.
     """
 
     all_marks: Marks = {1, 2, 3, 4, 5, 6, 7, 8, 9}
 
-    def __init__(self):
-        self.data = {(i, j): set() for i in range(9) for j in range(9)}
+    def __init__(self, strict: bool = False, box_size: int = 3):
+        super().__init__(box_size)
+        n = self.size
+        if box_size != 3:
+            self.all_marks = set(range(1, n + 1))
+        self.data = {(i, j): set() for i in range(n) for j in range(n)}
         self.iter = BoardIteratorComponent[Marks](self)
+        self.placed: Dict[Coord, Number] = {}
+        self.strict = strict
+        self.contradiction: Optional[Contradiction] = None
+        self._placed_in_house: List[Set[Number]] = [
+            set() for _ in self.tables.house_coords
+        ]
 
     def __setitem__(self, coords: Coord, marks: Marks):
         self.data[coords] = marks
@@ -177,25 +391,126 @@ class MarkedBoard(Board):
         return self.data[coords]
 
     @classmethod
-    def from_game_board(cls, game_board: GameBoard) -> "MarkedBoard":
+    def from_game_board(
+        cls, game_board: GameBoard, strict: bool = False
+    ) -> "MarkedBoard":
         """
         Add all marks that are a consequence of the current state of a game
         board.  I.e. add marks in every row, column, and box containing some
         entry.
         """
-        board = cls()
+        board = cls(strict=strict, box_size=game_board.box_size)
         for coords, number in game_board.iter.iter_board():
             if number != None:
                 board.add_marks_from_placed_number(coords, number)
         return board
 
     def add_marks(self, new_marks: Dict[Coord, Marks]):
+        # Only houses and numbers touched by the new marks can have become
+        # contradictory, so only those are checked.
+        to_check: Set[Tuple[int, Number]] = set()
+        house_coords = self.tables.house_coords
+        houses_containing = self.tables.houses_containing
         for coords, marks in new_marks.items():
-            self[coords].update(marks)
+            if not marks:
+                continue
+            cell = self[coords]
+            cell.update(marks)
+            if self.contradiction is None:
+                if len(cell) == len(self.all_marks) and coords not in self.placed:
+                    self._contradict(f"No candidates left in cell {coords}.", coords)
+                for house in houses_containing[coords]:
+                    to_check.update((house, number) for number in marks)
+        for house, number in to_check:
+            if self.contradiction is not None:
+                break
+            if number in self._placed_in_house[house]:
+                continue
+            if all(number in self[coords] for coords in house_coords[house]):
+                self._contradict(
+                    f"Number {number} cannot be placed anywhere in the house "
+                    f"containing {house_coords[house][0]} and "
+                    f"{house_coords[house][-1]}."
+                )
 
     def add_marks_from_placed_number(self, coords: Coord, number: Number):
+        self.place(coords, number)
+
+    def place(self, coords: Coord, number: Number) -> Dict[Coord, Marks]:
+        """Place a number in a cell, and add the marks that follow from it.
+
+        Returns the marks that were added.
+        """
+        if self.contradiction is None:
+            if coords in self.placed and self.placed[coords] != number:
+                self._contradict(
+                    f"Cannot place {number} in {coords}, which holds "
+                    f"{self.placed[coords]}.",
+                    coords,
+                )
+            elif coords not in self.placed and number in self[coords]:
+                self._contradict(f"Cannot place {number} in {coords}.", coords)
+        self.placed[coords] = number
+        for house in self.tables.houses_containing[coords]:
+            self._placed_in_house[house].add(number)
         new_marks = self.compute_marks_from_placed_number(coords, number)
         self.add_marks(new_marks)
+        return new_marks
+
+    def pack(self) -> Tuple[int, ...]:
+        """Pack the board into a tuple of ints, one per cell in row major order.
+
+        The low bits of each int hold the cell's marks, bit n - 1 for mark n,
+        and the bits above those (bit 9 up, on a 9 by 9 board) hold the number
+        placed in the cell, or zero. This is much smaller than the board
+        itself, so is useful for keeping snapshots.
+        """
+        return tuple(
+            sum(1 << (n - 1) for n in marks) | (self.placed.get(coords, 0) << self.size)
+            for coords, marks in self.iter.iter_board()
+        )
+
+    @classmethod
+    def unpack(cls, packed: Tuple[int, ...], strict: bool = False) -> "MarkedBoard":
+        """Rebuild a board packed with pack."""
+        box_size = round(len(packed) ** 0.25)
+        board = cls(strict=strict, box_size=box_size)
+        n = board.size
+        for ij, bits in enumerate(packed):
+            coords = (ij // n, ij % n)
+            board[coords] = {k for k in range(1, n + 1) if bits & (1 << (k - 1))}
+            if bits >> n:
+                board.placed[coords] = bits >> n
+                for house in board.tables.houses_containing[coords]:
+                    board._placed_in_house[house].add(bits >> n)
+        return board
+
+    def remove_marks(self, marks: Dict[Coord, Marks]):
+        """Remove marks, undoing an earlier add_marks.
+
+        Only marks that add_marks actually added should be removed, or marks
+        that were already on the board will be lost.
+        """
+        for coords, numbers in marks.items():
+            self[coords].difference_update(numbers)
+
+    def unplace(self, coords: Coord):
+        """Forget the number placed in a cell, undoing an earlier place.
+
+        The marks added by the placement are not removed, see remove_marks.
+        """
+        del self.placed[coords]
+        for house in self.tables.houses_containing[coords]:
+            self._placed_in_house[house] = {
+                self.placed[c]
+                for c in self.tables.house_coords[house]
+                if c in self.placed
+            }
+
+    def _contradict(self, message: str, coords: Optional[Coord] = None):
+        self.contradiction = Contradiction(message, coords)
+        if self.strict:
+            raise self.contradiction
 
     def compute_marks_from_placed_number(
         self, coords: Coord, number: Number
@@ -203,7 +518,7 @@ class MarkedBoard(Board):
         new_marks: Dict[Coord, Marks] = defaultdict(set)
         # Solved positions in a marked board are notated by adding all possible
         # marks.
-        new_marks[coords] = self.all_marks
+        new_marks[coords] = set(self.all_marks)
         placements = chain(
             self.iter.iter_row_containing(coords),
             self.iter.iter_column_containing(coords),
@@ -218,15 +533,6 @@ class MarkedBoard(Board):
         Create a string for pretty printing all the marks corresponding to a
         given number.
         """
-        h_seperator = "+---+---+---+"
-        h_line = "|{}{}{}|{}{}{}|{}{}{}|"
-        s = ""
-        for i in range(9):
-            if i % 3 == 0:
-                s += h_seperator + "\n"
-            row_tuple = tuple(
-                "*" if number in marks else " " for _, marks in self.iter.iter_row(i)
-            )
-            s += h_line.format(*row_tuple) + "\n"
-        s += h_seperator
-        return s
+        return self._format(
+            ["*" if number in marks else " " for _, marks in self.iter.iter_board()]
+        )
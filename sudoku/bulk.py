@@ -0,0 +1,175 @@
+"""Loading many puzzles at once.
+
+Parsing puzzles one at a time with GameBoard.from_string or
+GameBoard.from_websudoku_dict costs a Python loop, and a __setitem__ call,
+per cell. Here whole files are decoded with NumPy byte operations into a
+single (N, 81) uint8 array, with zero for an empty cell, and a GameBoard is
+only built for a puzzle when it is asked for.
+
+    batch = BoardBatch.from_websudoku_file("puzzles.jsonl")
+    batch.cells.shape   # (N, 81)
+    batch[0]            # A GameBoard.
+"""
+
+import json
+import re
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Union
+
+import numpy as np
+
+from sudoku.boards import SYMBOLS, GameBoard, _decode_table
+
+# Stands for a symbol of a number too large for the board, when decoding.
+OUT_OF_RANGE = 255
+
+
+@lru_cache(maxsize=None)
+def _decode_array(size: int) -> np.ndarray:
+    # Maps each byte to the number it stands for on a size by size board, or
+    # zero if it is not a number, as for GameBoard.from_string.
+    table = np.frombuffer(_decode_table(size), dtype=np.uint8).copy()
+    for symbol in SYMBOLS[size:]:
+        table[ord(symbol)] = OUT_OF_RANGE
+    return table
+
+
+_PUZZLE_FIELD = rb'"puzzle"\s*:\s*"(\d+)"'
+_MASK_FIELD = rb'"mask"\s*:\s*"(\d+)"'
+# A json object with no objects nested in it, holding both a puzzle and a mask,
+# in either order.
+_WEBSUDOKU_RECORD = re.compile(
+    rb"\{[^{}]*?(?:%s[^{}]*?%s|%s[^{}]*?%s)[^{}]*\}"
+    % (_PUZZLE_FIELD, _MASK_FIELD, _MASK_FIELD, _PUZZLE_FIELD)
+)
+
+
+def _decode(raw: np.ndarray, n_cells: int) -> np.ndarray:
+    """Decode the bytes of board strings with n_cells cells each."""
+    box_size = round(n_cells**0.25)
+    if box_size**4 != n_cells:
+        raise ValueError(f"A board string cannot have length {n_cells}.")
+    cells = _decode_array(box_size**2)[raw]
+    if (cells == OUT_OF_RANGE).any():
+        raise ValueError(
+            f"Board strings hold symbols out of range for a {box_size**2} by "
+            f"{box_size**2} board."
+        )
+    return cells
+
+
+def _parse_records(path: str, raw: bytes) -> List[dict]:
+    if raw.lstrip().startswith(b"["):
+        records = json.loads(raw)
+    else:
+        records = [json.loads(line) for line in raw.splitlines() if line.strip()]
+    for k, record in enumerate(records):
+        if not isinstance(record.get("puzzle"), str) or not isinstance(
+            record.get("mask"), str
+        ):
+            raise ValueError(f"Record {k} of {path} has no puzzle or no mask.")
+    return records
+
+
+class BoardBatch:
+    """Many game boards of the same size, held in one array.
+
+    Attributes
+    ----------
+      - cells: A (N, size * size) uint8 array, one row per board in row major
+        order, holding the number in each cell or zero if it is empty.
+      - box_size, size: As for Board.
+    """
+
+    def __init__(self, cells: np.ndarray):
+        cells = np.ascontiguousarray(cells, dtype=np.uint8)
+        if cells.ndim != 2:
+            raise ValueError("Cells must be a two dimensional array.")
+        self.box_size = round(cells.shape[1] ** 0.25)
+        if self.box_size**4 != cells.shape[1]:
+            raise ValueError(f"A board cannot have {cells.shape[1]} cells.")
+        self.size = self.box_size**2
+        self.cells = cells
+
+    @classmethod
+    def from_strings(cls, strings: Iterable[Union[str, bytes]]) -> "BoardBatch":
+        """Read from strings with one character per cell, see
+        GameBoard.from_string. Every string must be the same length."""
+        strings = [s.encode("ascii") if isinstance(s, str) else s for s in strings]
+        if not strings:
+            return cls(np.zeros((0, 81), dtype=np.uint8))
+        length = len(strings[0])
+        if any(len(s) != length for s in strings):
+            raise ValueError("Board strings must all be the same length.")
+        raw = np.frombuffer(b"".join(strings), dtype=np.uint8)
+        return cls(_decode(raw, length).reshape(len(strings), length))
+
+    @classmethod
+    def from_file(cls, path: str) -> "BoardBatch":
+        """Read a file with one board string per line."""
+        with open(path, "rb") as f:
+            return cls.from_strings(line.strip() for line in f if line.strip())
+
+    @classmethod
+    def from_websudoku_records(cls, records: Iterable[dict]) -> "BoardBatch":
+        """Read from dictionaries as in GameBoard.from_websudoku_dict."""
+        records = list(records)
+        return cls._from_websudoku_fields(
+            [r["puzzle"].encode("ascii") for r in records],
+            [r["mask"].encode("ascii") for r in records],
+        )
+
+    @classmethod
+    def from_websudoku_file(cls, path: str) -> "BoardBatch":
+        """Read a file of websudoku records, either a json array or JSONL.
+
+        The puzzle and mask of each record are picked out of the raw bytes of
+        the file with a regular expression, rather than parsing every record
+        as json. If that does not account for every object in the file, as
+        when a record is missing a field or holds a nested object, the file
+        is parsed as json instead.
+        """
+        with open(path, "rb") as f:
+            raw = f.read()
+        records = _WEBSUDOKU_RECORD.findall(raw)
+        if len(records) != raw.count(b"{"):
+            return cls.from_websudoku_records(_parse_records(path, raw))
+        puzzles = [p1 or p2 for p1, _, _, p2 in records]
+        masks = [m1 or m2 for _, m1, m2, _ in records]
+        return cls._from_websudoku_fields(puzzles, masks)
+
+    @classmethod
+    def _from_websudoku_fields(
+        cls, puzzles: List[bytes], masks: List[bytes]
+    ) -> "BoardBatch":
+        if not puzzles:
+            return cls(np.zeros((0, 81), dtype=np.uint8))
+        n_puzzles = len(puzzles)
+        raw = np.frombuffer(b"".join(puzzles), dtype=np.uint8)
+        solutions = _decode(raw, len(puzzles[0]))
+        masked = np.frombuffer(b"".join(masks), dtype=np.uint8) == ord("1")
+        cells = np.where(masked, 0, solutions)
+        return cls(cells.reshape(n_puzzles, -1))
+
+    def __len__(self) -> int:
+        return self.cells.shape[0]
+
+    def __getitem__(self, idx: int) -> GameBoard:
+        """Build the game board at index idx."""
+        return GameBoard(self.box_size, self.cells[idx].tobytes())
+
+    def __iter__(self) -> Iterator[GameBoard]:
+        for idx in range(len(self)):
+            yield self[idx]
+
+    @property
+    def n_clues(self) -> np.ndarray:
+        """The number of filled in cells in each board."""
+        return np.count_nonzero(self.cells, axis=1)
+
+    def to_strings(self) -> List[str]:
+        """Write each board as a string, see GameBoard.to_string."""
+        symbols = np.frombuffer(("0" + SYMBOLS).encode("ascii"), dtype=np.uint8)
+        raw = symbols[self.cells].tobytes().decode("ascii")
+        width = self.cells.shape[1]
+        return [raw[k : k + width] for k in range(0, len(raw), width)]
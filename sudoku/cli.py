@@ -0,0 +1,269 @@
+"""The command line interface, run with python -m sudoku.
+
+    python -m sudoku solve < puzzles.txt > solutions.jsonl
+    python -m sudoku serve --port 8080
+
+serve runs the HTTP service in sudoku.service, shard splits, runs and merges
+sharded corpora, see sudoku.shard, stats build writes a store of solve
+statistics, see sudoku.stats, and bench runs the benchmarks in sudoku.bench.
+
+solve reads one puzzle per line from stdin, either a board string as read by
+GameBoard.from_string, or a json object. A json object is either a websudoku
+record (see GameBoard.from_websudoku_dict), or has the board string under
+"puzzle". Other fields in a json object, like an "id", are copied to the
+output. For each puzzle, one line of json is written to stdout, in the order
+the puzzles were read:
+
+    {"puzzle": ..., "solution": ..., "status": "SOLVED", "difficulty": 2.0,
+     "move_vector": [...], "n_steps": 54}
+
+The difficulty and move vector come from the logical Solver. If it gets stuck,
+the solution is still filled in by fastsolve. A line that can not be read
+gets {"error": ...} in its place, and blank lines are skipped.
+
+Lines are read and solved in batches, and output is written a batch at a
+time, so memory use is bounded however much input there is. With --jobs,
+batches are solved in parallel in a pool of worker processes. When driving
+the solver as a coprocess, pass --line-buffered so that each answer is
+written as soon as its puzzle is read (this turns off batching and
+--jobs).
+"""
+
+import argparse
+import json
+import sys
+from collections import deque
+from multiprocessing import Pool
+from typing import BinaryIO, Iterator, List, Optional
+
+from sudoku.analysis import GradeOnlySolution
+from sudoku.boards import GameBoard
+from sudoku.fastsolve import solve_grid
+from sudoku.solver import Solver, SolveStatus
+
+
+def solve_line(line: bytes) -> dict:
+    """Solve the puzzle on one line of input, see the module docstring."""
+    try:
+        record = read_record(line)
+        board = (
+            GameBoard.from_websudoku_dict(record)
+            if "mask" in record
+            else GameBoard.from_string(record["puzzle"])
+        )
+    except (ValueError, KeyError, TypeError) as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+    output = {k: v for k, v in record.items() if k not in ("puzzle", "mask")}
+    solution = GradeOnlySolution()
+    solver = Solver(board, solution=solution)
+    solver.solve()
+    if solution.status == SolveStatus.SOLVED:
+        grid = board.copy()
+        for coords, number in solver.marked_board.placed.items():
+            grid[coords] = number
+    else:
+        grid = solve_grid(board)
+    output.update(
+        puzzle=board.to_string(),
+        solution=grid.to_string() if grid is not None else None,
+        status=solution.status.name,
+        difficulty=solution.difficulty,
+        move_vector=solution.move_vector,
+        n_steps=solution.n_steps,
+    )
+    return output
+
+
+def read_record(line: bytes) -> dict:
+    """Read a line of input as a record, see the module docstring."""
+    line = line.strip()
+    if line.startswith(b"{"):
+        record = json.loads(line)
+        if not isinstance(record, dict):
+            raise ValueError("Expected a json object.")
+        if not isinstance(record.get("puzzle", ""), str):
+            raise ValueError('Expected a board string under "puzzle".')
+        return record
+    return {"puzzle": line.decode("ascii")}
+
+
+def solve_lines(lines: List[bytes]) -> bytes:
+    """Solve a batch of lines, returning the output for all of them."""
+    return b"".join(json.dumps(solve_line(line)).encode() + b"\n" for line in lines)
+
+
+def iter_batches(instream: BinaryIO, batch_size: int) -> Iterator[List[bytes]]:
+    batch = []
+    for line in instream:
+        if not line.strip():
+            continue
+        batch.append(line)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run_solve(
+    instream: BinaryIO,
+    outstream: BinaryIO,
+    batch_size: int = 64,
+    jobs: int = 1,
+    line_buffered: bool = False,
+):
+    if line_buffered:
+        # Each answer is needed before the next puzzle arrives, so there is
+        # nothing to batch or run in parallel.
+        batch_size, jobs = 1, 1
+    batches = iter_batches(instream, batch_size)
+    if jobs == 1:
+        for batch in batches:
+            outstream.write(solve_lines(batch))
+            if line_buffered:
+                outstream.flush()
+        outstream.flush()
+        return
+    with Pool(jobs) as pool:
+        # Only a few batches are in flight at once, so reading can not run
+        # arbitrarily far ahead of writing.
+        pending = deque()
+        for batch in batches:
+            pending.append(pool.apply_async(solve_lines, (batch,)))
+            while pending and (len(pending) > 2 * jobs or pending[0].ready()):
+                outstream.write(pending.popleft().get())
+        while pending:
+            outstream.write(pending.popleft().get())
+        outstream.flush()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m sudoku")
+    commands = parser.add_subparsers(dest="command", required=True)
+    solve = commands.add_parser(
+        "solve", help="solve puzzles read from stdin, one per line"
+    )
+    solve.add_argument("--batch-size", type=int, default=64)
+    solve.add_argument("--jobs", type=int, default=1, help="number of worker processes")
+    solve.add_argument(
+        "--line-buffered",
+        action="store_true",
+        help="write each answer as soon as its puzzle is read",
+    )
+    serve = commands.add_parser("serve", help="run the local HTTP solving service")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.add_argument("--jobs", type=int, help="number of worker processes")
+    serve.add_argument("--max-batch-size", type=int, default=64)
+    serve.add_argument(
+        "--max-wait", type=float, default=0.005, help="seconds to wait to fill a batch"
+    )
+    shard = commands.add_parser("shard", help="split, run and merge shards")
+    shard_commands = shard.add_subparsers(dest="shard_command", required=True)
+    split = shard_commands.add_parser("split", help="split a corpus into shards")
+    split.add_argument("input", help="a file of puzzles, one per line")
+    split.add_argument("out_dir")
+    split.add_argument("--n-shards", type=int, required=True)
+    shard_run = shard_commands.add_parser("run", help="solve one shard")
+    shard_run.add_argument("shard_path")
+    shard_run.add_argument("out_path")
+    shard_run.add_argument("--batch-size", type=int, default=64)
+    merge = shard_commands.add_parser(
+        "merge", help="check and combine shard results, writing to stdout"
+    )
+    merge.add_argument("manifest")
+    merge.add_argument("result_paths", nargs="+")
+    stats = commands.add_parser("stats", help="build a store of solve statistics")
+    stats_commands = stats.add_subparsers(dest="stats_command", required=True)
+    build = stats_commands.add_parser(
+        "build", help="solve a file of puzzles into a statistics store"
+    )
+    build.add_argument("input", help="websudoku records, or one board per line")
+    build.add_argument("out_dir")
+    build.add_argument("--jobs", type=int, help="number of worker processes")
+    bench = commands.add_parser("bench", help="benchmark the solver's hot paths")
+    bench.add_argument("--output", help="write the results to this json file")
+    bench.add_argument("--baseline", help="compare against a saved results file")
+    bench.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="the fraction by which a metric may get worse than the baseline",
+    )
+    bench.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+    if args.command == "bench":
+        _run_bench_command(args)
+    elif args.command == "stats":
+        from sudoku.stats import build_stats
+
+        build_stats(args.input, args.out_dir, jobs=args.jobs)
+    elif args.command == "shard":
+        _run_shard_command(args)
+    elif args.command == "serve":
+        import asyncio
+        from sudoku.service import serve as run_service
+
+        asyncio.run(
+            run_service(
+                args.host,
+                args.port,
+                jobs=args.jobs,
+                max_batch_size=args.max_batch_size,
+                max_wait=args.max_wait,
+            )
+        )
+    elif args.command == "solve":
+        run_solve(
+            sys.stdin.buffer,
+            sys.stdout.buffer,
+            batch_size=args.batch_size,
+            jobs=args.jobs,
+            line_buffered=args.line_buffered,
+        )
+
+
+def _run_shard_command(args):
+    from sudoku import shard
+
+    if args.shard_command == "split":
+        with open(args.input, "rb") as instream:
+            shard.split(instream, args.out_dir, args.n_shards)
+    elif args.shard_command == "run":
+        shard.run(args.shard_path, args.out_path, batch_size=args.batch_size)
+    elif args.shard_command == "merge":
+        with open(args.manifest) as f:
+            manifest = json.load(f)
+        try:
+            shard.merge(manifest, args.result_paths, sys.stdout.buffer)
+        except shard.ShardIntegrityError as e:
+            sys.exit(f"merge failed: {e}")
+        sys.stdout.buffer.flush()
+
+
+def _run_bench_command(args):
+    from sudoku import bench
+
+    baseline = None
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    results = bench.run_benchmarks(repeat=args.repeat)
+    print(bench.format_results(results, baseline))
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if baseline is not None:
+        try:
+            regressions = bench.compare(results, baseline, args.tolerance)
+        except ValueError as e:
+            sys.exit(f"compare failed: {e}")
+        if regressions:
+            sys.exit(
+                "Regressions beyond {:.0%}: {}".format(
+                    args.tolerance,
+                    ", ".join(
+                        "{metric} ({ratio:.2f}x)".format(**r) for r in regressions
+                    ),
+                )
+            )
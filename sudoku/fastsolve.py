@@ -0,0 +1,261 @@
+"""Fast solving of game boards, when only the completed grid is needed.
+
+Unlike the logical Solver, nothing here builds Move objects or records how a
+puzzle was solved. The board is held as a list of candidate bitmasks (81 of
+them for a 9 by 9 board), one per cell in row major order, where bit n - 1 is
+set if n can still be placed in the cell. Naked and hidden singles are
+propagated over peer and house tables precomputed for each size of board, and
+if that is not enough to finish the board, a depth first search branches on
+the cell with the fewest candidates.
+"""
+
+from functools import lru_cache
+from random import Random
+from typing import List, Optional, Set, Tuple
+
+from sudoku.boards import GameBoard, house_tables
+
+Candidates = List[int]
+
+
+class BitmaskTables:
+    """Precomputed tables for working with candidates on one size of board.
+
+    Attributes
+    ----------
+      - box_size, size: As for HouseTables.
+      - full: The candidates of a cell where every number is possible.
+      - houses: The cells in each house (row, column, and box), as indexes into
+        a list of candidates.
+      - houses_of: The indexes of the houses containing each cell.
+      - peers: The cells sharing a house with each cell, not including the
+        cell itself.
+    """
+
+    def __init__(self, box_size: int):
+        tables = house_tables(box_size)
+        n = tables.size
+        self.box_size = box_size
+        self.size = n
+        self.full: int = (1 << n) - 1
+        self.houses: List[Tuple[int, ...]] = [
+            tuple(n * i + j for i, j in house) for house in tables.house_coords
+        ]
+        self.houses_of: List[Tuple[int, ...]] = [
+            tables.houses_containing[(cell // n, cell % n)] for cell in range(n * n)
+        ]
+        self.peers: List[Tuple[int, ...]] = [
+            tuple(sorted(set().union(*(self.houses[h] for h in houses)) - {cell}))
+            for cell, houses in enumerate(self.houses_of)
+        ]
+
+
+@lru_cache(maxsize=None)
+def bitmask_tables(box_size: int = 3) -> BitmaskTables:
+    return BitmaskTables(box_size)
+
+
+def _tables_for(candidates: Candidates) -> BitmaskTables:
+    return bitmask_tables(round(len(candidates) ** 0.25))
+
+
+def solve_grid(
+    game_board: GameBoard, rng: Optional[Random] = None
+) -> Optional[GameBoard]:
+    """Fill in a game board.
+
+    Returns a new, completely filled in, game board, or None if the board has
+    no solution. If the board has more than one solution, one of them is
+    returned; passing a random number generator as rng picks one at random,
+    rather than always the same one.
+    """
+    candidates = candidates_from_game_board(game_board)
+    if candidates is None:
+        return None
+    solved = _search(candidates, rng)
+    if solved is None:
+        return None
+    return game_board_from_candidates(solved)
+
+
+def count_solutions(game_board: GameBoard, limit: int = 2) -> int:
+    """Count the solutions to a game board, stopping once limit are found.
+
+    With the default limit, this tells whether a puzzle has no solution, a
+    unique solution, or more than one.
+    """
+    candidates = candidates_from_game_board(game_board)
+    if candidates is None:
+        return 0
+    return _count(candidates, limit)
+
+
+def count_candidate_solutions(candidates: Candidates, limit: int = 2) -> int:
+    """As count_solutions, for an already propagated list of candidates."""
+    return _count(candidates, limit)
+
+
+def candidates_from_game_board(game_board: GameBoard) -> Optional[Candidates]:
+    """Build a propagated list of candidates for a game board.
+
+    Returns None if the board is found to be contradictory.
+    """
+    tables = bitmask_tables(game_board.box_size)
+    numbers = list(game_board.cells)
+    # The numbers already used in each house.
+    used = [0] * len(tables.houses)
+    for h, house in enumerate(tables.houses):
+        for cell in house:
+            if numbers[cell]:
+                bit = 1 << (numbers[cell] - 1)
+                if used[h] & bit:
+                    return None
+                used[h] |= bit
+    return candidates_from_used(numbers, used)
+
+
+def candidates_from_used(numbers: List[int], used: List[int]) -> Optional[Candidates]:
+    """Build a propagated list of candidates from the numbers used in houses.
+
+    numbers holds the number in each cell, or zero if it is empty, and used
+    holds a bitmask of the numbers in each house, as in BitmaskTables.houses.
+    Callers that change a board a cell at a time can keep used up to date as
+    they go, rather than working it out from scratch each time. Returns None
+    if the board is found to be contradictory.
+    """
+    tables = _tables_for(numbers)
+    candidates = [tables.full] * len(numbers)
+    queue = []
+    for cell, number in enumerate(numbers):
+        if number:
+            candidates[cell] = 1 << (number - 1)
+            continue
+        r, c, b = tables.houses_of[cell]
+        candidates[cell] = tables.full & ~(used[r] | used[c] | used[b])
+        if candidates[cell] & (candidates[cell] - 1) == 0:
+            queue.append(cell)
+    if not propagate(candidates, queue, dirty=set(range(len(tables.houses)))):
+        return None
+    return candidates
+
+
+def game_board_from_candidates(candidates: Candidates) -> GameBoard:
+    """Build a game board from candidates, filling in every solved cell."""
+    box_size = _tables_for(candidates).box_size
+    cells = bytes(0 if c & (c - 1) else c.bit_length() for c in candidates)
+    return GameBoard(box_size, cells)
+
+
+def propagate(
+    candidates: Candidates, queue: List[int], dirty: Optional[Set[int]] = None
+) -> bool:
+    """Propagate naked and hidden singles through a list of candidates.
+
+    The queue holds cells that have been reduced to a single candidate, but
+    whose peers have not yet had that candidate removed. The candidates are
+    updated in place. Returns False if a contradiction is found, in which case
+    the candidates are left in an arbitrary state.
+
+    Only houses containing a changed cell can hold a new hidden single, so
+    only those are searched. Houses changed before the call can be passed in
+    as dirty.
+    """
+    tables = _tables_for(candidates)
+    full, houses, houses_of, peers = (
+        tables.full,
+        tables.houses,
+        tables.houses_of,
+        tables.peers,
+    )
+    if dirty is None:
+        dirty = set()
+    while True:
+        while queue:
+            cell = queue.pop()
+            bit = candidates[cell]
+            dirty.update(houses_of[cell])
+            for peer in peers[cell]:
+                c = candidates[peer]
+                if c & bit:
+                    c ^= bit
+                    if not c:
+                        return False
+                    candidates[peer] = c
+                    dirty.update(houses_of[peer])
+                    if c & (c - 1) == 0:
+                        queue.append(peer)
+        while dirty and not queue:
+            house = houses[dirty.pop()]
+            seen_once = seen_more = 0
+            for cell in house:
+                c = candidates[cell]
+                seen_more |= seen_once & c
+                seen_once |= c
+            if seen_once != full:
+                return False
+            hidden = seen_once & ~seen_more
+            if not hidden:
+                continue
+            for cell in house:
+                c = candidates[cell] & hidden
+                if c and candidates[cell] != c:
+                    if c & (c - 1):
+                        return False
+                    candidates[cell] = c
+                    queue.append(cell)
+        if not queue:
+            return True
+
+
+def _choose_cell(candidates: Candidates) -> Optional[int]:
+    """Find an unsolved cell with the fewest candidates."""
+    best, best_count = None, len(candidates)
+    for cell, c in enumerate(candidates):
+        if c & (c - 1):
+            count = c.bit_count()
+            if count < best_count:
+                best, best_count = cell, count
+                if count == 2:
+                    break
+    return best
+
+
+def _iter_branches(candidates: Candidates, cell: int, rng: Optional[Random] = None):
+    c = candidates[cell]
+    bits = []
+    while c:
+        bit = c & -c
+        c ^= bit
+        bits.append(bit)
+    if rng is not None:
+        rng.shuffle(bits)
+    for bit in bits:
+        branch = candidates[:]
+        branch[cell] = bit
+        if propagate(branch, [cell]):
+            yield branch
+
+
+def _search(
+    candidates: Candidates, rng: Optional[Random] = None
+) -> Optional[Candidates]:
+    cell = _choose_cell(candidates)
+    if cell is None:
+        return candidates
+    for branch in _iter_branches(candidates, cell, rng):
+        solved = _search(branch, rng)
+        if solved is not None:
+            return solved
+    return None
+
+
+def _count(candidates: Candidates, limit: int) -> int:
+    cell = _choose_cell(candidates)
+    if cell is None:
+        return 1
+    count = 0
+    for branch in _iter_branches(candidates, cell):
+        count += _count(branch, limit - count)
+        if count >= limit:
+            break
+    return count
@@ -0,0 +1,194 @@
+"""Generating new puzzles.
+
+A puzzle is made by filling in a random grid with fastsolve, then removing
+clues from it in a random order, keeping only the removals that leave the
+puzzle with a unique solution. Once a clue can not be removed it never can,
+as removing more clues only allows more solutions, so each cell is tried
+once.
+
+To steer the puzzle towards a difficulty, it is graded with the logical
+Solver. Each prefix of the accepted removals is itself a unique puzzle, and
+puzzles generally get harder as more clues are removed, so the number of
+removals to keep is found with a binary search on the grade.
+"""
+
+from random import Random
+from typing import Callable, Iterator, List, Optional, Tuple, Type
+
+from sudoku.analysis import GradeOnlySolution, solve_within_tier
+from sudoku.boards import GameBoard
+from sudoku.fastsolve import (
+    bitmask_tables,
+    candidates_from_used,
+    count_candidate_solutions,
+    propagate,
+    solve_grid,
+)
+from sudoku.moves import MOVES_ORDER, Move
+from sudoku.solver import SolveStatus
+
+
+def random_grid(rng: Optional[Random] = None, box_size: int = 3) -> GameBoard:
+    """Fill in an empty board at random."""
+    return solve_grid(GameBoard(box_size), rng=rng or Random())
+
+
+def iter_removals(grid: GameBoard, rng: Optional[Random] = None) -> Iterator[int]:
+    """Remove clues from a filled in grid while keeping the solution unique.
+
+    Cells are tried in a random order, and the index (in row major order) of
+    each cell whose clue can be removed is yielded. Every prefix of the
+    removals leaves a puzzle with a unique solution.
+
+    The numbers used in each house are kept up to date as clues are removed,
+    so each check only rebuilds the candidates from those, then searches for
+    a solution that puts a different number in the removed cell.
+    """
+    rng = rng or Random()
+    tables = bitmask_tables(grid.box_size)
+    n = tables.size
+    numbers = list(grid.cells)
+    used = [tables.full] * len(tables.houses)
+    order = list(range(n * n))
+    rng.shuffle(order)
+    for cell in order:
+        bit = 1 << (numbers[cell] - 1)
+        houses = tables.houses_of[cell]
+        for h in houses:
+            used[h] ^= bit
+        number, numbers[cell] = numbers[cell], 0
+        if _is_unique_without(numbers, used, cell, bit, houses):
+            yield cell
+        else:
+            numbers[cell] = number
+            for h in houses:
+                used[h] |= bit
+
+
+def _is_unique_without(
+    numbers: List[int],
+    used: List[int],
+    cell: int,
+    bit: int,
+    houses: Tuple[int, ...],
+) -> bool:
+    # The puzzle was unique with the clue in place, so it still is if no
+    # solution puts anything else in the cell.
+    candidates = candidates_from_used(numbers, used)
+    others = candidates[cell] & ~bit
+    if not others:
+        return True
+    candidates[cell] = others
+    queue = [cell] if others & (others - 1) == 0 else []
+    if not propagate(candidates, queue, dirty=set(houses)):
+        return True
+    return count_candidate_solutions(candidates, limit=1) == 0
+
+
+def remove_clues(grid: GameBoard, removals: List[int]) -> GameBoard:
+    """Copy a grid, with the clues in the given cells removed."""
+    puzzle = grid.copy()
+    for cell in removals:
+        puzzle.cells[cell] = 0
+    return puzzle
+
+
+def grade(
+    puzzle: GameBoard,
+    allowed_moves: List[Type[Move]] = MOVES_ORDER,
+    max_difficulty: Optional[float] = None,
+) -> GradeOnlySolution:
+    """Grade a puzzle with the logical solver, see solve_within_tier."""
+    return solve_within_tier(puzzle, allowed_moves, max_difficulty)
+
+
+def generate(
+    rng: Optional[Random] = None,
+    min_difficulty: Optional[float] = None,
+    max_difficulty: Optional[float] = None,
+    allowed_moves: List[Type[Move]] = MOVES_ORDER,
+    accept: Optional[Callable[[GradeOnlySolution], bool]] = None,
+    box_size: int = 3,
+    max_tries: int = 100,
+) -> Optional[GameBoard]:
+    """Generate a puzzle with a unique solution.
+
+    With no targets, as many clues are removed as possible. Otherwise the
+    puzzle must be solvable by the logical Solver using only allowed_moves,
+    with a difficulty (as in DifficultySchedule) between min_difficulty and
+    max_difficulty, and accept, if given, must return True for its grade.
+    accept can be used to target a move vector, e.g.
+
+        accept=lambda sln: sln.move_vector[MOVE_INDEX[HiddenDouble]] > 0
+
+    Up to max_tries grids are tried before giving up and returning None.
+    """
+    rng = rng or Random()
+    targeted = (
+        min_difficulty is not None
+        or max_difficulty is not None
+        or allowed_moves is not MOVES_ORDER
+        or accept is not None
+    )
+    for _ in range(max_tries):
+        grid = random_grid(rng, box_size)
+        removals = list(iter_removals(grid, rng))
+        if not targeted:
+            return remove_clues(grid, removals)
+        puzzle, solution = _steer(grid, removals, allowed_moves, max_difficulty)
+        if puzzle is None:
+            continue
+        if min_difficulty is not None and solution.difficulty < min_difficulty:
+            continue
+        if accept is not None and not accept(solution):
+            continue
+        return puzzle
+    return None
+
+
+def iter_generate(count: int, rng: Optional[Random] = None, **kwargs):
+    """Generate count puzzles, skipping grids that miss their targets.
+
+    Keyword arguments are passed on to generate.
+    """
+    rng = rng or Random()
+    made = 0
+    while made < count:
+        puzzle = generate(rng, **kwargs)
+        if puzzle is not None:
+            made += 1
+            yield puzzle
+
+
+def _steer(
+    grid: GameBoard,
+    removals: List[int],
+    allowed_moves: List[Type[Move]],
+    max_difficulty: Optional[float],
+) -> Tuple[Optional[GameBoard], Optional[GradeOnlySolution]]:
+    # Find the most removals that still grade within the targets. Removing
+    # fewer clues gives an easier puzzle, so binary search on how many of the
+    # removals to keep. At least one clue must be removed, as the grid itself
+    # always grades as solved.
+    def within(k):
+        puzzle = remove_clues(grid, removals[:k])
+        solution = grade(puzzle, allowed_moves, max_difficulty)
+        if solution.status == SolveStatus.SOLVED:
+            return puzzle, solution
+        return None, None
+
+    if not removals:
+        return None, None
+    puzzle, solution = within(len(removals))
+    if puzzle is not None:
+        return puzzle, solution
+    lo, hi = 0, len(removals)
+    best = None, None
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        found = within(mid)
+        if found[0] is not None:
+            lo, best = mid, found
+        else:
+            hi = mid
+    return best
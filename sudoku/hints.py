@@ -0,0 +1,147 @@
+from typing import List, Optional
+
+from sudoku.boards import GameBoard, MarkedBoard, Contradiction
+from sudoku.moves import (
+    MOVES_ORDER,
+    HiddenSingle,
+    NakedSingle,
+    Move,
+    NewMarks,
+    Coord,
+    Marks,
+    Number,
+)
+
+
+class Edit:
+    """A single player edit, with what is needed to undo it.
+
+    Attributes
+    ----------
+      - coords: The cell that was edited.
+      - number: The number placed, or None for a pencil mark edit.
+      - added_marks: The marks that were not on the board before the edit.
+      - contradiction: The board's contradiction before the edit.
+      - previous_number: The number in the cell of the game board before the
+        edit, or None.
+      - previous_placed: The number placed in the cell of the marked board
+        before the edit, or None.
+    """
+
+    def __init__(
+        self,
+        coords: Coord,
+        number: Optional[Number],
+        added_marks: NewMarks,
+        contradiction: Optional[Contradiction],
+        previous_number: Optional[Number] = None,
+        previous_placed: Optional[Number] = None,
+    ):
+        self.coords = coords
+        self.number = number
+        self.added_marks = added_marks
+        self.contradiction = contradiction
+        self.previous_number = previous_number
+        self.previous_placed = previous_placed
+
+
+class HintSession:
+    """Serve hints for a puzzle while it is being played.
+
+    A session is long lived: it holds one marked board for the puzzle and
+    updates it in place as the player places numbers and pencil marks, rather
+    than rebuilding it from the game board for every hint. Edits can be undone
+    in last in, first out order.
+
+    Pencil marks follow the MarkedBoard convention: a mark rules a number out
+    of a cell.
+
+    The last hint found is cached. Placements and pencil marks only ever add
+    marks, and a deduction stays sound as marks are added, so the cached hint
+    remains correct as long as it is still productive. next_hint then only
+    searches the move types easier than the cached hint, to keep hints as easy
+    as possible.
+    """
+
+    def __init__(self, game_board: GameBoard):
+        self.game_board = GameBoard(game_board.box_size, game_board.cells)
+        self.marked_board = MarkedBoard.from_game_board(game_board)
+        self.edits: List[Edit] = []
+        self._hint: Optional[Move] = None
+        self._hint_idx = len(MOVES_ORDER)
+
+    def place(self, coords: Coord, number: Number):
+        added_marks = self._added_marks(
+            self.marked_board.compute_marks_from_placed_number(coords, number)
+        )
+        self.edits.append(
+            Edit(
+                coords,
+                number,
+                added_marks,
+                self.marked_board.contradiction,
+                previous_number=self.game_board[coords],
+                previous_placed=self.marked_board.placed.get(coords),
+            )
+        )
+        self.game_board[coords] = number
+        self.marked_board.place(coords, number)
+
+    def add_pencil_marks(self, coords: Coord, marks: Marks):
+        added_marks = self._added_marks({coords: marks})
+        self.edits.append(
+            Edit(coords, None, added_marks, self.marked_board.contradiction)
+        )
+        self.marked_board.add_marks(added_marks)
+
+    def undo(self) -> Optional[Edit]:
+        """Undo the most recent edit, and return it."""
+        if not self.edits:
+            return None
+        edit = self.edits.pop()
+        self.marked_board.remove_marks(edit.added_marks)
+        if edit.number is not None:
+            # A placement can overwrite a number already in the cell, which
+            # is put back. Its marks were on the board before the edit, so
+            # placing it again adds none.
+            self.marked_board.unplace(edit.coords)
+            if edit.previous_placed is not None:
+                self.marked_board.place(edit.coords, edit.previous_placed)
+            self.game_board[edit.coords] = edit.previous_number
+        self.marked_board.contradiction = edit.contradiction
+        # Removing marks can make easier moves, or different moves, available.
+        self._hint, self._hint_idx = None, len(MOVES_ORDER)
+        return edit
+
+    def next_hint(self) -> Optional[Move]:
+        """Find the easiest move available for the current board.
+
+        Returns None if no move is available, or if the player's edits have
+        made the board contradictory.
+        """
+        if self.marked_board.contradiction is not None:
+            return None
+        if self._hint is not None and not self._is_productive(self._hint):
+            self._hint, self._hint_idx = None, len(MOVES_ORDER)
+        for idx, move in enumerate(MOVES_ORDER[: self._hint_idx]):
+            mv = move.search(self.marked_board)
+            if mv:
+                self._hint, self._hint_idx = mv, idx
+                break
+        return self._hint
+
+    def _is_productive(self, move: Move) -> bool:
+        if isinstance(move, (NakedSingle, HiddenSingle)):
+            return (
+                move.coords not in self.marked_board.placed
+                and move.number not in self.marked_board[move.coords]
+            )
+        return bool(self._added_marks(move.compute_marks(self.marked_board)))
+
+    def _added_marks(self, new_marks: NewMarks) -> NewMarks:
+        added_marks = {}
+        for coords, marks in new_marks.items():
+            added = set(marks) - self.marked_board[coords]
+            if added:
+                added_marks[coords] = added
+        return added_marks
@@ -2,13 +2,14 @@ import json
 from enum import Enum
 from abc import ABC, abstractmethod, abstractstaticmethod
 from copy import deepcopy
-from itertools import product, compress
+from itertools import product, combinations
 from collections import defaultdict
+from functools import lru_cache
 
 from sudoku.boards import MarkedBoard
-from sudoku.utils import unzip, all_empty, pairs_exclude_diagonal, iter_number_pairs
+from sudoku.utils import unzip, all_empty
 
-from typing import List, Optional, Dict, Tuple, Set, Union, Type
+from typing import List, Optional, Dict, Tuple, Set, Union, Type, Iterator
 
 Coord = Tuple[int, int]
 BoxCoord = Tuple[int, int]
@@ -19,9 +20,25 @@ Number = int
 Marks = Set[Number]
 NewMarks = Dict[Coord, Marks]
 
+# All the marks on a standard 9 by 9 board. Moves use marked_board.all_marks,
+# which also works for other board sizes.
 FULL_MARKS: Marks = {1, 2, 3, 4, 5, 6, 7, 8, 9}
 
 
+# The number of distinct house states whose doubles are remembered, see
+# pack_house.
+HOUSE_MEMO_SIZE = 2**16
+
+
+def first_not_found(
+    moves: Iterator["Move"], already_found: Optional[Set["Move"]]
+) -> Optional["Move"]:
+    for move in moves:
+        if not already_found or move not in already_found:
+            return move
+    return None
+
+
 class HouseType(Enum):
     ROW = 0
     COLUMN = 1
@@ -46,10 +63,17 @@ class Move(ABC):
     - search:
       Scan a marked board for a move of the given type. If one is found, return
       an object representing the object.
+    - iter_search:
+      Scan a marked board for every productive move of the given type (a move
+      is productive if it adds some mark), yielding them in the order search
+      would find them.
     - compute_marks: Compute the new marks resulting from the application of a
       move to a board and/or marked board.
     -__hash__: Compute a hash value for a board. Useful for storing moves in
       sets.
+
+    Moves that place a number override apply, so the marked board can record
+    the placement.
     """
 
     @abstractstaticmethod
@@ -58,10 +82,23 @@ class Move(ABC):
     ) -> Optional["Move"]:
         pass
 
+    @abstractstaticmethod
+    def iter_search(marked_board: MarkedBoard) -> Iterator["Move"]:
+        pass
+
     @abstractmethod
     def compute_marks(self, marked_board: MarkedBoard) -> Dict[Coord, Marks]:
         pass
 
+    def apply(self, marked_board: MarkedBoard) -> NewMarks:
+        """Add the marks resulting from this move to a marked board.
+
+        Returns the marks that were added.
+        """
+        new_marks = self.compute_marks(marked_board)
+        marked_board.add_marks(new_marks)
+        return new_marks
+
     def __hash__(self) -> int:
         pass
 
@@ -108,13 +145,18 @@ class Finished(Move, MoveIOMixin):
     solved.
     """
 
+    @staticmethod
     def search(
         marked_board: MarkedBoard, already_found: Optional[Set[Move]] = None
     ) -> Optional["Finished"]:
+        return next(Finished.iter_search(marked_board), None)
+
+    @staticmethod
+    def iter_search(marked_board: MarkedBoard) -> Iterator["Finished"]:
         for (i, j), marks in marked_board.iter.iter_board():
-            if marks != MarkedBoard.all_marks:
-                return None
-        return Finished()
+            if marks != marked_board.all_marks:
+                return
+        yield Finished()
 
     def compute_marks(self, marked_board: MarkedBoard) -> NewMarks:
         return defaultdict(set)
@@ -152,16 +194,22 @@ class NakedSingle(Move, MoveIOMixin):
     def search(
         marked_board: MarkedBoard, already_found: Optional[Set[Move]] = None
     ) -> Optional["NakedSingle"]:
+        return next(NakedSingle.iter_search(marked_board), None)
+
+    @staticmethod
+    def iter_search(marked_board: MarkedBoard) -> Iterator["NakedSingle"]:
         for (i, j), marks in marked_board.iter.iter_board():
-            missing_marks = MarkedBoard.all_marks - marks
+            missing_marks = marked_board.all_marks - marks
             if len(missing_marks) == 1:
                 number = next(iter(missing_marks))
-                return NakedSingle(coords=(i, j), number=number)
-        return None
+                yield NakedSingle(coords=(i, j), number=number)
 
     def compute_marks(self, marked_board: MarkedBoard) -> NewMarks:
         return marked_board.compute_marks_from_placed_number(self.coords, self.number)
 
+    def apply(self, marked_board: MarkedBoard) -> NewMarks:
+        return marked_board.place(self.coords, self.number)
+
     def __hash__(self) -> int:
         return hash(("NakedSingle", self.coords, self.number))
 
@@ -197,34 +245,41 @@ class HiddenSingle(Move, MoveIOMixin):
     def search(
         marked_board: MarkedBoard, already_found: Optional[Set[Move]] = None
     ) -> Optional["HiddenSingle"]:
+        return next(HiddenSingle.iter_search(marked_board), None)
+
+    @staticmethod
+    def iter_search(marked_board: MarkedBoard) -> Iterator["HiddenSingle"]:
+        n, b = marked_board.size, marked_board.box_size
         search_params = [
-            (HouseType.ROW, range(9), marked_board.iter.iter_row),
-            (HouseType.COLUMN, range(9), marked_board.iter.iter_column),
-            (HouseType.BOX, product(range(3), range(3)), marked_board.iter.iter_box),
+            (HouseType.ROW, range(n), marked_board.iter.iter_row),
+            (HouseType.COLUMN, range(n), marked_board.iter.iter_column),
+            (HouseType.BOX, product(range(b), range(b)), marked_board.iter.iter_box),
         ]
         for search_param in search_params:
-            hs = HiddenSingle._search_single_house_type(marked_board, *search_param)
-            if hs:
-                return hs
-        return None
+            yield from HiddenSingle._search_single_house_type(
+                marked_board, *search_param
+            )
 
     def _search_single_house_type(
         marked_board: MarkedBoard, house_type: HouseType, house_idx_iter, house_iter
-    ) -> Optional["HiddenSingle"]:
+    ) -> Iterator["HiddenSingle"]:
         coords_for_house: List[Coord]
         marks_for_house: List[Marks]
-        for house_idx, number in product(house_idx_iter, range(1, 10)):
+        for house_idx in house_idx_iter:
             coords_for_house, marks_for_house = unzip(list(house_iter(house_idx)))
-            is_marked = [number in marks for marks in marks_for_house]
-            if sum(is_marked) == 8:
-                idx = is_marked.index(False)
-                coords = coords_for_house[idx]
-                return HiddenSingle(coords, house_type, number)
-        return None
+            for number in range(1, marked_board.size + 1):
+                is_marked = [number in marks for marks in marks_for_house]
+                if sum(is_marked) == marked_board.size - 1:
+                    idx = is_marked.index(False)
+                    coords = coords_for_house[idx]
+                    yield HiddenSingle(coords, house_type, number)
 
     def compute_marks(self, marked_board: MarkedBoard) -> NewMarks:
         return marked_board.compute_marks_from_placed_number(self.coords, self.number)
 
+    def apply(self, marked_board: MarkedBoard) -> NewMarks:
+        return marked_board.place(self.coords, self.number)
+
     def __hash__(self):
         return hash(("HiddenSingle", self.coords, self.number, self.house_type.value))
 
@@ -270,22 +325,27 @@ class IntersectionTrickPointing(Move, MoveIOMixin):
     def search(
         marked_board: MarkedBoard, already_found: Optional[Set[Move]] = None
     ) -> Optional["IntersectionTrickPointing"]:
-        for box_coords in product(range(3), range(3)):
+        return first_not_found(
+            IntersectionTrickPointing.iter_search(marked_board), already_found
+        )
+
+    @staticmethod
+    def iter_search(
+        marked_board: MarkedBoard,
+    ) -> Iterator["IntersectionTrickPointing"]:
+        b = marked_board.box_size
+        for box_coords in product(range(b), range(b)):
             for house_type in [HouseType.ROW, HouseType.COLUMN]:
-                it = IntersectionTrickPointing._search(
-                    marked_board, house_type, box_coords, already_found
+                yield from IntersectionTrickPointing._search(
+                    marked_board, house_type, box_coords
                 )
-                if it:
-                    return it
-        return None
 
     @staticmethod
     def _search(
         marked_board: MarkedBoard,
         house_type: HouseType,
         box_coords: BoxCoord,
-        already_found: Optional[Set[Move]],
-    ) -> Optional["IntersectionTrickPointing"]:
+    ) -> Iterator["IntersectionTrickPointing"]:
 
         houses_in_box: List[List[Marks]]
         match house_type:
@@ -300,7 +360,7 @@ class IntersectionTrickPointing(Move, MoveIOMixin):
             case _:
                 raise ValueError(f"HouseType {house_type} not allowed.")
 
-        for number in range(1, 10):
+        for number in range(1, marked_board.size + 1):
             possible_in_intersection = [
                 any(number not in marks for marks in house) for house in houses_in_box
             ]
@@ -313,32 +373,31 @@ class IntersectionTrickPointing(Move, MoveIOMixin):
                     number=number,
                 )
                 new_marks = it.compute_marks(marked_board)
-                if not all_empty(new_marks) and (
-                    not already_found or it not in already_found
-                ):
-                    return it
-        return None
+                if not all_empty(new_marks):
+                    yield it
 
     def _get_marks_for_rows_in_box(
         marked_board: MarkedBoard, box_coords: BoxCoord
     ) -> List[List[Marks]]:
+        b = marked_board.box_size
         return [
             [
                 marked_board[(i, j)]
-                for j in range(3 * box_coords[1], 3 * box_coords[1] + 3)
+                for j in range(b * box_coords[1], b * box_coords[1] + b)
             ]
-            for i in range(3 * box_coords[0], 3 * box_coords[0] + 3)
+            for i in range(b * box_coords[0], b * box_coords[0] + b)
         ]
 
     def _get_marks_for_columns_in_box(
         marked_board: MarkedBoard, box_coords: BoxCoord
     ) -> List[List[Marks]]:
+        b = marked_board.box_size
         return [
             [
                 marked_board[(i, j)]
-                for i in range(3 * box_coords[0], 3 * box_coords[0] + 3)
+                for i in range(b * box_coords[0], b * box_coords[0] + b)
             ]
-            for j in range(3 * box_coords[1], 3 * box_coords[1] + 3)
+            for j in range(b * box_coords[1], b * box_coords[1] + b)
         ]
 
     def compute_marks(self, marked_board: MarkedBoard) -> NewMarks:
@@ -351,28 +410,30 @@ class IntersectionTrickPointing(Move, MoveIOMixin):
                 raise ValueError(f"HouseType {self.house_type} not allowed.")
 
     def _compute_marks_for_row(self, marked_board: MarkedBoard) -> NewMarks:
+        b = marked_board.box_size
         new_marks = defaultdict(set)
-        for col_idx_within_row in range(9):
-            coords = (3 * self.box[0] + self.house_idx, col_idx_within_row)
+        for col_idx_within_row in range(marked_board.size):
+            coords = (b * self.box[0] + self.house_idx, col_idx_within_row)
             if not self.number in marked_board[
                 coords
-            ] and not IntersectionTrickPointing._in_box(coords, self.box):
+            ] and not IntersectionTrickPointing._in_box(coords, self.box, b):
                 new_marks[coords].add(self.number)
         return new_marks
 
     def _compute_marks_for_column(self, marked_board: MarkedBoard) -> NewMarks:
+        b = marked_board.box_size
         new_marks = defaultdict(set)
-        for row_idx_within_col in range(9):
-            coords = (row_idx_within_col, 3 * self.box[1] + self.house_idx)
+        for row_idx_within_col in range(marked_board.size):
+            coords = (row_idx_within_col, b * self.box[1] + self.house_idx)
             if not self.number in marked_board[
                 coords
-            ] and not IntersectionTrickPointing._in_box(coords, self.box):
+            ] and not IntersectionTrickPointing._in_box(coords, self.box, b):
                 new_marks[coords].add(self.number)
         return new_marks
 
     @staticmethod
-    def _in_box(coords, box: BoxCoord) -> bool:
-        return (box[0] == coords[0] // 3) and (box[1] == coords[1] // 3)
+    def _in_box(coords, box: BoxCoord, box_size: int = 3) -> bool:
+        return (box[0] == coords[0] // box_size) and (box[1] == coords[1] // box_size)
 
     def __hash__(self) -> int:
         return hash(
@@ -431,42 +492,54 @@ class IntersectionTrickClaiming(Move, MoveIOMixin):
     def search(
         marked_board: MarkedBoard, already_found: Optional[Set[Move]] = None
     ) -> Optional["IntersectionTrickClaiming"]:
+        return first_not_found(
+            IntersectionTrickClaiming.iter_search(marked_board), already_found
+        )
+
+    @staticmethod
+    def iter_search(
+        marked_board: MarkedBoard,
+    ) -> Iterator["IntersectionTrickClaiming"]:
         for house_type in [HouseType.ROW, HouseType.COLUMN]:
-            it = IntersectionTrickClaiming._search(
-                marked_board, house_type, already_found
-            )
-            if it:
-                return it
-        return None
+            yield from IntersectionTrickClaiming._search(marked_board, house_type)
 
     @staticmethod
     def _search(
         marked_board: MarkedBoard,
         house_type: HouseType,
-        already_found: Optional[Set[Move]],
-    ):
-        for house_idx, number in product(range(9), range(1, 10)):
-
-            # List of length three, for three boxes in each row or column.
-            # Is the number possible to place in this box ∩ (row or column)?
-            possible_in_box_intersection: List[bool]
+    ) -> Iterator["IntersectionTrickClaiming"]:
+        for house_idx in range(marked_board.size):
+            box_intersections: List[List[Marks]]
             match house_type:
                 case HouseType.ROW:
-                    possible_in_box_intersection = [
-                        any(number not in marks for marks in box_intersection)
-                        for box_intersection in marked_board.iter.iter_boxes_in_row(
-                            house_idx
-                        )
-                    ]
+                    box_intersections = list(
+                        marked_board.iter.iter_boxes_in_row(house_idx)
+                    )
                 case HouseType.COLUMN:
-                    possible_in_box_intersection = [
-                        any(number not in marks for marks in box_intersection)
-                        for box_intersection in marked_board.iter.iter_boxes_in_column(
-                            house_idx
-                        )
-                    ]
+                    box_intersections = list(
+                        marked_board.iter.iter_boxes_in_column(house_idx)
+                    )
                 case _:
                     raise ValueError(f"HouseType {house_type} not allowed.")
+            yield from IntersectionTrickClaiming._search_in_house(
+                marked_board, house_type, house_idx, box_intersections
+            )
+
+    @staticmethod
+    def _search_in_house(
+        marked_board: MarkedBoard,
+        house_type: HouseType,
+        house_idx: Union[Row, Col],
+        box_intersections: List[List[Marks]],
+    ) -> Iterator["IntersectionTrickClaiming"]:
+        for number in range(1, marked_board.size + 1):
+
+            # List of length three, for three boxes in each row or column.
+            # Is the number possible to place in this box ∩ (row or column)?
+            possible_in_box_intersection: List[bool] = [
+                any(number not in marks for marks in box_intersection)
+                for box_intersection in box_intersections
+            ]
 
             # Number is possible in exactly one box intersecting the row or column.
             if sum(possible_in_box_intersection) == 1:
@@ -478,16 +551,12 @@ class IntersectionTrickClaiming(Move, MoveIOMixin):
                     number=number,
                 )
                 new_marks = it.compute_marks(marked_board)
-                if not all_empty(new_marks) and (
-                    not already_found or it not in already_found
-                ):
-                    return it
-
-        return None
+                if not all_empty(new_marks):
+                    yield it
 
     def compute_marks(self, marked_board: MarkedBoard) -> NewMarks:
         new_marks: NewMarks = defaultdict(set)
-        box_coords = self.box_coords
+        box_coords = self.box_coords_for(marked_board.box_size)
         for coords, _ in marked_board.iter.iter_box(box_coords):
             if not self._in_house(coords) and self.number not in marked_board[coords]:
                 new_marks[coords].add(self.number)
@@ -502,13 +571,13 @@ class IntersectionTrickClaiming(Move, MoveIOMixin):
             case _:
                 raise ValueError(f"HouseType {self.house_type} not allowed.")
 
-    @property
-    def box_coords(self) -> BoxCoord:
+    def box_coords_for(self, box_size: int) -> BoxCoord:
+        """The coordinates of the box, on a board with the given box size."""
         match self.house_type:
             case HouseType.ROW:
-                return (self.house_idx // 3, self.box_idx)
+                return (self.house_idx // box_size, self.box_idx)
             case HouseType.COLUMN:
-                return (self.box_idx, self.house_idx // 3)
+                return (self.box_idx, self.house_idx // box_size)
             case _:
                 raise ValueError(f"HouseType {self.house_type} not allowed.")
 
@@ -564,44 +633,38 @@ class NakedDouble(Move, MoveIOMixin):
     def search(
         marked_board: MarkedBoard, already_found: Optional[Set[Move]] = None
     ) -> Optional["NakedDouble"]:
+        return first_not_found(NakedDouble.iter_search(marked_board), already_found)
+
+    @staticmethod
+    def iter_search(marked_board: MarkedBoard) -> Iterator["NakedDouble"]:
+        n, b = marked_board.size, marked_board.box_size
         search_params = [
-            (HouseType.ROW, marked_board.iter.iter_row, range(9)),
-            (HouseType.COLUMN, marked_board.iter.iter_column, range(9)),
-            (HouseType.BOX, marked_board.iter.iter_box, product(range(3), range(3))),
+            (HouseType.ROW, marked_board.iter.iter_row, range(n)),
+            (HouseType.COLUMN, marked_board.iter.iter_column, range(n)),
+            (HouseType.BOX, marked_board.iter.iter_box, product(range(b), range(b))),
         ]
         for search_param in search_params:
-            nd = NakedDouble._search_in_single_house_type(
-                marked_board, already_found, *search_param
+            yield from NakedDouble._search_in_single_house_type(
+                marked_board, *search_param
             )
-            if nd:
-                return nd
-        return None
 
     @staticmethod
     def _search_in_single_house_type(
         marked_board,
-        already_found: Optional[Set[Move]],
         house_type: HouseType,
         house_iter,
         house_idx_iter,
-    ) -> Optional["NakedDouble"]:
+    ) -> Iterator["NakedDouble"]:
         for house_idx in house_idx_iter:
-            traverse_twice = pairs_exclude_diagonal(house_iter(house_idx))
-            for (coords1, marks1), (coords2, marks2) in traverse_twice:
-                if len(marks1) == 7 and len(marks2) == 7 and marks1 == marks2:
-                    numbers = list(FULL_MARKS - marks1)
-                    nd = NakedDouble(
-                        house_type=house_type,
-                        house_idx=house_idx,
-                        double_idxs=(coords1, coords2),
-                        numbers=numbers,
-                    )
-                    new_marks = nd.compute_marks(marked_board)
-                    if not all_empty(new_marks) and (
-                        not already_found or nd not in already_found
-                    ):
-                        return nd
-        return None
+            house_coords, house_marks = unzip(list(house_iter(house_idx)))
+            packed = pack_house(house_marks)
+            for k1, k2, numbers in naked_doubles_in_house(packed):
+                yield NakedDouble(
+                    house_type=house_type,
+                    house_idx=house_idx,
+                    double_idxs=(house_coords[k1], house_coords[k2]),
+                    numbers=numbers,
+                )
 
     def compute_marks(self, marked_board: MarkedBoard) -> NewMarks:
         iterator = {
@@ -644,7 +707,7 @@ class HiddenDouble(Move, MoveIOMixin):
         (range(3), range(3)) if a box.
       - double_idxs: A pair of coordinates, the two cells in which the double
         is found.
-      - numbers: A set of two numbers from range(9), the two numbers that are
+      - numbers: A set of two numbers from 1 to size, the two numbers that are
         capable of being placed only in the two cells.
 
     Resulting Marks
@@ -669,60 +732,48 @@ class HiddenDouble(Move, MoveIOMixin):
     def search(
         marked_board, already_found: Optional[Set[Move]] = None
     ) -> Optional["HiddenDouble"]:
+        return first_not_found(HiddenDouble.iter_search(marked_board), already_found)
+
+    @staticmethod
+    def iter_search(marked_board: MarkedBoard) -> Iterator["HiddenDouble"]:
+        n, b = marked_board.size, marked_board.box_size
         search_params = [
-            (HouseType.ROW, marked_board.iter.iter_row, range(9)),
-            (HouseType.COLUMN, marked_board.iter.iter_column, range(9)),
-            (HouseType.BOX, marked_board.iter.iter_box, product(range(3), range(3))),
+            (HouseType.ROW, marked_board.iter.iter_row, range(n)),
+            (HouseType.COLUMN, marked_board.iter.iter_column, range(n)),
+            (HouseType.BOX, marked_board.iter.iter_box, product(range(b), range(b))),
         ]
         for search_param in search_params:
-            hd = HiddenDouble._search(marked_board, already_found, *search_param)
-            if hd:
-                return hd
-        return None
+            yield from HiddenDouble._search(marked_board, *search_param)
 
     @staticmethod
     def _search(
         marked_board: MarkedBoard,
-        already_found: Optional[Set[Move]],
         house_type: HouseType,
         house_iter,
         house_idx_iter,
-    ) -> Optional["HiddenDouble"]:
-        for house_idx, (n1, n2) in product(house_idx_iter, iter_number_pairs()):
-            n1_coords, n1_possible = zip(
-                *[(coords, n1 not in marks) for coords, marks in house_iter(house_idx)]
-            )
-            n2_coords, n2_possible = zip(
-                *[(coords, n2 not in marks) for coords, marks in house_iter(house_idx)]
-            )
-            if (
-                sum(n1_possible) == 2
-                and sum(n2_possible) == 2
-                and n1_possible == n2_possible
-            ):
-                double_coords = tuple(compress(n1_coords, n1_possible))
-                hd = HiddenDouble(
+    ) -> Iterator["HiddenDouble"]:
+        for house_idx in house_idx_iter:
+            house_coords, house_marks = unzip(list(house_iter(house_idx)))
+            packed = pack_house(house_marks)
+            for k1, k2, numbers in hidden_doubles_in_house(packed):
+                yield HiddenDouble(
                     house_type=house_type,
                     house_idx=house_idx,
-                    double_idxs=double_coords,
-                    numbers=(n1, n2),
+                    double_idxs=(house_coords[k1], house_coords[k2]),
+                    numbers=numbers,
                 )
-                new_marks = hd.compute_marks(marked_board)
-                if not all_empty(new_marks) and (
-                    not already_found or hd not in already_found
-                ):
-                    return hd
-        return None
 
     def compute_marks(self, marked_board: MarkedBoard) -> NewMarks:
         return defaultdict(
             set,
             {
                 self.double_idxs[0]: (
-                    (FULL_MARKS - marked_board[self.double_idxs[0]]) - self.numbers
+                    (marked_board.all_marks - marked_board[self.double_idxs[0]])
+                    - self.numbers
                 ),
                 self.double_idxs[1]: (
-                    (FULL_MARKS - marked_board[self.double_idxs[1]]) - self.numbers
+                    (marked_board.all_marks - marked_board[self.double_idxs[1]])
+                    - self.numbers
                 ),
             },
         )
@@ -739,6 +790,79 @@ class HiddenDouble(Move, MoveIOMixin):
         )
 
 
+HouseDoubles = Tuple[Tuple[int, int, Tuple[Number, Number]], ...]
+
+
+def pack_house(house_marks: Iterator[Marks]) -> Tuple[int, ...]:
+    """Pack the marks of the cells in a house into a tuple of bitmasks.
+
+    Bit n - 1 of each bitmask is set if mark n is in the cell. Whether a house
+    holds a double, and whether that double is productive, depends only on
+    the marks in the house, so the packed marks are used as the key for
+    remembering the doubles found in a house.
+    """
+    return tuple(sum(1 << (n - 1) for n in marks) for marks in house_marks)
+
+
+@lru_cache(maxsize=HOUSE_MEMO_SIZE)
+def naked_doubles_in_house(packed: Tuple[int, ...]) -> HouseDoubles:
+    """Find the productive naked doubles in a packed house.
+
+    Returns a tuple of (k1, k2, numbers), where k1 and k2 index the two cells
+    of the double within the house. The same house states turn up over and
+    over, both between steps of a solve and across puzzles, so the results are
+    remembered for as long as the process lives.
+    """
+    size = len(packed)
+    full = (1 << size) - 1
+    doubles = []
+    for (k1, marks1), (k2, marks2) in combinations(enumerate(packed), 2):
+        possible = full & ~marks1
+        if marks1 != marks2 or possible.bit_count() != 2:
+            continue
+        # The double is productive if one of its numbers is still possible in
+        # some other cell in the house.
+        if any(
+            possible & ~marks for k, marks in enumerate(packed) if k != k1 and k != k2
+        ):
+            numbers = tuple(n for n in range(1, size + 1) if possible & (1 << (n - 1)))
+            doubles.append((k1, k2, numbers))
+    return tuple(doubles)
+
+
+@lru_cache(maxsize=HOUSE_MEMO_SIZE)
+def hidden_doubles_in_house(packed: Tuple[int, ...]) -> HouseDoubles:
+    """Find the productive hidden doubles in a packed house.
+
+    Returns a tuple of (k1, k2, numbers) as for naked_doubles_in_house.
+    """
+    size = len(packed)
+    full = (1 << size) - 1
+    # possible[n - 1] has bit k set if n can be placed in the k'th cell.
+    possible = [
+        sum(1 << k for k, marks in enumerate(packed) if not marks & (1 << (n - 1)))
+        for n in range(1, size + 1)
+    ]
+    doubles = []
+    for n1, n2 in combinations(range(1, size + 1), 2):
+        cells = possible[n1 - 1]
+        if cells != possible[n2 - 1] or cells.bit_count() != 2:
+            continue
+        k1, k2 = (k for k in range(size) if cells & (1 << k))
+        # The double is productive if either of its cells can hold some number
+        # outside of the double.
+        double = (1 << (n1 - 1)) | (1 << (n2 - 1))
+        if (full & ~packed[k1] & ~double) or (full & ~packed[k2] & ~double):
+            doubles.append((k1, k2, (n1, n2)))
+    return tuple(doubles)
+
+
+def clear_house_memos():
+    """Forget every remembered house search."""
+    naked_doubles_in_house.cache_clear()
+    hidden_doubles_in_house.cache_clear()
+
+
 MOVES_ORDER: List[Type[Move]] = [
     Finished,
     HiddenSingle,
@@ -749,6 +873,16 @@ MOVES_ORDER: List[Type[Move]] = [
     NakedDouble,
 ]
 
+
+def find_all_moves(marked_board: MarkedBoard) -> Dict[Type[Move], List[Move]]:
+    """Find every productive move available on a marked board.
+
+    Each move type's iter_search makes a single pass over the board. The
+    result is keyed by move type, in the order of MOVES_ORDER.
+    """
+    return {move: list(move.iter_search(marked_board)) for move in MOVES_ORDER}
+
+
 MOVES_DICT = {
     "Finished": Finished,
     "NakedSingle": NakedSingle,
@@ -0,0 +1,322 @@
+"""A local HTTP/JSON solving service, run with python -m sudoku serve.
+
+Requests are gathered into micro-batches: the first request to arrive starts
+a batch, which is sent off to a pool of worker processes once it holds
+max_batch_size requests, or max_wait seconds have passed. Each request still
+gets its own response. Solving happens in the pool, so the event loop keeps
+accepting requests while batches are being solved.
+
+Endpoints
+---------
+  - POST /solve: The body is one puzzle, in any of the forms read by
+    python -m sudoku solve (see sudoku.cli), and the response is the
+    matching line of its output.
+  - GET /metrics: Queue depth, and histograms of batch sizes and request
+    latencies.
+  - GET /health: Returns {"ok": true}.
+
+Only the standard library is used, so this is a deliberately small HTTP/1.1
+server, meant to sit on localhost behind something sturdier.
+"""
+
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sudoku.cli import solve_line
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class Histogram:
+    """Counts of observations falling at or below each of a list of bounds.
+
+    Observations above the last bound are counted under "+Inf".
+    """
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        for idx, bound in enumerate(self.bounds):
+            if value <= bound:
+                break
+        else:
+            idx = len(self.bounds)
+        self.counts[idx] += 1
+        self.count += 1
+        self.total += value
+
+    def to_dict(self) -> dict:
+        labels = [str(bound) for bound in self.bounds] + ["+Inf"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.count,
+            "sum": self.total,
+        }
+
+
+def _solve_batch(lines: List[bytes]) -> List[dict]:
+    # A line that fails to solve gets an error of its own, rather than failing
+    # every request batched with it.
+    results = []
+    for line in lines:
+        try:
+            results.append(solve_line(line))
+        except Exception as e:
+            results.append({"error": f"{type(e).__name__}: {e}"})
+    return results
+
+
+class MicroBatcher:
+    """Gathers concurrent solve requests into batches for an executor."""
+
+    def __init__(
+        self,
+        executor: Executor,
+        max_batch_size: int = 64,
+        max_wait: float = 0.005,
+        max_in_flight: int = 4,
+    ):
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.in_flight = asyncio.Semaphore(max_in_flight)
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.latencies = Histogram(LATENCY_BUCKETS)
+        self.max_queue_depth = 0
+        self._task: Optional[asyncio.Task] = None
+        # The event loop only keeps weak references to tasks.
+        self._batch_tasks = set()
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop taking new batches, and wait for the ones being solved."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        # Batches already handed to the executor must finish before it is shut
+        # down, or their requests are dropped.
+        pending = list(self._batch_tasks)
+        await asyncio.gather(*pending)
+
+    async def solve(self, line: bytes) -> dict:
+        """Solve one puzzle, as a line of input to python -m sudoku solve."""
+        start = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((line, future))
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+        try:
+            return await future
+        finally:
+            self.latencies.observe(time.perf_counter() - start)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self.in_flight.acquire()
+            task = loop.create_task(self._solve_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _solve_batch(self, batch: List[Tuple[bytes, asyncio.Future]]):
+        try:
+            self.batch_sizes.observe(len(batch))
+            lines = [line for line, _ in batch]
+            loop = asyncio.get_running_loop()
+            try:
+                results = await loop.run_in_executor(self.executor, _solve_batch, lines)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self.in_flight.release()
+
+    def metrics(self) -> dict:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "batch_size": self.batch_sizes.to_dict(),
+            "latency_seconds": self.latencies.to_dict(),
+        }
+
+
+class SolveService:
+    """The HTTP front end for a MicroBatcher."""
+
+    def __init__(self, batcher: MicroBatcher):
+        self.batcher = batcher
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080):
+        self.batcher.start()
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server
+
+    @property
+    def port(self) -> int:
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        await self.batcher.stop()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, path, body, keep_alive = request
+                try:
+                    status, payload = await self._route(method, path, body)
+                except Exception as e:
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+                _write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[int, dict]:
+        if method == "POST" and path == "/solve":
+            return 200, await self.batcher.solve(body)
+        if method == "GET" and path == "/metrics":
+            return 200, self.batcher.metrics()
+        if method == "GET" and path == "/health":
+            return 200, {"ok": True}
+        return 404, {"error": f"No route for {method} {path}"}
+
+
+async def _read_request(reader) -> Optional[Tuple[str, str, bytes, bool]]:
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, path, version = request_line.decode("latin-1").split()
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    body = await reader.readexactly(length) if length else b""
+    connection = headers.get("connection", "").lower()
+    keep_alive = (
+        connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+    )
+    return method, path, body, keep_alive
+
+
+def _write_response(writer, status: int, payload: dict, keep_alive: bool):
+    body = json.dumps(payload).encode()
+    reason = {200: "OK", 404: "Not Found", 500: "Internal Server Error"}[status]
+    writer.write(
+        (
+            f"HTTP/1.1 {status} {reason}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n"
+        ).encode("latin-1")
+        + body
+    )
+
+
+async def serve(
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    jobs: Optional[int] = None,
+    max_batch_size: int = 64,
+    max_wait: float = 0.005,
+):
+    """Run the service until cancelled."""
+    jobs = jobs or os.cpu_count() or 1
+    with ProcessPoolExecutor(jobs) as executor:
+        batcher = MicroBatcher(
+            executor,
+            max_batch_size=max_batch_size,
+            max_wait=max_wait,
+            max_in_flight=jobs,
+        )
+        service = SolveService(batcher)
+        server = await service.start(host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await batcher.stop()
+
+
+async def load_test(
+    host: str, port: int, puzzles: Sequence[str], concurrency: int = 32
+) -> List[dict]:
+    """Solve puzzles through a running service, with concurrent connections.
+
+    Each of concurrency connections sends its share of the puzzles one after
+    another, over a kept alive connection. Returns the results in the order
+    of the puzzles.
+    """
+    results: List[Optional[dict]] = [None] * len(puzzles)
+
+    async def client(idxs):
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for idx in idxs:
+                body = puzzles[idx].encode()
+                writer.write(
+                    (
+                        "POST /solve HTTP/1.1\r\n"
+                        f"Host: {host}\r\n"
+                        f"Content-Length: {len(body)}\r\n\r\n"
+                    ).encode("latin-1")
+                    + body
+                )
+                await writer.drain()
+                headers = {}
+                await reader.readline()
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers["content-length"]))
+                results[idx] = json.loads(body)
+        finally:
+            writer.close()
+
+    await asyncio.gather(
+        *(client(range(k, len(puzzles), concurrency)) for k in range(concurrency))
+    )
+    return results
@@ -0,0 +1,199 @@
+"""Splitting a corpus of puzzles into shards, to be solved on separate nodes.
+
+    python -m sudoku shard split corpus.jsonl shards/ --n-shards 4
+    python -m sudoku shard run shards/shard-00002-of-00004.jsonl results-2.jsonl
+    python -m sudoku shard merge shards/manifest.json results-*.jsonl > results.jsonl
+
+split reads puzzles in any of the forms read by python -m sudoku solve, and
+assigns each to a shard by a hash of its key: the record's "id" if it has
+one, and otherwise its board string. The hash does not depend on the
+machine or the Python process, so the same corpus always splits the same
+way. A manifest records the number of puzzles in each shard and the sha256
+of each shard file.
+
+run solves one shard, writing a self-describing result file: a header line
+saying which shard of how many it holds and the sha256 of its input, the
+result lines (as written by python -m sudoku solve), and a footer line with
+the number of results and their sha256.
+
+merge checks that every shard of the manifest is present exactly once, that
+each was run on the right input, and that no result file was truncated or
+altered, then writes the results of all of them in shard order.
+"""
+
+import hashlib
+import json
+import os
+import re
+from typing import BinaryIO, Dict, List
+
+from sudoku.cli import iter_batches, read_record, solve_lines
+from sudoku.boards import GameBoard
+
+FORMAT = "sudoku-shard-result"
+SHARD_FILENAME = re.compile(r"shard-(\d+)-of-(\d+)\.jsonl")
+VERSION = 1
+
+
+class ShardIntegrityError(ValueError):
+    """Raised when shard result files fail a check in merge."""
+
+
+def shard_key(line: bytes) -> bytes:
+    """The key used to assign a line of input to a shard."""
+    try:
+        record = read_record(line)
+    except ValueError:
+        return line.strip()
+    if "id" in record:
+        return str(record["id"]).encode()
+    try:
+        if "mask" in record:
+            return GameBoard.from_websudoku_dict(record).to_string().encode()
+        return GameBoard.from_string(record["puzzle"]).to_string().encode()
+    except (ValueError, KeyError, TypeError):
+        return line.strip()
+
+
+def shard_of(line: bytes, n_shards: int) -> int:
+    digest = hashlib.blake2b(shard_key(line), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % n_shards
+
+
+def shard_filename(shard: int, n_shards: int) -> str:
+    return f"shard-{shard:05d}-of-{n_shards:05d}.jsonl"
+
+
+def file_sha256(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def split(instream: BinaryIO, out_dir: str, n_shards: int) -> dict:
+    """Split lines of puzzles into shard files in out_dir.
+
+    Writes manifest.json to out_dir, and returns its contents.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    paths = [
+        os.path.join(out_dir, shard_filename(shard, n_shards))
+        for shard in range(n_shards)
+    ]
+    counts = [0] * n_shards
+    files = [open(path, "wb") for path in paths]
+    try:
+        for line in instream:
+            if not line.strip():
+                continue
+            shard = shard_of(line, n_shards)
+            files[shard].write(line.rstrip(b"\r\n") + b"\n")
+            counts[shard] += 1
+    finally:
+        for f in files:
+            f.close()
+    manifest = {
+        "n_shards": n_shards,
+        "shards": [
+            {
+                "shard": shard,
+                "path": os.path.basename(paths[shard]),
+                "n_puzzles": counts[shard],
+                "sha256": file_sha256(paths[shard]),
+            }
+            for shard in range(n_shards)
+        ],
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def run(shard_path: str, out_path: str, batch_size: int = 64):
+    """Solve one shard file, writing a self-describing result file."""
+    match = SHARD_FILENAME.fullmatch(os.path.basename(shard_path))
+    if match is None:
+        raise ValueError(f"{shard_path} is not named like a shard from split.")
+    shard, n_shards = int(match.group(1)), int(match.group(2))
+    header = {
+        "format": FORMAT,
+        "version": VERSION,
+        "shard": shard,
+        "n_shards": n_shards,
+        "input_sha256": file_sha256(shard_path),
+    }
+    sha = hashlib.sha256()
+    n_results = 0
+    with open(shard_path, "rb") as instream, open(out_path, "wb") as out:
+        out.write(json.dumps(header).encode() + b"\n")
+        for batch in iter_batches(instream, batch_size):
+            results = solve_lines(batch)
+            sha.update(results)
+            n_results += len(batch)
+            out.write(results)
+        footer = {"n_results": n_results, "sha256": sha.hexdigest()}
+        out.write(json.dumps(footer).encode() + b"\n")
+
+
+def read_result_file(path: str) -> dict:
+    """Read and check a result file written by run.
+
+    Returns the header, with the result lines under "results".
+    """
+    with open(path, "rb") as f:
+        lines = f.read().splitlines(keepends=True)
+    if len(lines) < 2:
+        raise ShardIntegrityError(f"{path} is missing its header or footer.")
+    try:
+        header, footer = json.loads(lines[0]), json.loads(lines[-1])
+    except ValueError:
+        raise ShardIntegrityError(f"{path} has an unreadable header or footer.")
+    if header.get("format") != FORMAT or header.get("version") != VERSION:
+        raise ShardIntegrityError(f"{path} is not a version {VERSION} result file.")
+    results = lines[1:-1]
+    if "sha256" not in footer or footer.get("n_results") != len(results):
+        raise ShardIntegrityError(f"{path} has the wrong number of results.")
+    if hashlib.sha256(b"".join(results)).hexdigest() != footer["sha256"]:
+        raise ShardIntegrityError(f"{path} does not match its checksum.")
+    header["results"] = results
+    return header
+
+
+def merge(manifest: dict, result_paths: List[str], out: BinaryIO) -> int:
+    """Check result files against a manifest, and write their results.
+
+    Returns the number of results written. Raises ShardIntegrityError if any
+    shard is missing, duplicated, truncated, or was run on the wrong input.
+    """
+    n_shards = manifest["n_shards"]
+    by_shard: Dict[int, dict] = {}
+    for path in result_paths:
+        result = read_result_file(path)
+        shard = result["shard"]
+        if result["n_shards"] != n_shards:
+            raise ShardIntegrityError(
+                f"{path} is from a split into a different number of shards."
+            )
+        if shard in by_shard:
+            raise ShardIntegrityError(f"Shard {shard} appears more than once.")
+        expected = manifest["shards"][shard]
+        if result["input_sha256"] != expected["sha256"]:
+            raise ShardIntegrityError(
+                f"{path} was not run on shard {shard} of this manifest."
+            )
+        if len(result["results"]) != expected["n_puzzles"]:
+            raise ShardIntegrityError(
+                f"{path} does not have a result for every puzzle."
+            )
+        by_shard[shard] = result
+    missing = sorted(set(range(n_shards)) - set(by_shard))
+    if missing:
+        raise ShardIntegrityError(f"Missing results for shards {missing}.")
+    n_written = 0
+    for shard in range(n_shards):
+        for line in by_shard[shard]["results"]:
+            out.write(line)
+            n_written += 1
+    return n_written
@@ -1,16 +1,83 @@
-import copy
 import json
-from typing import List, Set, Optional
+import time
+from enum import Enum
+from typing import Iterator, List, Set, Optional, Tuple, Type
 
 from sudoku.boards import GameBoard, MarkedBoard
-from sudoku.moves import MOVES_ORDER, MOVES_DICT, Finished, Move
+from sudoku.moves import (
+    MOVES_ORDER,
+    MOVES_DICT,
+    Finished,
+    HiddenSingle,
+    NakedSingle,
+    IntersectionTrickPointing,
+    IntersectionTrickClaiming,
+    HiddenDouble,
+    NakedDouble,
+    Move,
+    NewMarks,
+)
+from sudoku.utils import all_empty
+
+# Move types that are applied together in one round of a wavefront solve, in
+# the order they are tried.
+WAVEFRONT_GROUPS: List[List[Type[Move]]] = [
+    [Finished],
+    [HiddenSingle, NakedSingle],
+    [IntersectionTrickPointing, IntersectionTrickClaiming],
+    [HiddenDouble],
+    [NakedDouble],
+]
+
+
+class SolveStatus(Enum):
+    # The solver has not been run to a stopping point yet.
+    IN_PROGRESS = 0
+    SOLVED = 1
+    # No move in MOVES_ORDER applies to the board.
+    STUCK = 2
+    # The step or time budget passed to Solver.solve ran out. The solution
+    # holds the moves found so far, and calling solve again resumes.
+    BUDGET_EXHAUSTED = 3
+    # The puzzle needs a harder move, or reaches a higher difficulty, than a
+    # tiered solve allows (see analysis.solve_within_tier).
+    TIER_EXCEEDED = 4
+    # The board cannot be solved: it was invalid to begin with, or a move led
+    # to a cell or house with no place left for some number.
+    CONTRADICTION = 5
 
 
 class Solution:
+    # Whether the solver should keep the per-step history needed to replay
+    # this solution. Solutions that only aggregate (see
+    # analysis.GradeOnlySolution) turn this off.
+    keeps_trace = True
+
     def __init__(self):
         self.moves: List[Move] = []
         self.marks = []
         self.is_full_solution = False
+        self.status = SolveStatus.IN_PROGRESS
+        self.n_steps = 0
+        self.elapsed = 0.0
+        # Only filled in by a wavefront solve, see Solver.iter_rounds.
+        self.rounds: List[int] = []
+        self.n_rounds = 0
+
+    def record(self, move: Move, marks: Optional[NewMarks] = None):
+        """Record a move applied by the solver, along with the marks it added.
+
+        The Finished move adds no marks, so none are recorded for it.
+        """
+        self.moves.append(move)
+        self.n_steps += 1
+        if marks is not None:
+            self.marks.append(marks)
+
+    def record_round(self, n_moves: int):
+        """Record that the last n_moves moves were found in a single round."""
+        self.rounds.append(n_moves)
+        self.n_rounds += 1
 
     def iter_moves(self):
         yield from self.moves
@@ -32,36 +99,156 @@ class Solution:
 
 
 class Solver:
-    def __init__(self, game_board: GameBoard):
-        self.game_board = copy.deepcopy(game_board)
+    def __init__(
+        self,
+        game_board: GameBoard,
+        solution: Optional[Solution] = None,
+        moves: List[Type[Move]] = MOVES_ORDER,
+    ):
+        self.game_board = game_board.copy()
         self.marked_board = MarkedBoard.from_game_board(game_board)
         self.found_moves: Set[Move] = set()
-        self.solution = Solution()
+        self.solution = solution if solution is not None else Solution()
+        # The move types searched for, in order. Restricting these gives a
+        # solver that gets stuck as soon as a harder move is needed.
+        self.moves = moves
+        self.status = SolveStatus.IN_PROGRESS
         self.is_complete = False
 
     def find_next_move(self) -> Optional[Move]:
-        for move in MOVES_ORDER:
+        for move in self.moves:
             mv = move.search(self.marked_board, already_found=self.found_moves)
             if mv:
                 return mv
         return None
 
-    def solve(self) -> Solution:
+    def iter_solve(self) -> Iterator[Tuple[Move, Optional[NewMarks]]]:
+        """Lazily apply moves to the marked board, one at a time.
+
+        Yields (move, marks) after each move is applied. The Finished move adds
+        no marks, so it is yielded with marks None. All the solver's state lives
+        on the solver, so a consumer can stop early and later resume with a
+        fresh call to iter_solve (or solve).
+
+        If the board is, or becomes, contradictory the solver stops with status
+        CONTRADICTION, after yielding the move that exposed the contradiction.
+        """
+        if self.marked_board.contradiction is not None:
+            self.status = SolveStatus.CONTRADICTION
+            self.is_complete = True
         while not self.is_complete:
             mv = self.find_next_move()
             match mv:
                 case None:
-                    self.solution.is_fully_solved = False
+                    self.status = SolveStatus.STUCK
                     self.is_complete = True
                 case Finished():
-                    self.solution.moves.append(mv)
-                    self.solution.is_full_solution = True
-                    self.is_fully_solved = True
+                    self.status = SolveStatus.SOLVED
                     self.is_complete = True
+                    yield mv, None
                 case _:
-                    marks = mv.compute_marks(self.marked_board)
-                    self.marked_board.add_marks(marks)
-                    self.found_moves.add(mv)
-                    self.solution.moves.append(mv)
-                    self.solution.marks.append(marks)
+                    marks = mv.apply(self.marked_board)
+                    if self.marked_board.contradiction is not None:
+                        self.status = SolveStatus.CONTRADICTION
+                        self.is_complete = True
+                    # An applied move adds no further marks, so searches never
+                    # return it again; found_moves is only a guard, and is
+                    # dropped when the solution keeps no history.
+                    if self.solution.keeps_trace:
+                        self.found_moves.add(mv)
+                    yield mv, marks
+
+    def iter_rounds(self) -> Iterator[List[Tuple[Move, Optional[NewMarks]]]]:
+        """Lazily apply moves to the marked board, a round at a time.
+
+        Each round finds every productive move in the first group of
+        WAVEFRONT_GROUPS that has any, and applies them all, so e.g. every
+        naked and hidden single available is placed in one round. Moves that
+        are no longer productive by the time they are applied, such as a naked
+        and a hidden single for the same cell, are skipped. Yields the list of
+        (move, marks) applied in each round.
+
+        The number of rounds needed to solve a puzzle is its solving depth.
+        """
+        if self.marked_board.contradiction is not None:
+            self.status = SolveStatus.CONTRADICTION
+            self.is_complete = True
+        while not self.is_complete:
+            found: List[Move] = []
+            for group in WAVEFRONT_GROUPS:
+                for move in group:
+                    if move in self.moves:
+                        found.extend(move.iter_search(self.marked_board))
+                if found:
+                    break
+            if not found:
+                self.status = SolveStatus.STUCK
+                self.is_complete = True
+            elif isinstance(found[0], Finished):
+                self.status = SolveStatus.SOLVED
+                self.is_complete = True
+                yield [(found[0], None)]
+            else:
+                yield self._apply_round(found)
+
+    def _apply_round(self, moves: List[Move]) -> List[Tuple[Move, NewMarks]]:
+        applied = []
+        for mv in moves:
+            if isinstance(mv, (NakedSingle, HiddenSingle)):
+                if mv.coords in self.marked_board.placed:
+                    continue
+            elif all_empty(mv.compute_marks(self.marked_board)):
+                continue
+            marks = mv.apply(self.marked_board)
+            if self.solution.keeps_trace:
+                self.found_moves.add(mv)
+            applied.append((mv, marks))
+            if self.marked_board.contradiction is not None:
+                self.status = SolveStatus.CONTRADICTION
+                self.is_complete = True
+                break
+        return applied
+
+    def solve(
+        self,
+        max_steps: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+        wavefront: bool = False,
+    ) -> Solution:
+        """Apply moves until the board is solved or no move can be found.
+
+        The optional budgets bound the work done in this call: at most
+        max_steps moves are found, and no new move is searched for once
+        max_seconds of wall-clock time have passed. If a budget runs out the
+        partial solution is returned with status BUDGET_EXHAUSTED; calling
+        solve again picks up where it stopped.
+
+        In wavefront mode moves are applied in rounds (see iter_rounds), and
+        the size of each round is recorded in the solution. Budgets are then
+        checked between rounds, so max_steps can be overshot by up to a round.
+        """
+        start = time.perf_counter()
+        steps = 0
+        if wavefront:
+            rounds = self.iter_rounds()
+        else:
+            rounds = ([move] for move in self.iter_solve())
+        while not self.is_complete:
+            if (max_steps is not None and steps >= max_steps) or (
+                max_seconds is not None and time.perf_counter() - start >= max_seconds
+            ):
+                self.status = SolveStatus.BUDGET_EXHAUSTED
+                break
+            try:
+                applied = next(rounds)
+            except StopIteration:
+                break
+            for mv, marks in applied:
+                self.solution.record(mv, marks)
+            if wavefront:
+                self.solution.record_round(len(applied))
+            steps += len(applied)
+        self.solution.status = self.status
+        self.solution.is_full_solution = self.status == SolveStatus.SOLVED
+        self.solution.elapsed += time.perf_counter() - start
         return self.solution
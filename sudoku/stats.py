@@ -0,0 +1,218 @@
+"""A columnar store of per-puzzle solve statistics.
+
+A store is a directory holding one .npy file per column, and a
+columns.json describing them. Columns are memory mapped when the store is
+opened, so queries over millions of puzzles only touch the columns they use,
+and never solve anything again.
+
+    store = build_stats("puzzles.jsonl", "stats/")
+    store = StatsStore("stats/")
+    store.top_k("difficulty", 10)
+    store.group_by("level", "difficulty", "mean")
+    store.rows(np.flatnonzero(store.move_counts(HiddenDouble) > 0))
+
+Columns
+-------
+  - id: The websudoku puzzle id, or -1 if there is none.
+  - level: The websudoku difficulty level, 1-4, or 0 if there is none.
+  - n_clues: The number of filled in cells in the puzzle.
+  - status: The SolveStatus of the solve, as an int.
+  - move_vector: The number of moves of each type, in the order of
+    MOVES_ORDER, as in the final row of a MoveSchedule.
+  - difficulty: As in DifficultySchedule.difficulty.
+  - n_steps: The number of moves made.
+  - elapsed: The seconds spent solving.
+"""
+
+import json
+import os
+import re
+from typing import Dict, Optional, Type
+
+import numpy as np
+
+from sudoku.batch import solve_shared
+from sudoku.bulk import BoardBatch
+from sudoku.moves import MOVES_ORDER, Move
+
+COLUMNS = {
+    "id": np.int64,
+    "level": np.int8,
+    "n_clues": np.int16,
+    "status": np.int8,
+    "move_vector": np.int32,
+    "difficulty": np.float64,
+    "n_steps": np.int32,
+    "elapsed": np.float64,
+}
+
+_WEBSUDOKU_EXTRAS = {
+    key: re.compile(rb'"%s"\s*:\s*"(\d+)"' % key.encode()) for key in ["id", "level"]
+}
+
+
+class StatsStore:
+    """A store of statistics opened from a directory, see the module docstring.
+
+    Columns are read with store[name], and are memory mapped unless mmap is
+    False.
+    """
+
+    def __init__(self, path: str, mmap: bool = True):
+        self.path = path
+        with open(os.path.join(path, "columns.json")) as f:
+            self.meta = json.load(f)
+        mmap_mode = "r" if mmap else None
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.load(os.path.join(path, name + ".npy"), mmap_mode=mmap_mode)
+            for name in self.meta["columns"]
+        }
+
+    @staticmethod
+    def write(path: str, columns: Dict[str, np.ndarray]) -> "StatsStore":
+        """Write columns to a new store at path, and open it."""
+        lengths = {len(column) for column in columns.values()}
+        if len(lengths) != 1:
+            raise ValueError("Every column must have the same length.")
+        os.makedirs(path, exist_ok=True)
+        for name, dtype in COLUMNS.items():
+            np.save(os.path.join(path, name + ".npy"), columns[name].astype(dtype))
+        meta = {
+            "columns": list(COLUMNS),
+            "n_rows": lengths.pop(),
+            "moves": [move.__name__ for move in MOVES_ORDER],
+        }
+        with open(os.path.join(path, "columns.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+        return StatsStore(path)
+
+    def __len__(self) -> int:
+        return self.meta["n_rows"]
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def move_counts(self, move: Type[Move]) -> np.ndarray:
+        """The number of moves of one type made in each solve."""
+        return self.columns["move_vector"][:, self.meta["moves"].index(move.__name__)]
+
+    def rows(self, idxs) -> Dict[str, np.ndarray]:
+        """The values of every column at some row indexes."""
+        return {name: np.asarray(column[idxs]) for name, column in self.columns.items()}
+
+    def top_k(
+        self, column: str, k: int, where: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """The indexes of the k rows with the largest values in a column.
+
+        The indexes are sorted from largest value to smallest. If where is a
+        boolean array, only rows where it is True are considered. If k is not
+        positive, no indexes are returned.
+        """
+        if k <= 0:
+            return np.zeros(0, dtype=np.intp)
+        values = self.columns[column]
+        idxs = np.arange(len(self)) if where is None else np.flatnonzero(where)
+        values = values[idxs]
+        if k < len(idxs):
+            part = np.argpartition(values, len(idxs) - k)[len(idxs) - k :]
+            idxs, values = idxs[part], values[part]
+        return idxs[np.argsort(values, kind="stable")[::-1]]
+
+    def group_by(
+        self,
+        key: str,
+        column: Optional[str] = None,
+        aggregate: str = "mean",
+        where: Optional[np.ndarray] = None,
+    ) -> Dict[int, float]:
+        """Aggregate a column over the rows with each value of a key column.
+
+        aggregate is one of "count", "sum", "mean", "min" or "max". If where
+        is a boolean array, only rows where it is True are included. With no
+        column, the rows in each group are counted.
+        """
+        keys = self.columns[key]
+        values = self.columns[column] if column is not None else None
+        if where is not None:
+            keys = keys[where]
+            values = values[where] if values is not None else None
+        groups, inverse, counts = _group(np.asarray(keys))
+        if aggregate == "count" or values is None:
+            result = counts
+        elif aggregate in ("sum", "mean"):
+            result = np.bincount(inverse, weights=values, minlength=len(groups))
+            if aggregate == "mean":
+                result = result / counts
+        elif aggregate in ("min", "max"):
+            ufunc = np.minimum if aggregate == "min" else np.maximum
+            values = np.asarray(values)
+            result = np.empty(len(groups), values.dtype)
+            # Start each group from one of its own values.
+            result[inverse] = values
+            ufunc.at(result, inverse, values)
+        else:
+            raise ValueError(f"Unknown aggregate {aggregate}.")
+        return dict(zip(groups.tolist(), result.tolist()))
+
+
+def _group(keys: np.ndarray):
+    """Find the distinct keys, the group of each key, and the group sizes."""
+    if keys.dtype.kind in "iu" and len(keys):
+        # Small integer keys, like levels or clue counts, can be counted
+        # directly, without sorting.
+        low, high = int(keys.min()), int(keys.max())
+        if high - low < 1 << 16:
+            offsets = keys - low
+            counts = np.bincount(offsets, minlength=high - low + 1)
+            present = np.flatnonzero(counts)
+            # Renumber the offsets to count only the keys that appear.
+            renumber = np.cumsum(counts > 0) - 1
+            return present + low, renumber[offsets], counts[present]
+    return np.unique(keys, return_inverse=True, return_counts=True)
+
+
+def stats_columns(
+    batch: BoardBatch,
+    results: np.ndarray,
+    ids: Optional[np.ndarray] = None,
+    levels: Optional[np.ndarray] = None,
+) -> Dict[str, np.ndarray]:
+    """Build the columns of a store from solve_shared results."""
+    n = len(batch)
+    return {
+        "id": ids if ids is not None else np.full(n, -1),
+        "level": levels if levels is not None else np.zeros(n),
+        "n_clues": batch.n_clues,
+        "status": results["status"],
+        "move_vector": results["move_vector"],
+        "difficulty": results["difficulty"],
+        "n_steps": results["n_steps"],
+        "elapsed": results["elapsed"],
+    }
+
+
+def build_stats(
+    input_path: str, out_path: str, jobs: Optional[int] = None
+) -> StatsStore:
+    """Solve every puzzle in a file and write a store of the results.
+
+    The file is either websudoku records, as read by
+    BoardBatch.from_websudoku_file, in which case the ids and levels are
+    kept, or board strings, one per line.
+    """
+    with open(input_path, "rb") as f:
+        raw = f.read()
+    ids = levels = None
+    if b'"mask"' in raw:
+        batch = BoardBatch.from_websudoku_file(input_path)
+        ids, levels = (
+            np.array([int(v) for v in _WEBSUDOKU_EXTRAS[key].findall(raw)], np.int64)
+            for key in ["id", "level"]
+        )
+        if not len(ids) == len(levels) == len(batch):
+            raise ValueError(f"{input_path} has records without an id or level.")
+    else:
+        batch = BoardBatch.from_file(input_path)
+    results = solve_shared(batch, jobs=jobs).results
+    return StatsStore.write(out_path, stats_columns(batch, results, ids, levels))
@@ -7,9 +7,9 @@ def pairs_exclude_diagonal(it):
             yield (x, y)
 
 
-def iter_number_pairs():
-    for i in range(9):
-        for j in range(i + 1, 9):
+def iter_number_pairs(size=9):
+    for i in range(size):
+        for j in range(i + 1, size):
             yield (i, j)
 
 
@@ -0,0 +1,20 @@
+"""Puzzles shared by the solver tests."""
+from sudoku.boards import GameBoard
+
+
+# Solved using only singles.
+EASY = "100700904500040030400061200740005000019203480000600027004530002060080003803007009"
+# Needs pointing intersection tricks.
+MEDIUM = "400000805030000000000700000020000060000080400000010000000603070500200000104000000"
+# Needs a hidden double.
+HARD = "001900003900700160030005007050000009004302600200000070600100030042007006500006800"
+# The solver gets stuck on this one.
+STUCK = "043080250600000000000001094900004070000608000010200003820500000000000005034090710"
+
+
+def board_from_string(s):
+    b = GameBoard()
+    for ij, ch in enumerate(s):
+        if ch != "0":
+            b[(ij // 9, ij % 9)] = int(ch)
+    return b
@@ -0,0 +1,82 @@
+from sudoku.analysis import MOVE_INDEX, TIERS, solve_within_tier
+from sudoku.bench import (
+    CORPUS,
+    LEVELS,
+    compare,
+    corpus_sha256,
+    format_results,
+    make_corpus,
+    run_benchmarks,
+)
+from sudoku.boards import GameBoard
+from sudoku.moves import MOVES_ORDER, HiddenDouble, NakedDouble
+from sudoku.solver import SolveStatus
+import copy
+import unittest
+
+
+class TestCorpus(unittest.TestCase):
+    def test_levels(self):
+        self.assertEqual(list(CORPUS), LEVELS)
+        for level, puzzles in CORPUS.items():
+            for puzzle in puzzles:
+                board = GameBoard.from_string(puzzle)
+                full = solve_within_tier(board)
+                singles = solve_within_tier(board, TIERS["singles"])
+                intersections = solve_within_tier(board, TIERS["intersections"])
+                doubles = sum(
+                    full.move_vector[MOVE_INDEX[move]]
+                    for move in [HiddenDouble, NakedDouble]
+                )
+                if level == "easy":
+                    self.assertEqual(singles.status, SolveStatus.SOLVED)
+                elif level == "medium":
+                    self.assertEqual(singles.status, SolveStatus.TIER_EXCEEDED)
+                    self.assertEqual(intersections.status, SolveStatus.SOLVED)
+                elif level == "hard":
+                    self.assertEqual(full.status, SolveStatus.SOLVED)
+                    self.assertGreater(doubles, 0)
+                else:
+                    self.assertEqual(full.status, SolveStatus.STUCK)
+
+    def test_regenerates(self):
+        corpus = make_corpus(seed=0, per_level=1, levels=["easy"])
+        self.assertEqual(corpus, {"easy": CORPUS["easy"][:1]})
+
+
+class TestBenchmarks(unittest.TestCase):
+    def setUp(self):
+        self.corpus = {"easy": CORPUS["easy"][:1], "evil": CORPUS["evil"][:1]}
+        self.results = run_benchmarks(self.corpus, repeat=1)
+
+    def test_metrics(self):
+        metrics = self.results["metrics"]
+        expected = (
+            [f"search.{move.__name__}" for move in MOVES_ORDER]
+            + ["add_marks"]
+            + [
+                f"{kind}.{level}"
+                for kind in ["solve", "memory"]
+                for level in self.corpus
+            ]
+        )
+        self.assertEqual(sorted(metrics), sorted(expected))
+        self.assertTrue(all(value > 0 for value in metrics.values()))
+        self.assertEqual(self.results["corpus_sha256"], corpus_sha256(self.corpus))
+        self.assertEqual(len(format_results(self.results).splitlines()), len(metrics))
+
+    def test_compare(self):
+        baseline = copy.deepcopy(self.results)
+        self.assertEqual(compare(self.results, baseline), [])
+        baseline["metrics"]["add_marks"] /= 2
+        baseline["metrics"]["solve.easy"] /= 1.1
+        regressions = compare(self.results, baseline, tolerance=0.25)
+        self.assertEqual([r["metric"] for r in regressions], ["add_marks"])
+        self.assertAlmostEqual(regressions[0]["ratio"], 2)
+        baseline["corpus_sha256"] = corpus_sha256(CORPUS)
+        with self.assertRaises(ValueError):
+            compare(self.results, baseline)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+from sudoku.boards import FrozenGameBoard, GameBoard, MarkedBoard
+from sudoku.fastsolve import solve_grid
+from sudoku.solver import Solver, SolveStatus
+import copy
+import pickle
+import unittest
+
+from puzzles import EASY, board_from_string
+
+SMALL = "1030041021000001"
+LARGE = (
+    "100456700000DEF05070DE0G100400BC9A0C0230DE0G560000FG00BC50001030"
+    "241080A0EBC0GFD7F0C0G0160057039A70000B2000A060C005A030000G490020"
+    "31800000040000EF00400000008A2G0000900CD2601F30000F5BA8037C0E491D"
+    "4000C300A700F00900000G09C165E0420C00200AG0000801G927016E00D000A0"
+)
+
+
+class TestBoardSizes(unittest.TestCase):
+    def check_grid(self, puzzle, grid):
+        n = puzzle.size
+        numbers = set(range(1, n + 1))
+        for house in puzzle.tables.house_coords:
+            self.assertEqual({grid[coords] for coords in house}, numbers)
+        for coords, number in puzzle.iter.iter_board():
+            if number is not None:
+                self.assertEqual(grid[coords], number)
+
+    def test_string_round_trip(self):
+        for s in [SMALL, EASY, LARGE]:
+            board = GameBoard.from_string(s)
+            self.assertEqual(board.to_string(), s)
+        self.assertEqual(GameBoard.from_string(LARGE).box_size, 4)
+        self.assertEqual(
+            list(GameBoard.from_string(EASY).iter.iter_board()),
+            list(board_from_string(EASY).iter.iter_board()),
+        )
+
+    def test_bad_string_length(self):
+        with self.assertRaises(ValueError):
+            GameBoard.from_string(EASY[:-1])
+
+    def test_logical_solver(self):
+        for s in [SMALL, LARGE]:
+            board = GameBoard.from_string(s)
+            solver = Solver(board)
+            solution = solver.solve()
+            self.assertEqual(solution.status, SolveStatus.SOLVED)
+            grid = GameBoard(board.box_size)
+            for coords, number in solver.marked_board.placed.items():
+                grid[coords] = number
+            self.check_grid(board, grid)
+
+    def test_solve_grid(self):
+        for box_size in [2, 4, 5]:
+            empty = GameBoard(box_size)
+            self.check_grid(empty, solve_grid(empty))
+        large = GameBoard.from_string(LARGE)
+        self.check_grid(large, solve_grid(large))
+
+    def test_pack_unpack(self):
+        marked_board = MarkedBoard.from_game_board(GameBoard.from_string(LARGE))
+        packed = marked_board.pack()
+        other = MarkedBoard.unpack(packed)
+        self.assertEqual(other.box_size, 4)
+        self.assertEqual(other.placed, marked_board.placed)
+        self.assertEqual(other.pack(), packed)
+
+
+class TestGameBoardBuffer(unittest.TestCase):
+    def test_cells(self):
+        board = board_from_string(EASY)
+        self.assertEqual(len(board.cells), 81)
+        self.assertEqual(board[(0, 0)], 1)
+        self.assertIsNone(board[(0, 1)])
+        board[(0, 0)] = None
+        self.assertEqual(board.cells[0], 0)
+        with self.assertRaises(KeyError):
+            board[(0, 9)]
+        with self.assertRaises(KeyError):
+            board[(-1, 0)] = 1
+
+    def test_copy(self):
+        board = board_from_string(EASY)
+        copies = [board.copy(), copy.deepcopy(board), pickle.loads(pickle.dumps(board))]
+        for other in copies:
+            self.assertEqual(other, board)
+            other[(0, 1)] = 2
+            self.assertNotEqual(other, board)
+
+    def test_frozen(self):
+        board = board_from_string(EASY)
+        frozen = board.freeze()
+        self.assertIsInstance(frozen, FrozenGameBoard)
+        self.assertEqual(frozen, board)
+        self.assertEqual(hash(frozen), hash(GameBoard.from_string(EASY).freeze()))
+        self.assertEqual(len({frozen, board.copy().freeze()}), 1)
+        with self.assertRaises(TypeError):
+            frozen[(0, 1)] = 2
+        with self.assertRaises(TypeError):
+            hash(board)
+        thawed = frozen.thaw()
+        thawed[(0, 1)] = 2
+        self.assertIsNone(frozen[(0, 1)])
+        self.assertEqual(pickle.loads(pickle.dumps(frozen)), frozen)
+        self.assertEqual(Solver(frozen).solve().status, SolveStatus.SOLVED)
+
+
+if __name__ == "__main__":
+    unittest.main()
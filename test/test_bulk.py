@@ -0,0 +1,98 @@
+from sudoku.boards import GameBoard
+from sudoku.bulk import BoardBatch
+import json
+import os
+import tempfile
+import unittest
+
+from puzzles import EASY, MEDIUM, HARD, board_from_string
+
+SOLUTION = (
+    "123456789456789123789123456214365897365897214897214365531642978642978531978531642"
+)
+MASK = "010101010" * 9
+
+
+class TestBoardBatch(unittest.TestCase):
+    def check_board(self, board, expected):
+        self.assertEqual(
+            list(board.iter.iter_board()), list(expected.iter.iter_board())
+        )
+
+    def test_from_strings(self):
+        batch = BoardBatch.from_strings([EASY, MEDIUM, HARD.replace("0", ".")])
+        self.assertEqual(batch.cells.shape, (3, 81))
+        self.assertEqual(batch.cells.dtype.name, "uint8")
+        for board, puzzle in zip(batch, [EASY, MEDIUM, HARD]):
+            self.check_board(board, board_from_string(puzzle))
+        self.assertEqual(batch.to_strings(), [EASY, MEDIUM, HARD])
+        self.assertEqual(
+            batch.n_clues.tolist(), [81 - p.count("0") for p in [EASY, MEDIUM, HARD]]
+        )
+
+    def test_websudoku(self):
+        record = {"puzzle": SOLUTION, "mask": MASK, "level": "1", "id": "7"}
+        expected = GameBoard.from_websudoku_dict(record)
+        self.check_board(GameBoard.from_websudoku_json(json.dumps(record)), expected)
+        self.check_board(BoardBatch.from_websudoku_records([record])[0], expected)
+        with tempfile.TemporaryDirectory() as d:
+            for name, text in [
+                ("a.json", json.dumps([record, record])),
+                ("b.jsonl", json.dumps(record) + "\n" + json.dumps(record) + "\n"),
+            ]:
+                path = os.path.join(d, name)
+                with open(path, "w") as f:
+                    f.write(text)
+                batch = BoardBatch.from_websudoku_file(path)
+                self.assertEqual(len(batch), 2)
+                self.check_board(batch[1], expected)
+
+    def test_websudoku_record_missing_field(self):
+        record = {"puzzle": SOLUTION, "mask": MASK}
+        other = {"mask": "1" * 81, "puzzle": EASY.replace("0", "1")}
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "missing.jsonl")
+            with open(path, "w") as f:
+                for r in [{"puzzle": SOLUTION}, record, {"mask": MASK}, other]:
+                    f.write(json.dumps(r) + "\n")
+            with self.assertRaises(ValueError):
+                BoardBatch.from_websudoku_file(path)
+            # A puzzle key in a nested object is not taken as the record's.
+            path = os.path.join(d, "nested.json")
+            with open(path, "w") as f:
+                json.dump([dict(record, meta={"puzzle": "1" * 81}), other], f)
+            batch = BoardBatch.from_websudoku_file(path)
+            self.check_board(batch[0], GameBoard.from_websudoku_dict(record))
+            self.check_board(batch[1], GameBoard.from_websudoku_dict(other))
+
+    def test_from_file(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "puzzles.txt")
+            with open(path, "w") as f:
+                f.write(EASY + "\n" + MEDIUM + "\n\n")
+            self.assertEqual(BoardBatch.from_file(path).to_strings(), [EASY, MEDIUM])
+
+    def test_bad_input(self):
+        with self.assertRaises(ValueError):
+            BoardBatch.from_strings([EASY, EASY[:-1]])
+        with self.assertRaises(ValueError):
+            BoardBatch.from_strings([EASY[:-1]])
+
+    def test_out_of_range_symbols(self):
+        bad = "A" + EASY[1:]
+        with self.assertRaises(ValueError):
+            BoardBatch.from_strings([EASY, bad])
+        with self.assertRaises(ValueError):
+            GameBoard.from_string(bad)
+        with self.assertRaises(ValueError):
+            BoardBatch.from_strings(["G" + "0" * 15])
+        # Symbols up to the board size are numbers, anything else is empty.
+        large = "G" + "." * 255
+        self.assertEqual(BoardBatch.from_strings([large]).cells[0, 0], 16)
+        self.assertEqual(
+            BoardBatch.from_strings(["." + EASY[1:]]).to_strings()[0][0], "0"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+from sudoku.cli import run_solve, solve_line
+import io
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+from puzzles import EASY, HARD, STUCK
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+
+def run(lines, **kwargs):
+    out = io.BytesIO()
+    run_solve(io.BytesIO("".join(lines).encode()), out, **kwargs)
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+class TestSolveCommand(unittest.TestCase):
+    def test_solve_line(self):
+        result = solve_line(EASY.encode())
+        self.assertEqual(result["puzzle"], EASY)
+        self.assertEqual(result["status"], "SOLVED")
+        self.assertNotIn("0", result["solution"])
+        self.assertEqual(result["move_vector"][0], 1)
+
+    def test_stuck_still_solved(self):
+        result = solve_line(STUCK.encode())
+        self.assertEqual(result["status"], "STUCK")
+        self.assertNotIn("0", result["solution"])
+
+    def test_json_input(self):
+        record = {"id": "12", "puzzle": HARD}
+        result = solve_line(json.dumps(record).encode())
+        self.assertEqual(result["id"], "12")
+        self.assertEqual(result["puzzle"], HARD)
+        self.assertEqual(result["move_vector"][5], 1)
+
+    def test_bad_lines(self):
+        lines = [EASY + "\n", "\n", "123\n", "{not json\n", '{"id": 1}\n']
+        lines += ['{"puzzle": null}\n', '{"puzzle": 5}\n', HARD + "\n"]
+        results = run(lines, batch_size=2)
+        self.assertEqual(len(results), 7)
+        self.assertEqual(
+            [("error" in r) for r in results],
+            [False, True, True, True, True, True, False],
+        )
+
+    def test_jobs(self):
+        lines = [p + "\n" for p in [EASY, HARD, STUCK] * 5]
+        self.assertEqual(run(lines, batch_size=2, jobs=2), run(lines))
+
+    def test_coprocess(self):
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "sudoku", "solve", "--line-buffered"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            cwd=ROOT,
+        )
+        try:
+            for puzzle in [EASY, HARD]:
+                proc.stdin.write(puzzle.encode() + b"\n")
+                proc.stdin.flush()
+                # The answer arrives without closing stdin.
+                self.assertEqual(json.loads(proc.stdout.readline())["puzzle"], puzzle)
+        finally:
+            proc.stdin.close()
+            proc.wait(timeout=10)
+            proc.stdout.close()
+        self.assertEqual(proc.returncode, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
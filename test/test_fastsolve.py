@@ -0,0 +1,46 @@
+from sudoku.fastsolve import solve_grid, count_solutions
+from sudoku.solver import Solver
+import unittest
+
+from puzzles import EASY, MEDIUM, HARD, STUCK, board_from_string
+
+
+class TestSolveGrid(unittest.TestCase):
+    def check_grid(self, puzzle, grid):
+        rows = [{grid[(i, j)] for j in range(9)} for i in range(9)]
+        columns = [{grid[(i, j)] for i in range(9)} for j in range(9)]
+        self.assertTrue(all(house == set(range(1, 10)) for house in rows + columns))
+        for coords, number in board_from_string(puzzle).iter.iter_board():
+            if number is not None:
+                self.assertEqual(grid[coords], number)
+
+    def test_matches_logical_solver(self):
+        for puzzle in [EASY, MEDIUM, HARD]:
+            solver = Solver(board_from_string(puzzle))
+            solver.solve()
+            grid = solve_grid(board_from_string(puzzle))
+            self.check_grid(puzzle, grid)
+            for coords, number in solver.marked_board.placed.items():
+                self.assertEqual(grid[coords], number)
+
+    def test_needs_search(self):
+        # The logical solver gets stuck on this one, so it needs branching.
+        self.check_grid(STUCK, solve_grid(board_from_string(STUCK)))
+
+    def test_invalid_board(self):
+        board = board_from_string(EASY)
+        board[(0, 1)] = 1
+        self.assertIsNone(solve_grid(board))
+        self.assertEqual(count_solutions(board), 0)
+
+    def test_count_solutions(self):
+        self.assertEqual(count_solutions(board_from_string(HARD)), 1)
+        board = board_from_string(HARD)
+        board[(0, 2)] = None
+        board[(0, 3)] = None
+        self.assertEqual(count_solutions(board, limit=1), 1)
+        self.assertGreaterEqual(count_solutions(board_from_string("0" * 81)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
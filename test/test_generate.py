@@ -0,0 +1,64 @@
+from random import Random
+from sudoku.analysis import MOVE_INDEX, solve_within_tier
+from sudoku.fastsolve import count_solutions
+from sudoku.generate import generate, iter_removals, random_grid, remove_clues
+from sudoku.moves import IntersectionTrickPointing
+from sudoku.solver import SolveStatus
+import unittest
+
+
+class TestGenerate(unittest.TestCase):
+    def test_random_grid(self):
+        grid = random_grid(Random(0))
+        for house in grid.tables.house_coords:
+            self.assertEqual({grid[coords] for coords in house}, set(range(1, 10)))
+        self.assertNotEqual(grid.to_string(), random_grid(Random(1)).to_string())
+
+    def test_removals_keep_unique(self):
+        rng = Random(0)
+        grid = random_grid(rng)
+        removals = list(iter_removals(grid, rng))
+        for k in [len(removals) // 2, len(removals)]:
+            self.assertEqual(count_solutions(remove_clues(grid, removals[:k])), 1)
+
+    def test_minimal(self):
+        puzzle = generate(Random(0))
+        self.assertEqual(count_solutions(puzzle), 1)
+        for coords, number in puzzle.iter.iter_board():
+            if number is not None:
+                puzzle[coords] = None
+                self.assertEqual(count_solutions(puzzle), 2)
+                puzzle[coords] = number
+
+    def test_seeded(self):
+        self.assertEqual(
+            generate(Random(3)).to_string(), generate(Random(3)).to_string()
+        )
+
+    def test_difficulty_range(self):
+        rng = Random(0)
+        for _ in range(3):
+            puzzle = generate(rng, min_difficulty=1.5, max_difficulty=2.5)
+            solution = solve_within_tier(puzzle)
+            self.assertEqual(solution.status, SolveStatus.SOLVED)
+            self.assertTrue(1.5 <= solution.difficulty <= 2.5)
+            self.assertIn("0", puzzle.to_string())
+
+    def test_unreachable_target(self):
+        # Removing any one clue already makes the puzzle harder than this.
+        self.assertIsNone(generate(Random(1), max_difficulty=0.01, max_tries=3))
+
+    def test_accept(self):
+        pointing = MOVE_INDEX[IntersectionTrickPointing]
+        puzzle = generate(Random(0), accept=lambda sln: sln.move_vector[pointing] > 0)
+        self.assertGreater(solve_within_tier(puzzle).move_vector[pointing], 0)
+        self.assertIn("0", puzzle.to_string())
+
+    def test_box_size(self):
+        puzzle = generate(Random(0), box_size=2)
+        self.assertEqual(puzzle.size, 4)
+        self.assertEqual(count_solutions(puzzle), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
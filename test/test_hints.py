@@ -0,0 +1,72 @@
+from sudoku.boards import MarkedBoard
+from sudoku.hints import HintSession
+from sudoku.moves import Finished, NakedSingle, HiddenSingle
+from sudoku.solver import Solver
+import unittest
+
+from puzzles import EASY, MEDIUM, board_from_string
+
+
+def first_move(game_board):
+    return Solver(game_board).find_next_move()
+
+
+class TestHintSession(unittest.TestCase):
+    def test_hint_matches_solver(self):
+        session = HintSession(board_from_string(MEDIUM))
+        self.assertEqual(session.next_hint(), first_move(session.game_board))
+
+    def test_hints_follow_placements(self):
+        board = board_from_string(EASY)
+        session = HintSession(board)
+        for _ in range(10):
+            hint = session.next_hint()
+            self.assertIsInstance(hint, (NakedSingle, HiddenSingle))
+            session.place(hint.coords, hint.number)
+            self.assertEqual(session.next_hint(), first_move(session.game_board))
+
+    def test_plays_to_finish(self):
+        session = HintSession(board_from_string(EASY))
+        while not isinstance(hint := session.next_hint(), Finished):
+            session.place(hint.coords, hint.number)
+        self.assertEqual(len(session.marked_board.placed), 81)
+
+    def test_undo_restores_board(self):
+        board = board_from_string(MEDIUM)
+        session = HintSession(board)
+        before = MarkedBoard.from_game_board(board)
+        hint = session.next_hint()
+        session.add_pencil_marks((8, 8), {1, 2})
+        session.place((0, 1), 6)
+        session.place((0, 2), 6)
+        self.assertIsNotNone(session.marked_board.contradiction)
+        self.assertIsNone(session.next_hint())
+        for _ in range(3):
+            session.undo()
+        self.assertIsNone(session.undo())
+        self.assertEqual(session.marked_board.data, before.data)
+        self.assertEqual(session.marked_board.placed, before.placed)
+        self.assertIsNone(session.marked_board.contradiction)
+        self.assertEqual(session.next_hint(), hint)
+
+    def test_undo_placement_over_a_number(self):
+        board = board_from_string(EASY)
+        session = HintSession(board)
+        before = MarkedBoard.from_game_board(board)
+        clue = board[(0, 0)]
+        # Placing the clue again, and then a different number over it.
+        session.place((0, 0), clue)
+        session.place((0, 0), clue % 9 + 1)
+        self.assertIsNotNone(session.marked_board.contradiction)
+        session.undo()
+        session.undo()
+        self.assertEqual(session.game_board[(0, 0)], clue)
+        self.assertEqual(session.game_board.cells, board.cells)
+        self.assertEqual(session.marked_board.data, before.data)
+        self.assertEqual(session.marked_board.placed, before.placed)
+        self.assertEqual(session.marked_board._placed_in_house, before._placed_in_house)
+        self.assertIsNone(session.marked_board.contradiction)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,9 +7,17 @@ from sudoku.moves import (
     IntersectionTrickClaiming,
     NakedDouble,
     HiddenDouble,
+    MOVES_ORDER,
+    find_all_moves,
+    pack_house,
+    naked_doubles_in_house,
+    hidden_doubles_in_house,
+    clear_house_memos,
 )
 import unittest
 
+from puzzles import STUCK, board_from_string
+
 
 def new_boards(data):
     b = GameBoard()
@@ -32,12 +40,12 @@ class TestMove(unittest.TestCase):
 
 class TestNakedSingle(TestMove):
     def test_naked_single_row(self):
-        _, mb = new_boards({(0, i): i + 1 for i in range(1, 10)})
+        _, mb = new_boards({(0, i): i + 1 for i in range(1, 9)})
         ns = NakedSingle.search(mb)
         self.assertEqual(ns, NakedSingle((0, 0), 1))
 
     def test_naked_single_column(self):
-        _, mb = new_boards({(i, 0): i + 1 for i in range(1, 10)})
+        _, mb = new_boards({(i, 0): i + 1 for i in range(1, 9)})
         ns = NakedSingle.search(mb)
         self.assertEqual(ns, NakedSingle((0, 0), 1))
 
@@ -235,6 +243,13 @@ class TestIntersectionTrickClaiming(TestMove):
             IntersectionTrickClaiming(HouseType.COLUMN, 0, 1, 1),
         )
 
+    def test_box_coords_on_16x16_board(self):
+        row = IntersectionTrickClaiming(HouseType.ROW, 7, 2, 1)
+        self.assertEqual(row.box_coords_for(3), (2, 2))
+        self.assertEqual(row.box_coords_for(4), (1, 2))
+        column = IntersectionTrickClaiming(HouseType.COLUMN, 12, 0, 1)
+        self.assertEqual(column.box_coords_for(4), (0, 3))
+
 
 class TestNakedDouble(TestMove):
     def test_naked_double_row(self):
@@ -324,6 +339,21 @@ class TestHiddenDouble(TestMove):
             HiddenDouble(HouseType.ROW, 0, ((0, 0), (0, 2)), (1, 2)),
         )
 
+    def test_hidden_double_highest_number(self):
+        self.check_move(
+            {
+                (0, 6): 1,
+                (0, 7): 2,
+                (0, 8): 3,
+                (1, 3): 8,
+                (1, 4): 9,
+                (6, 1): 8,
+                (7, 1): 9,
+            },
+            HiddenDouble,
+            HiddenDouble(HouseType.ROW, 0, ((0, 0), (0, 2)), (8, 9)),
+        )
+
     def test_hidden_double_row_2(self):
         self.check_move(
             {
@@ -379,5 +409,56 @@ class TestHiddenDouble(TestMove):
         )
 
 
+class TestFindAllMoves(unittest.TestCase):
+    def test_matches_repeated_search(self):
+        mb = MarkedBoard.from_game_board(board_from_string(STUCK))
+        all_moves = find_all_moves(mb)
+        self.assertEqual(list(all_moves), MOVES_ORDER)
+        for move_class in [
+            IntersectionTrickPointing,
+            IntersectionTrickClaiming,
+            NakedDouble,
+            HiddenDouble,
+        ]:
+            found = set()
+            while move := move_class.search(mb, already_found=found):
+                found.add(move)
+            self.assertEqual(set(all_moves[move_class]), found)
+            self.assertEqual(len(all_moves[move_class]), len(found))
+
+    def test_first_move_is_search_result(self):
+        mb = MarkedBoard.from_game_board(board_from_string(STUCK))
+        for move_class, moves in find_all_moves(mb).items():
+            self.assertEqual(move_class.search(mb), moves[0] if moves else None)
+
+
+class TestHouseMemos(unittest.TestCase):
+    def test_pack_house(self):
+        self.assertEqual(pack_house([set(), {1}, {2, 9}]), (0, 1, 2 | 256))
+
+    def test_repeated_search_hits_memo(self):
+        clear_house_memos()
+        mb = MarkedBoard.from_game_board(board_from_string(STUCK))
+        first = list(NakedDouble.iter_search(mb))
+        misses = naked_doubles_in_house.cache_info().misses
+        self.assertEqual(list(NakedDouble.iter_search(mb)), first)
+        self.assertEqual(naked_doubles_in_house.cache_info().misses, misses)
+        self.assertEqual(naked_doubles_in_house.cache_info().hits, 27)
+
+    def test_unproductive_double_is_skipped(self):
+        # The two cells already rule out 3 to 9, and every other cell rules out
+        # 1 and 2, so there is nothing left for a naked double to do.
+        pair, rest = sum(1 << n for n in range(2, 9)), 0b11
+        self.assertEqual(naked_doubles_in_house((pair, pair) + (rest,) * 7), ())
+        self.assertEqual(
+            naked_doubles_in_house((pair, pair) + (0,) * 7), ((0, 1, (1, 2)),)
+        )
+
+    def test_hidden_double_of_highest_number_in_house(self):
+        # On a 4 by 4 board, 3 and 4 can only go in the first two cells.
+        rest = 0b1100
+        self.assertEqual(hidden_doubles_in_house((0, 0, rest, rest)), ((0, 1, (3, 4)),))
+
+
 if __name__ == "__main__":
     unittest.main()
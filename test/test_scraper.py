@@ -0,0 +1,200 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import importlib.util
+import json
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import urllib.error
+
+SCRAPER_DIR = os.path.join(os.path.dirname(__file__), "..", "scraper")
+sys.path.insert(0, SCRAPER_DIR)
+
+from puzzle_index import PuzzleIndex
+
+
+def load_script(name):
+    path = os.path.join(SCRAPER_DIR, name + ".py")
+    spec = importlib.util.spec_from_file_location(name.replace("-", "_"), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+scraper = load_script("scrape-puzzles")
+concat_json = load_script("concat-json")
+
+PAGE = """
+<INPUT NAME=cheat ID="cheat" TYPE=hidden VALUE="{puzzle}">
+<INPUT ID="editmask" TYPE=hidden VALUE="{mask}">
+<INPUT TYPE=hidden NAME=level VALUE="{level}">
+<INPUT TYPE=hidden NAME=pid VALUE="{pid}">
+"""
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Every fail_every'th request fails with a 503, every bad_page_every'th
+    # gets a page with no puzzle, and puzzle ids cycle through n_ids
+    # distinct ids.
+    fail_every = 3
+    bad_page_every = 0
+    n_ids = 1000
+    lock = threading.Lock()
+    n_requests = 0
+
+    def do_GET(self):
+        with self.lock:
+            StubHandler.n_requests += 1
+            n = StubHandler.n_requests
+        if n % self.fail_every == 0:
+            self.send_response(503)
+            self.end_headers()
+            return
+        if self.bad_page_every and n % self.bad_page_every == 0:
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(b"<html>Down for maintenance</html>")
+            return
+        body = PAGE.format(puzzle="1" * 81, mask="0" * 81, level=2, pid=n % self.n_ids)
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(body.encode("utf-8"))
+
+    def log_message(self, *args):
+        pass
+
+
+class TestScraper(unittest.TestCase):
+    def setUp(self):
+        StubHandler.n_requests = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = "http://127.0.0.1:%d/" % self.server.server_address[1]
+        self.dir = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.dir.name, "puzzles.jsonl")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.dir.cleanup()
+
+    def scrape(self, n, index=None):
+        return scraper.scrape_puzzles(
+            self.url, 2, n, self.output, workers=3, rate=100, backoff=0.01, index=index
+        )
+
+    def read_output(self):
+        with open(self.output) as f:
+            return [json.loads(line) for line in f]
+
+    def test_scrape_with_retries(self):
+        self.assertEqual(self.scrape(5), 5)
+        puzzles = self.read_output()
+        self.assertEqual(len(puzzles), 5)
+        self.assertEqual(len({p["id"] for p in puzzles}), 5)
+        self.assertEqual(puzzles[0]["level"], "2")
+        self.assertGreater(StubHandler.n_requests, 5)
+
+    def test_resume(self):
+        self.scrape(3)
+        self.assertEqual(self.scrape(5), 2)
+        self.assertEqual(self.scrape(5), 0)
+        self.assertEqual(len(self.read_output()), 5)
+
+    def test_skip_known_ids(self):
+        StubHandler.n_ids = 4
+        try:
+            with PuzzleIndex(":memory:") as index:
+                self.assertEqual(self.scrape(3), 3)
+                self.assertEqual(self.scrape(6, index), 1)
+                self.assertEqual(len(index), 4)
+        finally:
+            StubHandler.n_ids = 1000
+        self.assertEqual(len({p["id"] for p in self.read_output()}), 4)
+
+    def test_bad_pages(self):
+        StubHandler.bad_page_every = 4
+        try:
+            self.assertEqual(self.scrape(5), 5)
+        finally:
+            StubHandler.bad_page_every = 0
+        self.assertEqual(len(self.read_output()), 5)
+        with self.assertRaises(ValueError):
+            scraper.scrape_puzzle_data(b"<html></html>")
+
+    def test_retries_take_tokens(self):
+        class CountingBucket(scraper.TokenBucket):
+            n_acquired = 0
+
+            def acquire(self):
+                self.n_acquired += 1
+                super().acquire()
+
+        StubHandler.fail_every = 1
+        bucket = CountingBucket(rate=1000)
+        try:
+            with self.assertRaises(urllib.error.HTTPError):
+                scraper.fetch(self.url, {}, retries=2, backoff=0, bucket=bucket)
+        finally:
+            StubHandler.fail_every = 3
+        self.assertEqual(bucket.n_acquired, 3)
+        self.assertEqual(StubHandler.n_requests, 3)
+
+    def test_token_bucket(self):
+        bucket = scraper.TokenBucket(rate=50)
+        start = time.monotonic()
+        for _ in range(6):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+
+class TestPuzzleIndex(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "puzzles.sqlite")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_persistent(self):
+        with PuzzleIndex(self.path) as index:
+            self.assertTrue(index.add("123"))
+            self.assertFalse(index.add(123))
+            self.assertEqual(index.add_many(["1", "2", "123"]), 2)
+        with PuzzleIndex(self.path) as index:
+            self.assertIn("2", index)
+            self.assertNotIn("3", index)
+            self.assertEqual(len(index), 3)
+
+    def test_merge(self):
+        array = os.path.join(self.dir.name, "a.json")
+        lines = os.path.join(self.dir.name, "b.jsonl")
+        with open(array, "w") as f:
+            json.dump([{"id": "1"}, {"id": "2"}, {"id": "1"}], f)
+        with open(lines, "w") as f:
+            f.write('{"id": "2"}\n{"id": "3"}\n')
+        # The scraper has already collected every id into the shared database.
+        with PuzzleIndex(self.path) as index:
+            index.add_many(["1", "2", "3"])
+        out = io.StringIO()
+        with PuzzleIndex(self.path, concat_json.EXPORTED_TABLE) as index:
+            self.assertEqual(concat_json.merge([array, lines], index, out), 3)
+        self.assertEqual([r["id"] for r in json.loads(out.getvalue())], ["1", "2", "3"])
+        # A second merge against the same index has nothing new.
+        out = io.StringIO()
+        with PuzzleIndex(self.path, concat_json.EXPORTED_TABLE) as index:
+            self.assertEqual(concat_json.merge([lines], index, out), 0)
+        self.assertEqual(json.loads(out.getvalue()), [])
+        with PuzzleIndex(self.path) as index:
+            self.assertEqual(len(index), 3)
+
+    def test_table_names(self):
+        with self.assertRaises(ValueError):
+            PuzzleIndex(self.path, "ids; DROP TABLE ids")
+
+
+if __name__ == "__main__":
+    unittest.main()
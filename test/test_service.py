@@ -0,0 +1,106 @@
+from concurrent.futures import ThreadPoolExecutor
+from sudoku import service
+from sudoku.service import Histogram, MicroBatcher, SolveService, load_test
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+from puzzles import EASY, MEDIUM, HARD, STUCK
+
+
+class TestHistogram(unittest.TestCase):
+    def test_observe(self):
+        histogram = Histogram([1, 10])
+        for value in [0.5, 1, 5, 50]:
+            histogram.observe(value)
+        self.assertEqual(
+            histogram.to_dict(),
+            {"buckets": {"1": 2, "10": 1, "+Inf": 1}, "count": 4, "sum": 56.5},
+        )
+
+
+class TestSolveService(unittest.TestCase):
+    async def run_service(self, puzzles, concurrency, max_wait=0.01):
+        with ThreadPoolExecutor(2) as executor:
+            batcher = MicroBatcher(executor, max_batch_size=8, max_wait=max_wait)
+            service = SolveService(batcher)
+            await service.start(port=0)
+            try:
+                results = await load_test(
+                    "127.0.0.1", service.port, puzzles, concurrency
+                )
+                reader, writer = await asyncio.open_connection(
+                    "127.0.0.1", service.port
+                )
+                writer.write(b"GET /metrics HTTP/1.1\r\nConnection: close\r\n\r\n")
+                response = await reader.read()
+                writer.close()
+            finally:
+                await service.stop()
+        metrics = json.loads(response.split(b"\r\n\r\n", 1)[1])
+        return results, metrics
+
+    def test_load(self):
+        puzzles = [EASY, MEDIUM, HARD, STUCK] * 10
+        results, metrics = asyncio.run(self.run_service(puzzles, concurrency=20))
+        self.assertEqual([r["puzzle"] for r in results], puzzles)
+        self.assertEqual(
+            [r["status"] for r in results[:4]], ["SOLVED", "SOLVED", "SOLVED", "STUCK"]
+        )
+        self.assertEqual(metrics["latency_seconds"]["count"], 40)
+        self.assertEqual(metrics["batch_size"]["sum"], 40)
+        # Concurrent requests were gathered into batches.
+        self.assertLess(metrics["batch_size"]["count"], 40)
+
+    def test_bad_request(self):
+        results, _ = asyncio.run(self.run_service(["123"], concurrency=1))
+        self.assertIn("error", results[0])
+
+    def test_bad_request_in_batch(self):
+        solve_line = service.solve_line
+
+        def failing_solve_line(line):
+            if line == b"fail":
+                raise RuntimeError("boom")
+            return solve_line(line)
+
+        puzzles = [EASY, EASY, '{"puzzle": null}', "fail", EASY]
+        with mock.patch("sudoku.service.solve_line", failing_solve_line):
+            # Long enough to wait for every request to join the batch.
+            results, metrics = asyncio.run(
+                self.run_service(puzzles, concurrency=5, max_wait=0.2)
+            )
+        self.assertEqual(metrics["batch_size"]["count"], 1)
+        self.assertEqual([r["status"] for r in results[:2]], ["SOLVED", "SOLVED"])
+        self.assertIn("error", results[2])
+        self.assertEqual(results[3], {"error": "RuntimeError: boom"})
+        self.assertEqual(results[4]["status"], "SOLVED")
+
+    def test_server_error(self):
+        def failing_solve_batch(lines):
+            raise RuntimeError("boom")
+
+        with mock.patch("sudoku.service._solve_batch", failing_solve_batch):
+            results, _ = asyncio.run(self.run_service([EASY, HARD], concurrency=2))
+        self.assertEqual(results, [{"error": "RuntimeError: boom"}] * 2)
+
+    def test_stop_waits_for_batches(self):
+        async def run():
+            with ThreadPoolExecutor(1) as executor:
+                batcher = MicroBatcher(executor, max_batch_size=1, max_wait=0)
+                batcher.start()
+                request = asyncio.ensure_future(batcher.solve(HARD.encode()))
+                # Let the batch be handed to the executor, then stop at once.
+                while not batcher._batch_tasks:
+                    await asyncio.sleep(0)
+                await batcher.stop()
+                self.assertFalse(batcher._batch_tasks)
+                self.assertTrue(request.done())
+                return request.result()
+
+        self.assertEqual(asyncio.run(run())["status"], "SOLVED")
+
+
+if __name__ == "__main__":
+    unittest.main()
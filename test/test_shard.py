@@ -0,0 +1,95 @@
+from sudoku.cli import run_solve
+from sudoku.shard import ShardIntegrityError, merge, shard_of, split
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from puzzles import EASY, MEDIUM, HARD, STUCK
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+
+class TestShards(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.lines = [
+            json.dumps({"id": str(k), "puzzle": p})
+            for k, p in enumerate([EASY, MEDIUM, HARD, STUCK] * 3)
+        ] + [EASY.replace("1", ".", 1), '{"puzzle": null}']
+        self.corpus = os.path.join(self.dir.name, "corpus.jsonl")
+        with open(self.corpus, "w") as f:
+            f.write("\n".join(self.lines) + "\n")
+        self.shard_dir = os.path.join(self.dir.name, "shards")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def run_nodes(self, manifest):
+        # Each shard is solved by a separate process, standing in for a node.
+        nodes, result_paths = [], []
+        for entry in manifest["shards"]:
+            out_path = os.path.join(self.dir.name, f"results-{entry['shard']}.jsonl")
+            shard_path = os.path.join(self.shard_dir, entry["path"])
+            command = [sys.executable, "-m", "sudoku", "shard", "run"]
+            nodes.append(subprocess.Popen(command + [shard_path, out_path], cwd=ROOT))
+            result_paths.append(out_path)
+        for node in nodes:
+            self.assertEqual(node.wait(timeout=60), 0)
+        return result_paths
+
+    def test_deterministic(self):
+        line = self.lines[0].encode()
+        self.assertEqual(shard_of(line, 7), shard_of(line, 7))
+        # Keyed on id, so the same id goes to the same shard.
+        other = json.dumps({"id": "0", "puzzle": HARD}).encode()
+        self.assertEqual(shard_of(line, 7), shard_of(other, 7))
+        # Without an id, keyed on the board, however it is written.
+        self.assertEqual(
+            shard_of(EASY.encode(), 7), shard_of(EASY.replace("0", ".").encode(), 7)
+        )
+
+    def test_split_run_merge(self):
+        with open(self.corpus, "rb") as f:
+            manifest = split(f, self.shard_dir, 3)
+        self.assertEqual(sum(s["n_puzzles"] for s in manifest["shards"]), 14)
+        result_paths = self.run_nodes(manifest)
+        out = io.BytesIO()
+        self.assertEqual(merge(manifest, result_paths[::-1], out), 14)
+        merged = [json.loads(line) for line in out.getvalue().splitlines()]
+        expected = io.BytesIO()
+        with open(self.corpus, "rb") as f:
+            run_solve(f, expected)
+        expected = [json.loads(line) for line in expected.getvalue().splitlines()]
+        key = lambda r: json.dumps(r, sort_keys=True)
+        self.assertEqual(sorted(merged, key=key), sorted(expected, key=key))
+
+    def test_integrity_checks(self):
+        with open(self.corpus, "rb") as f:
+            manifest = split(f, self.shard_dir, 2)
+        result_paths = self.run_nodes(manifest)
+        with self.assertRaises(ShardIntegrityError):
+            merge(manifest, result_paths[:1], io.BytesIO())
+        with self.assertRaises(ShardIntegrityError):
+            merge(manifest, result_paths + result_paths[:1], io.BytesIO())
+        with open(result_paths[0], "rb") as f:
+            lines = f.readlines()
+        # Drop a result line.
+        with open(result_paths[0], "wb") as f:
+            f.writelines(lines[:1] + lines[2:])
+        with self.assertRaises(ShardIntegrityError):
+            merge(manifest, result_paths, io.BytesIO())
+        # Alter a result line.
+        with open(result_paths[0], "wb") as f:
+            f.writelines(
+                lines[:1] + [lines[1].replace(b"SOLVED", b"STUCK")] + lines[2:]
+            )
+        with self.assertRaises(ShardIntegrityError):
+            merge(manifest, result_paths, io.BytesIO())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,346 @@
+from sudoku.boards import MarkedBoard, Contradiction
+from sudoku.moves import NakedSingle
+from sudoku.solver import Solver, SolveStatus
+from sudoku.batch import solve_batch, solve_shared
+from sudoku.bulk import BoardBatch
+from sudoku.analysis import (
+    MOVE_INDEX,
+    MoveSchedule,
+    DifficultySchedule,
+    DifficultyCurveDensity,
+    GradeOnlySolution,
+    ScheduleBatch,
+    final_difficulty,
+    sigmoid,
+    TIERS,
+    solve_within_tier,
+    classify_tier,
+    solve_lazily,
+)
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from puzzles import EASY, MEDIUM, HARD, STUCK, board_from_string
+
+
+class TestGradeOnlySolution(unittest.TestCase):
+    def test_matches_full_solution(self):
+        for puzzle in [EASY, MEDIUM, HARD]:
+            board = board_from_string(puzzle)
+            full = Solver(board).solve()
+            graded = Solver(board, solution=GradeOnlySolution()).solve()
+            self.assertTrue(graded.is_full_solution)
+            self.assertEqual(graded.move_vector, MoveSchedule(full).schedule[-1])
+            self.assertAlmostEqual(
+                graded.difficulty, DifficultySchedule(full).difficulty
+            )
+            self.assertEqual(graded.n_steps, len(full.moves))
+
+    def test_many_moves_of_one_type(self):
+        # Large boards can need more moves of a type than exp can handle.
+        solution = GradeOnlySolution()
+        for _ in range(1000):
+            solution.record(NakedSingle((0, 0), 1))
+        self.assertAlmostEqual(solution.difficulty, 1.0)
+        self.assertAlmostEqual(
+            solution.difficulty, final_difficulty(solution.move_vector)
+        )
+
+    def test_keeps_no_history(self):
+        solver = Solver(board_from_string(MEDIUM), solution=GradeOnlySolution())
+        sln = solver.solve()
+        self.assertFalse(hasattr(sln, "moves"))
+        self.assertEqual(solver.found_moves, set())
+
+
+class TestScheduleBatch(unittest.TestCase):
+    def setUp(self):
+        self.solutions = [
+            Solver(board_from_string(p)).solve() for p in [EASY, MEDIUM, HARD, STUCK]
+        ]
+
+    def reference_schedules(self, solution):
+        # The schedules, worked out a move at a time.
+        move_vector = [0] * len(MOVE_INDEX)
+        moves, difficulties = [], []
+        for move in solution.iter_moves():
+            moves.append(move_vector[:])
+            difficulties.append(
+                sum(sigmoid(DifficultySchedule.MOVE_INCREMENT * c) for c in move_vector)
+            )
+            move_vector[MOVE_INDEX[move.__class__]] += 1
+        return moves + [move_vector], difficulties
+
+    def test_matches_move_at_a_time(self):
+        batch = ScheduleBatch.from_solutions(self.solutions)
+        self.assertEqual(len(batch), 4)
+        schedules = batch.difficulty_schedule()
+        move_schedules = batch.move_schedules()
+        for k, solution in enumerate(self.solutions):
+            moves, difficulties = self.reference_schedules(solution)
+            start, end = batch.offsets[k], batch.offsets[k + 1]
+            self.assertEqual(batch.move_schedule(k).tolist(), moves)
+            self.assertEqual(move_schedules[start:end].tolist(), moves[:-1])
+            self.assertEqual(batch.move_vectors[k].tolist(), moves[-1])
+            np.testing.assert_allclose(schedules[start:end], difficulties)
+            self.assertEqual(MoveSchedule(solution).schedule, moves)
+            self.assertEqual(
+                DifficultySchedule(solution).difficulty, schedules[end - 1]
+            )
+
+    def test_final_difficulty(self):
+        batch = ScheduleBatch.from_solutions(self.solutions[:3])
+        difficulties = [DifficultySchedule(s).difficulty for s in self.solutions[:3]]
+        np.testing.assert_allclose(batch.difficulties(), difficulties)
+        for solution, difficulty in zip(self.solutions[:3], difficulties):
+            vector = MoveSchedule(solution).schedule[-1]
+            self.assertAlmostEqual(final_difficulty(vector), difficulty)
+
+    def test_empty(self):
+        batch = ScheduleBatch.from_solutions([])
+        self.assertEqual(batch.move_vectors.shape, (0, len(MOVE_INDEX)))
+        self.assertEqual(batch.difficulty_schedule().shape, (0,))
+        with self.assertRaises(ValueError):
+            ScheduleBatch([0, 1], [0, 1])
+
+
+class TestDifficultyCurveDensity(unittest.TestCase):
+    def setUp(self):
+        self.solutions = [
+            Solver(board_from_string(p)).solve() for p in [EASY, MEDIUM, HARD] * 3
+        ]
+        self.schedules = [DifficultySchedule(s).schedule for s in self.solutions]
+
+    def test_streaming_matches_one_pass(self):
+        whole = DifficultyCurveDensity()
+        whole.add_solutions(self.solutions)
+        streamed = DifficultyCurveDensity()
+        for k in range(0, len(self.solutions), 2):
+            streamed.add_solutions(self.solutions[k : k + 2])
+        np.testing.assert_array_equal(whole.counts, streamed.counts)
+        self.assertEqual(len(whole.counts), max(len(s) for s in self.schedules))
+        self.assertEqual(
+            whole.n_curves.tolist(),
+            [
+                sum(len(s) > step for s in self.schedules)
+                for step in range(len(whole.counts))
+            ],
+        )
+
+    def test_quantiles(self):
+        density = DifficultyCurveDensity(n_bins=600)
+        density.add_solutions(self.solutions)
+        quantiles = density.quantiles([0.0, 0.5, 1.0])
+        width = density.bin_edges[1]
+        for step in range(len(density.counts)):
+            values = [s[step] for s in self.schedules if len(s) > step]
+            for q, estimate in zip([0.0, 0.5, 1.0], quantiles[:, step]):
+                exact = np.quantile(values, q, method="inverted_cdf")
+                self.assertLessEqual(abs(estimate - exact), width + 1e-9)
+
+    def test_plots_a_few_artists(self):
+        density = DifficultyCurveDensity()
+        density.add_solutions(self.solutions)
+        ax = mock.Mock()
+        density.plot_quantile_bands(ax, color="red")
+        self.assertEqual(ax.fill_between.call_count, 2)
+        self.assertEqual(ax.plot.call_count, 1)
+        density.plot_density(ax)
+        (steps, edges, fractions), _ = ax.pcolormesh.call_args
+        self.assertEqual(fractions.shape, (density.n_bins, len(density.counts)))
+        np.testing.assert_allclose(fractions.sum(axis=0), 1)
+
+
+class TestBudgets(unittest.TestCase):
+    def test_step_budget(self):
+        solver = Solver(board_from_string(MEDIUM))
+        sln = solver.solve(max_steps=10)
+        self.assertEqual(sln.status, SolveStatus.BUDGET_EXHAUSTED)
+        self.assertEqual(len(sln.moves), 10)
+        self.assertFalse(sln.is_full_solution)
+        # Solving again resumes from the partial solution.
+        sln = solver.solve()
+        self.assertEqual(sln.status, SolveStatus.SOLVED)
+        full = Solver(board_from_string(MEDIUM)).solve()
+        self.assertEqual(sln.moves, full.moves)
+
+    def test_time_budget(self):
+        sln = Solver(board_from_string(HARD)).solve(max_seconds=0.0)
+        self.assertEqual(sln.status, SolveStatus.BUDGET_EXHAUSTED)
+        self.assertEqual(sln.moves, [])
+
+    def test_batch_budget_stats(self):
+        boards = [board_from_string(p) for p in [EASY, MEDIUM, HARD, STUCK]]
+        stats = solve_batch(boards, max_steps=60).budget_stats
+        self.assertEqual(stats.n_puzzles, 4)
+        self.assertEqual(stats.n_solved, 2)
+        self.assertEqual(stats.n_stuck, 1)
+        self.assertEqual(stats.n_budget_exhausted, 1)
+        self.assertEqual(stats.max_steps, 60)
+
+
+class TestSharedBatch(unittest.TestCase):
+    def test_matches_grade_only(self):
+        puzzles = [EASY, MEDIUM, HARD, STUCK] * 3
+        shared = solve_shared(BoardBatch.from_strings(puzzles), jobs=2, chunk_size=5)
+        for record, puzzle in zip(shared.results, puzzles):
+            sln = Solver(
+                board_from_string(puzzle), solution=GradeOnlySolution()
+            ).solve()
+            self.assertEqual(record["status"], sln.status.value)
+            self.assertEqual(record["n_steps"], sln.n_steps)
+            self.assertEqual(record["move_vector"].tolist(), sln.move_vector)
+            self.assertAlmostEqual(record["difficulty"], sln.difficulty)
+        self.assertEqual(shared.traces, {})
+        self.assertEqual(shared.budget_stats.n_solved, 9)
+        self.assertEqual(shared.budget_stats.n_stuck, 3)
+
+    def test_budget_and_traces(self):
+        boards = BoardBatch.from_strings([EASY, MEDIUM, HARD, STUCK])
+        shared = solve_shared(boards, jobs=2, max_steps=60, keep_traces=True)
+        expected = solve_batch(
+            [board_from_string(p) for p in [EASY, MEDIUM, HARD, STUCK]], max_steps=60
+        )
+        for k in ["n_solved", "n_stuck", "n_budget_exhausted", "max_steps"]:
+            self.assertEqual(
+                getattr(shared.budget_stats, k), getattr(expected.budget_stats, k)
+            )
+        self.assertEqual(sorted(shared.traces), [0, 1, 2, 3])
+        for idx, sln in enumerate(expected.solutions):
+            self.assertEqual(shared.traces[idx].moves, sln.moves)
+
+
+class TestIterSolve(unittest.TestCase):
+    def test_yields_same_moves_as_solve(self):
+        full = Solver(board_from_string(HARD)).solve()
+        moves = [mv for mv, _ in Solver(board_from_string(HARD)).iter_solve()]
+        self.assertEqual(moves, full.moves)
+
+    def test_early_stop_and_resume(self):
+        solver = Solver(board_from_string(MEDIUM))
+        first = []
+        for mv, marks in solver.iter_solve():
+            first.append(mv)
+            if len(first) == 5:
+                break
+        self.assertFalse(solver.is_complete)
+        rest = [mv for mv, _ in solver.iter_solve()]
+        self.assertEqual(solver.status, SolveStatus.SOLVED)
+        full = Solver(board_from_string(MEDIUM)).solve()
+        self.assertEqual(first + rest, full.moves)
+
+
+class TestTiers(unittest.TestCase):
+    def test_solve_within_tier(self):
+        sln = solve_within_tier(board_from_string(EASY), TIERS["singles"])
+        self.assertEqual(sln.status, SolveStatus.SOLVED)
+        sln = solve_within_tier(board_from_string(MEDIUM), TIERS["singles"])
+        self.assertEqual(sln.status, SolveStatus.TIER_EXCEEDED)
+        sln = solve_within_tier(board_from_string(STUCK))
+        self.assertEqual(sln.status, SolveStatus.STUCK)
+
+    def test_solve_within_difficulty(self):
+        sln = solve_within_tier(board_from_string(MEDIUM), max_difficulty=2.0)
+        self.assertEqual(sln.status, SolveStatus.TIER_EXCEEDED)
+        self.assertGreater(sln.difficulty, 2.0)
+        sln = solve_within_tier(board_from_string(MEDIUM), max_difficulty=3.0)
+        self.assertEqual(sln.status, SolveStatus.SOLVED)
+
+    def test_classify_tier(self):
+        tiers = [classify_tier(board_from_string(p)) for p in [EASY, MEDIUM, HARD]]
+        self.assertEqual(tiers, ["singles", "intersections", "doubles"])
+        self.assertIsNone(classify_tier(board_from_string(STUCK)))
+
+
+class TestWavefront(unittest.TestCase):
+    def test_solves_in_fewer_rounds(self):
+        for puzzle in [EASY, MEDIUM, HARD]:
+            sequential = Solver(board_from_string(puzzle))
+            sequential.solve()
+            solver = Solver(board_from_string(puzzle))
+            sln = solver.solve(wavefront=True)
+            self.assertEqual(sln.status, SolveStatus.SOLVED)
+            self.assertEqual(solver.marked_board.placed, sequential.marked_board.placed)
+            self.assertEqual(sum(sln.rounds), len(sln.moves))
+            self.assertEqual(sln.n_rounds, len(sln.rounds))
+            self.assertLess(sln.n_rounds, len(sln.moves) / 3)
+
+    def test_round_depth_in_grade_only_mode(self):
+        full = Solver(board_from_string(MEDIUM)).solve(wavefront=True)
+        graded = Solver(board_from_string(MEDIUM), solution=GradeOnlySolution())
+        graded = graded.solve(wavefront=True)
+        self.assertEqual(graded.n_rounds, full.n_rounds)
+        self.assertEqual(graded.n_steps, len(full.moves))
+
+    def test_stuck(self):
+        sln = Solver(board_from_string(STUCK)).solve(wavefront=True)
+        self.assertEqual(sln.status, SolveStatus.STUCK)
+
+
+class TestLazySolution(unittest.TestCase):
+    def test_reconstructs_trace(self):
+        full = Solver(board_from_string(HARD)).solve()
+        lazy = solve_lazily(board_from_string(HARD), checkpoint_interval=10)
+        self.assertEqual(lazy.status, SolveStatus.SOLVED)
+        self.assertAlmostEqual(lazy.difficulty, DifficultySchedule(full).difficulty)
+        self.assertEqual(len(lazy.checkpoints), len(full.moves) // 10)
+        self.assertIsNone(lazy._trace)
+        self.assertEqual(list(lazy.iter_moves(start=25)), full.moves[25:])
+        self.assertIsNone(lazy._trace)
+        steps = list(lazy.iter_steps(start=25))
+        self.assertEqual([move for move, _ in steps], full.moves[25:])
+        self.assertEqual([marks for _, marks in steps[:-1]], full.marks[25:])
+        # The trace is replayed, rather than solved again from scratch.
+        with mock.patch.object(Solver, "solve", side_effect=AssertionError):
+            self.assertEqual(lazy.moves, full.moves)
+        self.assertEqual(lazy.trace.status, SolveStatus.SOLVED)
+        self.assertGreater(lazy.elapsed, 0.0)
+        self.assertEqual(lazy.trace.elapsed, lazy.elapsed)
+        self.assertEqual(lazy.trace.n_steps, len(full.moves))
+        self.assertEqual(lazy.moves, full.moves)
+        self.assertEqual(lazy.marks, full.marks)
+        self.assertEqual(MoveSchedule(lazy).schedule, MoveSchedule(full).schedule)
+
+    def test_pack_round_trip(self):
+        solver = Solver(board_from_string(MEDIUM))
+        solver.solve(max_steps=20)
+        unpacked = MarkedBoard.unpack(solver.marked_board.pack())
+        self.assertEqual(unpacked.data, solver.marked_board.data)
+        self.assertEqual(unpacked.placed, solver.marked_board.placed)
+
+
+class TestContradictions(unittest.TestCase):
+    def test_duplicate_number(self):
+        board = board_from_string(EASY)
+        board[(0, 1)] = 1
+        self.assertIsNotNone(MarkedBoard.from_game_board(board).contradiction)
+        with self.assertRaises(Contradiction):
+            MarkedBoard.from_game_board(board, strict=True)
+        sln = Solver(board).solve()
+        self.assertEqual(sln.status, SolveStatus.CONTRADICTION)
+        self.assertEqual(sln.moves, [])
+
+    def test_empty_cell(self):
+        mb = MarkedBoard(strict=True)
+        with self.assertRaises(Contradiction) as ctx:
+            mb.add_marks({(4, 4): set(range(1, 10))})
+        self.assertEqual(ctx.exception.coords, (4, 4))
+
+    def test_number_missing_from_house(self):
+        mb = MarkedBoard()
+        mb.add_marks({(0, j): {5} for j in range(8)})
+        self.assertIsNone(mb.contradiction)
+        mb.add_marks({(0, 8): {5}})
+        self.assertIsNotNone(mb.contradiction)
+
+    def test_valid_puzzles_have_no_contradiction(self):
+        for puzzle in [EASY, MEDIUM, HARD, STUCK]:
+            solver = Solver(board_from_string(puzzle))
+            solver.solve()
+            self.assertIsNone(solver.marked_board.contradiction)
+
+
+if __name__ == "__main__":
+    unittest.main()
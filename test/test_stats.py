@@ -0,0 +1,112 @@
+from sudoku.moves import MOVES_ORDER, NakedSingle
+from sudoku.solver import SolveStatus
+from sudoku.stats import StatsStore, build_stats
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from puzzles import EASY, MEDIUM, HARD, STUCK
+
+
+class TestStatsStore(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.puzzles = [EASY, MEDIUM, HARD, STUCK]
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.dir.name, name)
+
+    def build_websudoku(self):
+        # The mask hides the empty cells, so whatever stands in for the
+        # solution under them is never read.
+        with open(self.path("corpus.jsonl"), "w") as f:
+            for k, puzzle in enumerate(self.puzzles):
+                mask = "".join("1" if c == "0" else "0" for c in puzzle)
+                record = {"id": str(100 + k), "level": str(k + 1), "mask": mask}
+                record["puzzle"] = puzzle.replace("0", "1")
+                f.write(json.dumps(record) + "\n")
+        return build_stats(self.path("corpus.jsonl"), self.path("store"), jobs=1)
+
+    def test_build_from_websudoku(self):
+        store = self.build_websudoku()
+        self.assertEqual(len(store), 4)
+        self.assertEqual(store["id"].tolist(), [100, 101, 102, 103])
+        self.assertEqual(store["level"].tolist(), [1, 2, 3, 4])
+        self.assertEqual(
+            store["n_clues"].tolist(), [81 - p.count("0") for p in self.puzzles]
+        )
+        self.assertEqual(
+            store["status"].tolist(),
+            [SolveStatus.SOLVED.value] * 3 + [SolveStatus.STUCK.value],
+        )
+        self.assertEqual(store["move_vector"].shape, (4, len(MOVES_ORDER)))
+        self.assertTrue((store["move_vector"].sum(axis=1) == store["n_steps"]).all())
+
+    def test_build_from_lines(self):
+        with open(self.path("puzzles.txt"), "w") as f:
+            f.write("\n".join(self.puzzles) + "\n")
+        store = build_stats(self.path("puzzles.txt"), self.path("store"), jobs=1)
+        self.assertEqual(store["id"].tolist(), [-1] * 4)
+        self.assertEqual(store["level"].tolist(), [0] * 4)
+
+    def test_open(self):
+        self.build_websudoku()
+        mapped = StatsStore(self.path("store"))
+        loaded = StatsStore(self.path("store"), mmap=False)
+        self.assertIsInstance(mapped["difficulty"], np.memmap)
+        self.assertNotIsInstance(loaded["difficulty"], np.memmap)
+        for name in mapped.columns:
+            np.testing.assert_array_equal(mapped[name], loaded[name])
+
+    def test_queries(self):
+        store = StatsStore.write(
+            self.path("store"),
+            {
+                "id": np.arange(6),
+                "level": np.array([1, 1, 2, 2, 2, 4]),
+                "n_clues": np.full(6, 30),
+                "status": np.ones(6),
+                "move_vector": np.arange(6 * len(MOVES_ORDER)).reshape(6, -1),
+                "difficulty": np.array([1.0, 3.0, 2.0, 6.0, 4.0, 5.0]),
+                "n_steps": np.full(6, 50),
+                "elapsed": np.zeros(6),
+            },
+        )
+        self.assertEqual(store.top_k("difficulty", 3).tolist(), [3, 5, 4])
+        self.assertEqual(store.top_k("difficulty", 10).tolist(), [3, 5, 4, 1, 2, 0])
+        self.assertEqual(store.top_k("difficulty", 0).tolist(), [])
+        self.assertEqual(store.top_k("difficulty", -2).tolist(), [])
+        where = np.asarray(store["level"]) == 2
+        self.assertEqual(store.top_k("difficulty", 2, where=where).tolist(), [3, 4])
+        self.assertEqual(store.group_by("level"), {1: 2, 2: 3, 4: 1})
+        self.assertEqual(
+            store.group_by("level", "difficulty", "mean"), {1: 2.0, 2: 4.0, 4: 5.0}
+        )
+        self.assertEqual(
+            store.group_by("level", "difficulty", "max"), {1: 3.0, 2: 6.0, 4: 5.0}
+        )
+        self.assertEqual(
+            store.group_by("level", "difficulty", "min", where=~where), {1: 1.0, 4: 5.0}
+        )
+        # Keys that can't be counted directly are grouped by sorting.
+        self.assertEqual(
+            store.group_by("difficulty"), {float(k): 1 for k in range(1, 7)}
+        )
+        with self.assertRaises(ValueError):
+            store.group_by("level", "difficulty", "median")
+        counts = store.move_counts(NakedSingle)
+        self.assertEqual(
+            counts.tolist(),
+            store["move_vector"][:, MOVES_ORDER.index(NakedSingle)].tolist(),
+        )
+        self.assertEqual(store.rows([3])["id"].tolist(), [3])
+
+
+if __name__ == "__main__":
+    unittest.main()